@@ -0,0 +1,70 @@
+"""Cost of the chain completion tracking with fractions.Fraction strings and with integer ack shares.
+
+Every chain looks like a TPC-C new-order: the root calls 5 to 15 items and every item calls its stock, so each
+fan-out node computes the shares of its calls and the root gathers one ack per leaf, in shuffled order. The
+Fraction variant formats and parses the share strings exactly like the old StatefulFunction and BaseNetworking.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/ack_counting.py
+"""
+import fractions
+import random
+import timeit
+
+from system_x.common.ack_share import (ROOT_ACK_SHARE, EMPTY_ACK_SHARE, split_ack_share, add_ack_share,
+                                       compare_to_root)
+
+N_CHAINS = 1_000
+ITEMS_PER_ORDER = (5, 15)
+# the items that call their stock, the others are leaves themselves
+STOCK_CALLS_PER_ITEM = 1
+
+
+def fraction_chain(n_items: int, leaf_order: list[int]) -> bool:
+    item_share = str(fractions.Fraction(f'1/{n_items}') * fractions.Fraction(1))
+    leaf_shares = [str(fractions.Fraction(f'1/{STOCK_CALLS_PER_ITEM}') * fractions.Fraction(item_share))
+                   for _ in range(n_items)]
+    total = fractions.Fraction(0)
+    done = False
+    for leaf in leaf_order:
+        total += fractions.Fraction(leaf_shares[leaf])
+        if total == 1:
+            done = True
+        elif total > 1:
+            raise AssertionError
+    return done
+
+
+def integer_chain(n_items: int, leaf_order: list[int]) -> bool:
+    leaf_shares = [split_ack_share(item_share, STOCK_CALLS_PER_ITEM)[0]
+                   for item_share in split_ack_share(ROOT_ACK_SHARE, n_items)]
+    total = EMPTY_ACK_SHARE
+    done = False
+    for leaf in leaf_order:
+        total = add_ack_share(total, leaf_shares[leaf])
+        completion = compare_to_root(total)
+        if completion == 0:
+            done = True
+        elif completion > 0:
+            raise AssertionError
+    return done
+
+
+def main():
+    rng = random.Random(0)
+    chains = []
+    for _ in range(N_CHAINS):
+        n_items = rng.randint(*ITEMS_PER_ORDER)
+        leaf_order = list(range(n_items))
+        rng.shuffle(leaf_order)
+        chains.append((n_items, leaf_order))
+    assert all(fraction_chain(*chain) and integer_chain(*chain) for chain in chains)
+    print(f"{N_CHAINS} new-order chains with {ITEMS_PER_ORDER[0]}-{ITEMS_PER_ORDER[1]} items")
+    print(f"{'scheme':<12}{'per epoch (ms)':>16}{'per ack (us)':>14}")
+    n_acks = sum(n_items for n_items, _ in chains)
+    for scheme, chain_fn in (("Fraction", fraction_chain), ("integer", integer_chain)):
+        seconds = min(timeit.repeat(lambda: [chain_fn(*chain) for chain in chains], number=1, repeat=5))
+        print(f"{scheme:<12}{seconds * 1000:>16.2f}{seconds / n_acks * 1_000_000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Epoch latency and allocations of the Aria reservation state.
+
+Every epoch registers the reads and writes of N transactions, removes a single logic aborted transaction,
+runs the conflict check, commits and cleans up the state for the next epoch. The allocations are the
+tracemalloc blocks that are still alive after the cleanup, i.e. what the epoch arena failed to reuse.
+In the hot key case every transaction reads and writes the same HOT_KEYS keys OPS_PER_TRANSACTION times, the
+contenders are the t_ids waiting behind the reservations of those keys when the aborted transaction is removed.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/aria_epoch.py
+"""
+import random
+import time
+import tracemalloc
+
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+
+OPERATOR_NAME = "bench"
+EPOCH_SIZES = (1_000, 10_000, 100_000)
+OPS_PER_TRANSACTION = 4
+N_EPOCHS = 5
+HOT_KEYS = 2
+
+
+def count_contenders(state: InMemoryOperatorState) -> int:
+    return sum(1 if type(key_contenders) is int else len(key_contenders[1])
+               for contenders in (state.read_contenders, state.write_contenders)
+               for key_contenders in contenders[OPERATOR_NAME].values())
+
+
+def run_epoch(state: InMemoryOperatorState, accesses: list[tuple[int, int, bool]], aborted: set[int],
+              stats: dict | None = None) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    for t_id, key, is_write in accesses:
+        if is_write:
+            state.put(key, t_id, t_id, OPERATOR_NAME)
+        else:
+            state.deal_with_reads(key, t_id, OPERATOR_NAME)
+    timings["populate"] = time.perf_counter()
+    if stats is not None:
+        stats["contenders"] = count_contenders(state)
+        timings["populate"] = time.perf_counter()
+    state.remove_aborted_from_rw_sets(aborted)
+    timings["remove aborted"] = time.perf_counter()
+    state.commit(state.check_conflicts())
+    timings["check & commit"] = time.perf_counter()
+    state.cleanup()
+    timings["cleanup"] = time.perf_counter()
+    previous = start
+    for phase, end in timings.items():
+        timings[phase], previous = (end - previous) * 1000, end
+    return timings
+
+
+def benchmark(n_transactions: int, n_keys: int, accesses: list[tuple[int, int, bool]], rng: random.Random):
+    state = InMemoryOperatorState({OPERATOR_NAME})
+    state.batch_insert({key: 0 for key in range(n_keys)}, OPERATOR_NAME)
+    # warm up the arena
+    run_epoch(state, accesses, {1})
+    best = {}
+    stats = {}
+    for _ in range(N_EPOCHS):
+        for phase, ms in run_epoch(state, accesses, {rng.randrange(1, n_transactions + 1)}, stats).items():
+            best[phase] = min(best.get(phase, ms), ms)
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    run_epoch(state, accesses, {1})
+    live_blocks = sum(stat.count_diff for stat in
+                      tracemalloc.take_snapshot().compare_to(snapshot_before, "filename")
+                      if "tracemalloc" not in stat.traceback[0].filename)
+    tracemalloc.stop()
+    print(f"{n_transactions:>8}{best['populate']:>16.2f}{best['remove aborted']:>22.3f}"
+          f"{best['check & commit']:>22.2f}{best['cleanup']:>15.3f}{live_blocks:>14}{stats['contenders']:>13}")
+
+
+def main():
+    rng = random.Random(42)
+    header = (f"{'t_ids':>8}{'populate (ms)':>16}{'remove aborted (ms)':>22}{'check & commit (ms)':>22}"
+              f"{'cleanup (ms)':>15}{'live blocks':>14}{'contenders':>13}")
+    print(header)
+    for n_transactions in EPOCH_SIZES:
+        n_keys = n_transactions * 10
+        accesses = [(t_id, rng.randrange(n_keys), op % 2 == 1)
+                    for t_id in range(1, n_transactions + 1) for op in range(OPS_PER_TRANSACTION)]
+        benchmark(n_transactions, n_keys, accesses, rng)
+    print("\nhot keys")
+    print(header)
+    for n_transactions in EPOCH_SIZES:
+        accesses = [(t_id, op % HOT_KEYS, op % 2 == 1)
+                    for t_id in range(1, n_transactions + 1) for op in range(OPS_PER_TRANSACTION)]
+        benchmark(n_transactions, HOT_KEYS, accesses, rng)
+
+
+if __name__ == "__main__":
+    main()
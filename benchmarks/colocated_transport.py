@@ -0,0 +1,117 @@
+"""Chain latency between two co-located worker processes, over TCP to the host IP or over Unix domain sockets.
+
+Every chain is a remote call from the root worker to its peer and the ack of the peer back to the root, sent with the
+protocol NetworkingManagers and received with FramedProtocol, like between two workers started by BootSysX. CHAINS
+chains run one after the other for the latency, and IN_FLIGHT chains at a time for the throughput.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/colocated_transport.py
+"""
+import asyncio
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+from system_x.common.framed_protocol import FramedProtocol
+from system_x.common.message_schemas import RunFunRemote, Ack
+from system_x.common.message_types import MessageType
+from system_x.common.run_func_payload import RunFuncPayload
+from system_x.common.tcp_networking import NetworkingManager, MessagingMode, unix_socket_path
+
+ROOT_PORT = 16000
+PEER_PORT = 16001
+CHAINS = 20_000
+IN_FLIGHT = 100
+ROUNDS = 200
+
+
+async def start_servers(port: int, unix_socket_dir: str | None, frame_handler) -> list[asyncio.AbstractServer]:
+    loop = asyncio.get_running_loop()
+    servers = [await loop.create_server(lambda: FramedProtocol(frame_handler), '0.0.0.0', port)]
+    if unix_socket_dir is not None:
+        servers.append(await loop.create_unix_server(lambda: FramedProtocol(frame_handler),
+                                                     unix_socket_path(unix_socket_dir, port)))
+    return servers
+
+
+def protocol_networking(port: int, unix_socket_dir: str | None) -> NetworkingManager:
+    return NetworkingManager(port, mode=MessagingMode.PROTOCOL_PROTOCOL, unix_socket_dir=unix_socket_dir)
+
+
+async def peer(unix_socket_dir: str | None, ready: multiprocessing.Event):
+    networking = protocol_networking(PEER_PORT, unix_socket_dir)
+    tasks = set()
+
+    def frame_handler(message: bytes):
+        call: RunFunRemote = networking.decode_message(message)
+        task = asyncio.create_task(networking.send_message(networking.host_name, ROOT_PORT,
+                                                           msg=Ack(call.t_id, (1, 0), [], 1),
+                                                           msg_type=MessageType.Ack))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await start_servers(PEER_PORT, unix_socket_dir, frame_handler)
+    ready.set()
+    await asyncio.Event().wait()
+
+
+def run_peer(unix_socket_dir: str | None, ready: multiprocessing.Event):
+    asyncio.run(peer(unix_socket_dir, ready))
+
+
+async def root(unix_socket_dir: str | None) -> tuple[list[float], float]:
+    networking = protocol_networking(ROOT_PORT, unix_socket_dir)
+    acks: dict[int, asyncio.Future] = {}
+
+    def frame_handler(message: bytes):
+        ack: Ack = networking.decode_message(message)
+        acks.pop(ack.ack_id).set_result(None)
+
+    servers = await start_servers(ROOT_PORT, unix_socket_dir, frame_handler)
+
+    async def chain(t_id: int):
+        acks[t_id] = asyncio.get_running_loop().create_future()
+        call = RunFunRemote(t_id, 0, False, RunFuncPayload(b'request-id', t_id, 0, 'stock', 0, 'update_stock', (5, )))
+        await networking.send_message(networking.host_name, PEER_PORT, msg=call, msg_type=MessageType.RunFunRemote)
+        await acks[t_id]
+
+    # open the connections
+    await chain(-1)
+    latencies: list[float] = []
+    for t_id in range(CHAINS):
+        start = time.perf_counter()
+        await chain(t_id)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    start = time.perf_counter()
+    for chain_round in range(ROUNDS):
+        await asyncio.gather(*(chain(CHAINS + chain_round * IN_FLIGHT + i) for i in range(IN_FLIGHT)))
+    throughput = ROUNDS * IN_FLIGHT / (time.perf_counter() - start)
+    await networking.close_all_connections()
+    for server in servers:
+        server.close()
+    return latencies, throughput
+
+
+def measure(unix_socket_dir: str | None) -> tuple[list[float], float]:
+    ready = multiprocessing.Event()
+    peer_process = multiprocessing.Process(target=run_peer, args=(unix_socket_dir, ready), daemon=True)
+    peer_process.start()
+    ready.wait()
+    try:
+        return asyncio.run(root(unix_socket_dir))
+    finally:
+        peer_process.terminate()
+        peer_process.join()
+
+
+def main():
+    print(f"{'transport':<12}{'p50 (us)':>10}{'p99 (us)':>10}{'chains/s':>12}")
+    with tempfile.TemporaryDirectory() as unix_socket_dir:
+        for name, directory in (("tcp", None), ("unix", unix_socket_dir)):
+            latencies, throughput = measure(directory)
+            percentiles = statistics.quantiles(latencies, n=100)
+            print(f"{name:<12}{percentiles[49]:>10.1f}{percentiles[98]:>10.1f}{throughput:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
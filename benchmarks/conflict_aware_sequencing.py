@@ -0,0 +1,59 @@
+"""Aborts and epochs of a Zipf 0.99 YCSB-T backlog with arrival order and conflict aware epochs.
+
+Every transaction transfers from a Zipf chosen target key, the one the sequencer sees, to a uniformly chosen
+key. Each epoch runs on a single worker with Arias default conflict check, the concurrency aborts are
+rescheduled at the head of the next epoch like in the protocol, until the backlog is committed.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/conflict_aware_sequencing.py
+"""
+import itertools
+import random
+
+from system_x.common.run_func_payload import RunFuncPayload, SequencedItem
+
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+from worker.sequencer.sequencer import Sequencer
+
+OPERATOR_NAME = "ycsb"
+N_KEYS = 10_000
+ZIPF_CONST = 0.99
+N_TRANSACTIONS = 20_000
+EPOCH_SIZE = 1_000
+
+
+def run_backlog(transactions: list[tuple[int, int]], conflict_aware: bool) -> tuple[int, int, int]:
+    sequencer = Sequencer(EPOCH_SIZE, conflict_aware=conflict_aware)
+    sequencer.distributed_log = [SequencedItem(t_id, RunFuncPayload(b'', target_key, 0, OPERATOR_NAME, 0,
+                                                                    'transfer', (other_key, )))
+                                 for t_id, (target_key, other_key) in enumerate(transactions)]
+    state = InMemoryOperatorState({OPERATOR_NAME})
+    state.batch_insert({key: 0 for key in range(N_KEYS)}, OPERATOR_NAME)
+    n_epochs = 0
+    n_aborts = 0
+    while sequencer.distributed_log:
+        for sequenced_item in sequencer.get_epoch():
+            for key in (sequenced_item.payload.key, sequenced_item.payload.params[0]):
+                value = state.get(key, sequenced_item.t_id, OPERATOR_NAME)
+                state.put(key, value + 1, sequenced_item.t_id, OPERATOR_NAME)
+        aborts = state.check_conflicts()
+        state.commit(aborts)
+        state.cleanup()
+        sequencer.increment_epoch(len(transactions), aborts)
+        n_epochs += 1
+        n_aborts += len(aborts)
+    return n_epochs, n_aborts, sequencer.deferred_conflicts
+
+
+def main():
+    rng = random.Random(42)
+    zipf_weights = list(itertools.accumulate(1 / (rank ** ZIPF_CONST) for rank in range(1, N_KEYS + 1)))
+    transactions = [(rng.choices(range(N_KEYS), cum_weights=zipf_weights)[0], rng.randrange(N_KEYS))
+                    for _ in range(N_TRANSACTIONS)]
+    print(f"{'sequencer':<16}{'epochs':>8}{'aborts':>10}{'deferred':>10}")
+    for name, conflict_aware in (("arrival order", False), ("conflict aware", True)):
+        n_epochs, n_aborts, n_deferred = run_backlog(transactions, conflict_aware)
+        print(f"{name:<16}{n_epochs:>8}{n_aborts:>10}{n_deferred:>10}")
+
+
+if __name__ == "__main__":
+    main()
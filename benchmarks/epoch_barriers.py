@@ -0,0 +1,114 @@
+"""Latency of the barriers of an Aria epoch, routed through the coordinator or exchanged between the workers.
+
+The workers run AriaProcessingDone, AriaCommit and SyncCleanup like an epoch without fallback over a simulated
+network: every message waits LATENCY_MS and costs MESSAGE_COST_MS of serialized send and receive time at both
+ends, so a node that sends or receives many messages becomes a bottleneck. The coordinator collects the
+contributions of every worker and broadcasts the merge, the peer barriers use PeerBarrier, all-to-all and along
+a tree.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/epoch_barriers.py
+"""
+import asyncio
+import time
+
+from system_x.common.message_schemas import Message, Empty, AriaProcessingDone, AriaCommit
+from system_x.common.message_types import MessageType
+
+from worker.transactional_protocols.peer_barrier import PeerBarrier, merge_contributions
+
+N_WORKERS = (2, 8, 32)
+N_EPOCHS = 5
+LATENCY_MS = 5.0
+MESSAGE_COST_MS = 0.5
+COORDINATOR = -1
+
+
+class SimulatedNetwork(object):
+
+    def __init__(self, node_ids: list[int]):
+        # the send and receive work of a node is serialized, like on its event loop
+        self.node_locks: dict[int, asyncio.Lock] = {node_id: asyncio.Lock() for node_id in node_ids}
+
+    async def send(self, source: int, destination: int, deliver, *args):
+        async with self.node_locks[source]:
+            await asyncio.sleep(MESSAGE_COST_MS / 1000)
+        asyncio.get_running_loop().create_task(self.receive(destination, deliver, *args))
+
+    async def receive(self, destination: int, deliver, *args):
+        await asyncio.sleep(LATENCY_MS / 1000)
+        async with self.node_locks[destination]:
+            await asyncio.sleep(MESSAGE_COST_MS / 1000)
+        await deliver(*args)
+
+
+def epoch_messages(worker_id: int) -> list[tuple[MessageType, Message]]:
+    return [(MessageType.AriaProcessingDone, AriaProcessingDone({worker_id})),
+            (MessageType.AriaCommit, AriaCommit({worker_id}, worker_id, 100)),
+            (MessageType.SyncCleanup, Empty())]
+
+
+async def coordinator_epochs(n_workers: int) -> float:
+    network = SimulatedNetwork(list(range(n_workers)) + [COORDINATOR])
+    contributions: list = []
+    events = {worker_id: asyncio.Event() for worker_id in range(n_workers)}
+
+    async def worker_done(worker_id: int):
+        events[worker_id].set()
+
+    async def coordinator_receive(msg_type: MessageType, message):
+        contributions.append(message)
+        if len(contributions) == n_workers:
+            merge_contributions(msg_type, contributions)
+            contributions.clear()
+            for worker_id in range(n_workers):
+                await network.send(COORDINATOR, worker_id, worker_done, worker_id)
+
+    async def worker(worker_id: int):
+        for _ in range(N_EPOCHS):
+            for msg_type, message in epoch_messages(worker_id):
+                await network.send(worker_id, COORDINATOR, coordinator_receive, msg_type, message)
+                await events[worker_id].wait()
+                events[worker_id].clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(n_workers)))
+    return (time.perf_counter() - start) / N_EPOCHS * 1000
+
+
+async def peer_epochs(n_workers: int, all_to_all_max: int) -> float:
+    network = SimulatedNetwork(list(range(n_workers)))
+    barriers: dict[int, PeerBarrier] = {}
+
+    async def deliver(worker_id: int, message: tuple):
+        barriers[worker_id].receive(*message)
+
+    for worker_id in range(n_workers):
+        async def send(destination: int, message: tuple, source: int = worker_id):
+            await network.send(source, destination, deliver, destination, message)
+        barriers[worker_id] = PeerBarrier(worker_id, list(range(n_workers)), send, all_to_all_max=all_to_all_max)
+
+    async def worker(worker_id: int):
+        for epoch in range(N_EPOCHS):
+            for msg_type, message in epoch_messages(worker_id):
+                await barriers[worker_id].sync(msg_type, epoch, message)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(n_workers)))
+    return (time.perf_counter() - start) / N_EPOCHS * 1000
+
+
+async def run():
+    print(f"{'workers':>8}{'coordinator (ms)':>20}{'all-to-all (ms)':>18}{'tree (ms)':>12}")
+    for n_workers in N_WORKERS:
+        coordinator_ms = await coordinator_epochs(n_workers)
+        all_to_all_ms = await peer_epochs(n_workers, all_to_all_max=n_workers)
+        tree_ms = await peer_epochs(n_workers, all_to_all_max=0)
+        print(f"{n_workers:>8}{coordinator_ms:>20.1f}{all_to_all_ms:>18.1f}{tree_ms:>12.1f}")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
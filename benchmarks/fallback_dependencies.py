@@ -0,0 +1,64 @@
+"""Dependency graph of the fallback phase under a YCSB-T workload with Zipf 0.99 contention.
+
+Every transaction transfers from a uniformly chosen key to a Zipf chosen key, i.e. reads and writes both.
+Compares the builder that makes every t_id wait for all smaller t_ids on a shared key with the one that only
+keeps the immediate predecessors, in build time and in the number of edges (asyncio.Event waits).
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/fallback_dependencies.py
+"""
+import itertools
+import random
+import time
+from collections import defaultdict
+
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+
+OPERATOR_NAME = "ycsb"
+N_KEYS = 10_000
+ZIPF_CONST = 0.99
+RESCHEDULED_SIZES = (1_000, 5_000, 10_000)
+
+
+def all_smaller_t_ids(state: InMemoryOperatorState, t_ids_to_reschedule: set[int]) -> dict[int, set[int]]:
+    # the previous builder, every accessor of a key waits for all the smaller ones
+    t_id_dependencies: dict[int, set[int]] = defaultdict(set)
+    combined_accesses = defaultdict(set)
+    for t_id in t_ids_to_reschedule:
+        for key in state.read_sets[OPERATOR_NAME].get(t_id, ()):
+            combined_accesses[key].add(t_id)
+        for key in state.write_sets[OPERATOR_NAME].get(t_id, ()):
+            combined_accesses[key].add(t_id)
+    for valid_t_ids_accessed_key in combined_accesses.values():
+        for t_id in valid_t_ids_accessed_key:
+            t_id_dependencies[t_id].update({tid for tid in valid_t_ids_accessed_key if tid < t_id})
+    return t_id_dependencies
+
+
+def timed(fn, *args) -> tuple[float, int]:
+    start = time.perf_counter()
+    dependencies = fn(*args)
+    if isinstance(dependencies, tuple):
+        dependencies = dependencies[0]
+    return (time.perf_counter() - start) * 1000, sum(len(t_ids) for t_ids in dependencies.values())
+
+
+def main():
+    rng = random.Random(42)
+    zipf_weights = list(itertools.accumulate(1 / (rank ** ZIPF_CONST) for rank in range(1, N_KEYS + 1)))
+    print(f"{'t_ids':>8}{'all smaller (ms)':>19}{'edges':>12}{'predecessors (ms)':>20}{'edges':>10}")
+    for n_transactions in RESCHEDULED_SIZES:
+        state = InMemoryOperatorState({OPERATOR_NAME})
+        for t_id in range(1, n_transactions + 1):
+            key = rng.randrange(N_KEYS)
+            key2 = rng.choices(range(N_KEYS), cum_weights=zipf_weights)[0]
+            for k in (key, key2):
+                state.get(k, t_id, OPERATOR_NAME)
+                state.put(k, t_id, t_id, OPERATOR_NAME)
+        t_ids_to_reschedule = set(range(1, n_transactions + 1))
+        old_ms, old_edges = timed(all_smaller_t_ids, state, t_ids_to_reschedule)
+        new_ms, new_edges = timed(state.get_dep_transactions, t_ids_to_reschedule)
+        print(f"{n_transactions:>8}{old_ms:>19.1f}{old_edges:>12}{new_ms:>20.1f}{new_edges:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Idle CPU and latency at low input rates of the spinning and the event driven function scheduler.
+
+A simulated ingress holds the sequencer lock for its fetch window like SysXKafkaIngress, sequences the transactions
+that arrived in the meantime and yields once after a poll that sequenced work, the scheduler takes an epoch whenever
+the log is not empty and runs it for EPOCH_MS. The spinning variant is the old `await asyncio.sleep(0)` loop, the
+event driven one blocks on Sequencer.work_available while the log is empty. CPU is the process time over the wall
+time of the run, latency is from the arrival of a transaction to the start of its epoch.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/function_scheduler_idle.py
+"""
+import asyncio
+import statistics
+import time
+
+from system_x.common.run_func_payload import RunFuncPayload
+
+from worker.sequencer.sequencer import Sequencer
+
+RUN_SEC = 3.0
+INPUT_RATES = (0, 10, 100)
+FETCH_WINDOW_MS = 1
+EPOCH_MS = 0.5
+
+
+async def ingress(sequencer: Sequencer, rate: int, arrivals: dict[bytes, float], stop: float):
+    next_arrival = time.perf_counter() + 1 / rate if rate else float('inf')
+    request_id = 0
+    while time.perf_counter() < stop:
+        async with sequencer.lock:
+            await asyncio.sleep(FETCH_WINDOW_MS / 1000)
+            while next_arrival <= time.perf_counter():
+                payload = RunFuncPayload(request_id=str(request_id).encode(), key=request_id, timestamp=0,
+                                         operator_name='ycsb', partition=0, function_name='read', params=())
+                arrivals[payload.request_id] = next_arrival
+                sequencer.sequence(payload)
+                request_id += 1
+                next_arrival += 1 / rate
+        if sequencer.work_available.is_set():
+            await asyncio.sleep(0)
+
+
+async def wait_spinning(sequencer: Sequencer):
+    await asyncio.sleep(0)
+
+
+async def wait_event_driven(sequencer: Sequencer):
+    if sequencer.distributed_log:
+        await asyncio.sleep(0)
+        return
+    sequencer.work_available.clear()
+    await sequencer.work_available.wait()
+
+
+async def scheduler(sequencer: Sequencer, wait_for_work, arrivals: dict[bytes, float], latencies: list[float],
+                    stop: float):
+    while time.perf_counter() < stop:
+        await wait_for_work(sequencer)
+        async with sequencer.lock:
+            sequence = sequencer.get_epoch()
+            if sequence:
+                epoch_start = time.perf_counter()
+                latencies += [(epoch_start - arrivals[item.payload.request_id]) * 1000 for item in sequence]
+                await asyncio.sleep(EPOCH_MS / 1000)
+                sequencer.increment_epoch(sequencer.t_counter, set())
+
+
+async def run(wait_for_work, rate: int) -> tuple[float, list[float]]:
+    sequencer = Sequencer(1_000)
+    sequencer.set_worker_id(0)
+    sequencer.set_n_workers(1)
+    arrivals: dict[bytes, float] = {}
+    latencies: list[float] = []
+    stop = time.perf_counter() + RUN_SEC
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    ingress_task = asyncio.create_task(ingress(sequencer, rate, arrivals, stop))
+    scheduler_task = asyncio.create_task(scheduler(sequencer, wait_for_work, arrivals, latencies, stop))
+    await ingress_task
+    # an idle event driven scheduler only notices the end on its next wake-up
+    sequencer.work_available.set()
+    await scheduler_task
+    return (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100, latencies
+
+
+def main():
+    print(f"{'scheduler':<14}{'input (tx/s)':>14}{'CPU (%)':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for name, wait_for_work in (("spinning", wait_spinning), ("event driven", wait_event_driven)):
+        for rate in INPUT_RATES:
+            cpu, latencies = asyncio.run(run(wait_for_work, rate))
+            p50 = statistics.median(latencies) if latencies else float('nan')
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else float('nan')
+            print(f"{name:<14}{rate:>14}{cpu:>10.1f}{p50:>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
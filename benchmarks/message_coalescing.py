@@ -0,0 +1,68 @@
+"""Frames and time to send the remote calls of chain heavy epochs, one frame per message or coalesced per destination.
+
+Every epoch fans out FAN_OUT RunFunRemote sized messages per transaction to a single peer at once, like the item
+calls of TPC-C new-order, over a local TCP connection. Each frame is one write and one drain of the pool connection.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/message_coalescing.py
+"""
+import asyncio
+import time
+from struct import unpack
+
+from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
+from system_x.common.tcp_networking import NetworkingManager, MessagingMode
+
+N_EPOCHS = 20
+TRANSACTIONS_PER_EPOCH = 100
+FAN_OUT = 10
+# coalescing windows in microseconds, -1 sends every message on its own
+WINDOWS_US = (-1, 0, 100)
+PAYLOAD = (1, b'request-id', 'stock', 'update_stock', 1234, 0, 1700000000000, False, (5, ),
+           ('10.0.0.1', 6000, 1, (1 << 61, 0), [], 0))
+
+
+async def run(coalesce_window_us: int) -> tuple[float, int, int]:
+    n_frames = 0
+    n_messages = 0
+
+    async def request_handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal n_frames, n_messages
+        try:
+            while True:
+                (size, ) = unpack('>Q', await reader.readexactly(8))
+                frame = await reader.readexactly(size)
+                n_frames += 1
+                n_messages += len(NetworkingManager.split_batch(frame)) if frame[0] == MessageType.Batch else 1
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(request_handler, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    networking = NetworkingManager(None, mode=MessagingMode.PROTOCOL_PROTOCOL, coalesce_window_us=coalesce_window_us)
+    start = time.perf_counter()
+    for _ in range(N_EPOCHS):
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(TRANSACTIONS_PER_EPOCH * FAN_OUT):
+                tg.create_task(networking.send_message_batched('127.0.0.1', port, msg=PAYLOAD,
+                                                               msg_type=MessageType.RunFunRemote,
+                                                               serializer=Serializer.MSGPACK))
+    elapsed = time.perf_counter() - start
+    while n_messages < N_EPOCHS * TRANSACTIONS_PER_EPOCH * FAN_OUT:
+        await asyncio.sleep(0.01)
+    await networking.close_all_connections()
+    server.close()
+    await server.wait_closed()
+    return elapsed, n_frames, n_messages
+
+
+def main():
+    print(f"{N_EPOCHS} epochs of {TRANSACTIONS_PER_EPOCH} transactions with {FAN_OUT} remote calls each")
+    print(f"{'window (us)':<14}{'frames':>10}{'messages':>10}{'per epoch (ms)':>16}")
+    for window_us in WINDOWS_US:
+        elapsed, n_frames, n_messages = asyncio.run(run(window_us))
+        print(f"{window_us:<14}{n_frames:>10}{n_messages:>10}{elapsed / N_EPOCHS * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
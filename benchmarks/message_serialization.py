@@ -0,0 +1,83 @@
+"""Encode + decode time and size of every protocol message type, in its previous format and with its schema.
+
+The barrier messages used to be pickled, the remote calls, acks and control messages were positional msgpack tuples.
+The abort sets hold ABORTS t_ids and the deterministic reordering carries ACCESSES encoded accesses per set.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/message_serialization.py
+"""
+import timeit
+
+from system_x.common.base_networking import BaseNetworking
+from system_x.common.message_schemas import (RunFunRemote, Ack, AckCache, ChainAbort, Unlock, AriaProcessingDone,
+                                             AriaCommit, AriaFusedCommit, DeterministicReordering, RegisterWorker,
+                                             SnapID, WorkerSignal, EpochStats, Empty, PeerBarrierMessage,
+                                             peer_barrier_message, schema_deserialization)
+from system_x.common.message_types import MessageType
+from system_x.common.run_func_payload import RunFuncPayload
+from system_x.common.serialization import Serializer
+
+ABORTS = 100
+ACCESSES = 10_000
+N = 20_000
+
+ACK_PAYLOAD = ('10.0.0.1', 6000, 1234, (1 << 61, 0), [1, 2], 3)
+ABORT_SET = set(range(0, ABORTS * 7, 7))
+OTHER_ABORT_SET = set(range(3, ABORTS * 7, 7))
+EPOCH_RECORD = {"worker_id": 0, "epoch": 10, "start": 1.7e12, "duration_ms": 5.2, "sequence_size": 1000,
+                "logic_aborts": 1, "concurrency_aborts": 20, "chains": 100, "messages_sent": 200, "bytes_sent": 20000,
+                "phases": {"functions": 2.0, "chains": 1.0, "commit_sync": 1.5, "commit": 0.7}}
+
+# message type: previous message, previous serializer, schema message
+MESSAGES = {
+    MessageType.RunFunRemote: ((1234, b'request-id', 'stock', 'update_stock', 42, 0, 1700000000000, False, (5, ),
+                                ACK_PAYLOAD), Serializer.MSGPACK,
+                               RunFunRemote(1234, 10, False, RunFuncPayload(b'request-id', 42, 1700000000000, 'stock',
+                                                                            0, 'update_stock', (5, ),
+                                                                            ack_payload=ACK_PAYLOAD))),
+    MessageType.Ack: ((1234, (1 << 61, 0), [1, 2], 3), Serializer.MSGPACK, Ack(1234, (1 << 61, 0), [1, 2], 3)),
+    MessageType.AckCache: ((1234, ), Serializer.MSGPACK, AckCache(1234)),
+    MessageType.ChainAbort: ((1234, 'KeyError: 42', b'request-id'), Serializer.MSGPACK,
+                             ChainAbort(1234, 'KeyError: 42', b'request-id')),
+    MessageType.Unlock: ((1234, True), Serializer.MSGPACK, Unlock(1234, True)),
+    MessageType.AriaProcessingDone: ((ABORT_SET, ), Serializer.PICKLE, AriaProcessingDone(ABORT_SET)),
+    MessageType.AriaCommit: ((ABORT_SET, 5000, 1000), Serializer.PICKLE, AriaCommit(ABORT_SET, 5000, 1000)),
+    MessageType.AriaFusedCommit: ((ABORT_SET, OTHER_ABORT_SET, 5000, 1000), Serializer.PICKLE,
+                                  AriaFusedCommit(ABORT_SET, OTHER_ABORT_SET, 5000, 1000, True)),
+    MessageType.DeterministicReordering: ((b'r' * ACCESSES * 16, b'w' * ACCESSES * 16), Serializer.MSGPACK,
+                                          DeterministicReordering(b'r' * ACCESSES * 16, b'w' * ACCESSES * 16)),
+    MessageType.PeerBarrier: ((MessageType.AriaCommit, 0, (ABORT_SET, 5000, 1000)), Serializer.PICKLE,
+                              peer_barrier_message(MessageType.AriaCommit, 10, 0,
+                                                   AriaCommit(ABORT_SET, 5000, 1000))),
+    MessageType.SyncCleanup: (b'', Serializer.NONE, Empty()),
+    MessageType.RegisterWorker: (('10.0.0.1', 5000, 6000), Serializer.MSGPACK, RegisterWorker('10.0.0.1', 5000, 6000)),
+    MessageType.SnapID: ((0, 10, 1.7e12, 1.7e12 + 50), Serializer.MSGPACK, SnapID(0, 10, 1.7e12, 1.7e12 + 50)),
+    MessageType.Heartbeat: ((0, ), Serializer.MSGPACK, WorkerSignal(0)),
+    MessageType.EpochStats: ((0, [EPOCH_RECORD] * 10), Serializer.MSGPACK, EpochStats(0, [EPOCH_RECORD] * 10)),
+}
+
+
+def encode_decode(message, msg_type: MessageType, serializer: Serializer):
+    decoded = BaseNetworking.decode_message(BaseNetworking.encode_message(message, msg_type, serializer))
+    if isinstance(decoded, PeerBarrierMessage):
+        # the pickled barrier was decoded with its payload in one go
+        schema_deserialization(decoded.barrier_type, decoded.payload)
+
+
+def encode_decode_us(message, msg_type: MessageType, serializer: Serializer) -> tuple[float, int]:
+    encoded = BaseNetworking.encode_message(message, msg_type, serializer)
+    n = N if len(encoded) < 10_000 else N // 100
+    seconds = timeit.timeit(lambda: encode_decode(message, msg_type, serializer), number=n)
+    return seconds / n * 1_000_000, len(encoded)
+
+
+def main():
+    print(f"{'message type':<26}{'previous':>10}{'prev (us)':>11}{'schema (us)':>13}{'prev (B)':>10}{'schema (B)':>12}")
+    for msg_type, (previous_message, previous_serializer, message) in MESSAGES.items():
+        previous_us, previous_size = encode_decode_us(previous_message, msg_type, previous_serializer)
+        schema_us, schema_size = encode_decode_us(message, msg_type, Serializer.SCHEMA)
+        print(f"{msg_type.name:<26}{previous_serializer.name:>10}{previous_us:>11.2f}{schema_us:>13.2f}"
+              f"{previous_size:>10}{schema_size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Bytes on the wire and coordinator merge time of the deterministic reordering exchange.
+
+Compares the pickled read reservations and read/write sets (values included) that the workers used to send,
+merged per t_id at the coordinator, with the compact (key hash, t_id) arrays that are merged by concatenation.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/reordering_exchange.py
+"""
+import pickle
+import random
+import time
+
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+
+OPERATOR_NAME = "bench"
+N_WORKERS = (2, 8, 32)
+TRANSACTIONS_PER_WORKER = 1_000
+KEYS_PER_WORKER = 100_000
+VALUE = {"name": "x" * 100, "balance": 1_000, "history": list(range(20))}
+
+
+def fill_worker(worker_id: int, n_workers: int) -> InMemoryOperatorState:
+    state = InMemoryOperatorState({OPERATOR_NAME})
+    for t_id in range(TRANSACTIONS_PER_WORKER):
+        key = random.randrange(KEYS_PER_WORKER) * n_workers + worker_id
+        state.get(key, t_id * n_workers + worker_id, OPERATOR_NAME)
+        state.put(key, dict(VALUE, balance=key), t_id * n_workers + worker_id, OPERATOR_NAME)
+    return state
+
+
+def legacy_merge(messages: list[tuple[dict, dict, dict]]) -> tuple[dict, dict, dict]:
+    global_reads: dict = {OPERATOR_NAME: {}}
+    global_write_set: dict = {OPERATOR_NAME: {}}
+    global_read_set: dict = {OPERATOR_NAME: {}}
+    for reads, write_set, read_set in messages:
+        for key, t_id in reads[OPERATOR_NAME].items():
+            if key not in global_reads[OPERATOR_NAME] or t_id < global_reads[OPERATOR_NAME][key]:
+                global_reads[OPERATOR_NAME][key] = t_id
+        for global_set, local_set in ((global_write_set, write_set), (global_read_set, read_set)):
+            for t_id, keys in local_set[OPERATOR_NAME].items():
+                global_set[OPERATOR_NAME][t_id] = global_set[OPERATOR_NAME].get(t_id, type(keys)()) | keys
+    return global_reads, global_write_set, global_read_set
+
+
+def main():
+    print(f"{'workers':>8}{'legacy bytes':>16}{'compact bytes':>16}{'legacy merge (ms)':>20}{'compact merge (ms)':>20}")
+    for n_workers in N_WORKERS:
+        states = [fill_worker(worker_id, n_workers) for worker_id in range(n_workers)]
+        legacy = [(state.reads, state.write_sets, state.read_sets) for state in states]
+        compact = [state.get_compact_rw_sets() for state in states]
+
+        start = time.perf_counter()
+        legacy_global = pickle.dumps(legacy_merge([pickle.loads(pickle.dumps(message)) for message in legacy]))
+        legacy_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        compact_global = (b''.join(reads for reads, _ in compact), b''.join(writes for _, writes in compact))
+        compact_ms = (time.perf_counter() - start) * 1000
+
+        # every worker sends its sets and receives the merged ones
+        legacy_bytes = sum(len(pickle.dumps(message)) for message in legacy) + n_workers * len(legacy_global)
+        compact_bytes = sum(len(reads) + len(writes) for reads, writes in compact) + \
+            n_workers * sum(len(part) for part in compact_global)
+        print(f"{n_workers:>8}{legacy_bytes:>16,}{compact_bytes:>16,}{legacy_ms:>20.2f}{compact_ms:>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Memory and sort time of a backlog of sequenced requests, with the previous dataclasses and with the structs.
+
+A backlog of BACKLOG calls, each with its own request id, is queued as SequencedItems like the sequencer does. The
+memory per request is what tracemalloc sees allocated for the items, the payloads and their request ids. The sorts
+are the reschedule of the aborted transactions, a sort of the shuffled list and of the set of the aborted items.
+The receive cost is the decoding of a remote call into the payload that runs, for the previous format a positional
+msgpack tuple and a dataclass built from it.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/sequenced_backlog.py
+"""
+import random
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+
+import msgspec
+
+from system_x.common.message_schemas import RunFunRemote, schema_deserialization, schema_serialization
+from system_x.common.message_types import MessageType
+from system_x.common.run_func_payload import RunFuncPayload, SequencedItem
+
+BACKLOG = 100_000
+SORTS = 10
+DECODES = 100_000
+
+ACK_PAYLOAD = ('10.0.0.1', 6000, 1234, (1 << 61, 0), [1, 2], 3)
+
+
+@dataclass
+class DataclassPayload(object):
+    request_id: bytes
+    key: object
+    timestamp: int
+    operator_name: str
+    partition: int
+    function_name: str
+    params: tuple
+    response_socket: object = None
+    kafka_offset: int = -1
+    ack_payload: tuple | None = None
+
+
+@dataclass
+class DataclassSequencedItem(object):
+    t_id: int
+    payload: DataclassPayload
+
+    def __hash__(self):
+        return hash(self.t_id)
+
+    def __lt__(self, other):
+        return self.t_id < other.t_id
+
+
+def make_backlog(item_type, payload_type) -> list:
+    return [item_type(t_id, payload_type(request_id=t_id.to_bytes(8, 'big'), key=t_id, timestamp=1700000000000,
+                                         operator_name='stock', partition=0, function_name='update_stock',
+                                         params=(5, ), kafka_offset=t_id))
+            for t_id in range(BACKLOG)]
+
+
+def bytes_per_request(item_type, payload_type) -> float:
+    tracemalloc.start()
+    backlog = make_backlog(item_type, payload_type)
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del backlog
+    return allocated / BACKLOG
+
+
+def sort_ms(item_type, payload_type) -> tuple[float, float]:
+    backlog = make_backlog(item_type, payload_type)
+    random.seed(0)
+    random.shuffle(backlog)
+    backlog_set = set(backlog)
+    list_ms = timeit.timeit(lambda: sorted(backlog), number=SORTS) / SORTS * 1000
+    set_ms = timeit.timeit(lambda: sorted(backlog_set), number=SORTS) / SORTS * 1000
+    return list_ms, set_ms
+
+
+def receive_us() -> tuple[float, float]:
+    tuple_message = msgspec.msgpack.encode((1234, b'request-id', 'stock', 'update_stock', 42, 0, 1700000000000,
+                                            False, (5, ), ACK_PAYLOAD))
+    struct_message = schema_serialization(RunFunRemote(1234, 10, False,
+                                                       RunFuncPayload(b'request-id', 42, 1700000000000, 'stock', 0,
+                                                                      'update_stock', (5, ), ack_payload=ACK_PAYLOAD)))
+
+    def receive_tuple():
+        (t_id, request_id, operator_name, function_name, key, partition, timestamp, fallback_enabled, params,
+         ack_payload) = msgspec.msgpack.decode(tuple_message)
+        return t_id, DataclassPayload(request_id=request_id, key=key, timestamp=timestamp, operator_name=operator_name,
+                                      partition=partition, function_name=function_name, params=params,
+                                      ack_payload=ack_payload)
+
+    def receive_struct():
+        message = schema_deserialization(MessageType.RunFunRemote, struct_message)
+        return message.t_id, message.payload
+
+    return (timeit.timeit(receive_tuple, number=DECODES) / DECODES * 1_000_000,
+            timeit.timeit(receive_struct, number=DECODES) / DECODES * 1_000_000)
+
+
+def main():
+    print(f"{'records':<12}{'bytes / request':>17}{'sort list (ms)':>16}{'sort set (ms)':>15}")
+    for name, item_type, payload_type in (("dataclass", DataclassSequencedItem, DataclassPayload),
+                                          ("struct", SequencedItem, RunFuncPayload)):
+        list_ms, set_ms = sort_ms(item_type, payload_type)
+        print(f"{name:<12}{bytes_per_request(item_type, payload_type):>17.1f}{list_ms:>16.2f}{set_ms:>15.2f}")
+    tuple_us, struct_us = receive_us()
+    print(f"\nremote call to payload (us): tuple + dataclass {tuple_us:.2f}, struct {struct_us:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Send throughput of SysXSocketClient, writing and draining every message under the lock or with the send queue.
+
+SENDERS tasks each send MESSAGES messages of MESSAGE_SIZE bytes over one connection, like the acks and remote calls
+of an epoch, and wait for each send before the next. The previous client took the connection lock, wrote the message
+and drained for every send. The receiver only counts the bytes.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/socket_write_coalescing.py
+"""
+import asyncio
+import time
+
+from system_x.common.tcp_networking import SysXSocketClient
+
+MESSAGE_SIZE = 64
+MESSAGES = 1000
+SENDERS = (1, 10, 100)
+
+
+class LockAndDrainSocketClient(SysXSocketClient):
+
+    async def send_message(self, message: bytes):
+        async with self.lock:
+            self.writer.write(message)
+            await self.writer.drain()
+
+
+async def run(client_type, n_senders: int) -> float:
+    total = n_senders * MESSAGES * MESSAGE_SIZE
+    all_received = asyncio.Event()
+    n_received = 0
+
+    async def request_handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        nonlocal n_received
+        while data := await reader.read(2 ** 16):
+            n_received += len(data)
+            if n_received == total:
+                all_received.set()
+        writer.close()
+
+    server = await asyncio.start_server(request_handler, '127.0.0.1', 0)
+    client = client_type()
+    await client.create_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+    message = b'x' * MESSAGE_SIZE
+
+    async def sender():
+        for _ in range(MESSAGES):
+            await client.send_message(message)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(n_senders)))
+    await all_received.wait()
+    elapsed = time.perf_counter() - start
+    await client.close()
+    server.close()
+    await server.wait_closed()
+    return n_senders * MESSAGES / elapsed
+
+
+def main():
+    print(f"{'senders':<10}{'lock + drain (msg/s)':>22}{'send queue (msg/s)':>20}")
+    for n_senders in SENDERS:
+        previous = asyncio.run(run(LockAndDrainSocketClient, n_senders))
+        queued = asyncio.run(run(SysXSocketClient, n_senders))
+        print(f"{n_senders:<10}{previous:>22.0f}{queued:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
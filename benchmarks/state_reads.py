@@ -0,0 +1,65 @@
+"""Per read cost of InMemoryOperatorState.get for different value shapes.
+
+Compares the old defensive msgpack round trip with the copy free reads of immutable values and the
+copy on write mode that only decodes a cached encoding of the committed value.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/state_reads.py
+"""
+import timeit
+
+from msgspec import msgpack
+
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+
+N_READS = 100_000
+OPERATOR_NAME = "bench"
+
+DISTRICT = {
+    "D_ID": 1, "D_W_ID": 1, "D_NAME": "xtfhbwpjq", "D_STREET_1": "pjbbnbjqhqqfl", "D_STREET_2": "kgwqalyykgqhs",
+    "D_CITY": "ewvopklpepyfqy", "D_STATE": "PT", "D_ZIP": "123456789", "D_TAX": 0.1234, "D_YTD": 30000.0,
+    "D_NEXT_O_ID": 3001
+}
+
+CUSTOMER = {
+    "C_ID": 1, "C_D_ID": 1, "C_W_ID": 1, "C_FIRST": "eoyjuycgdwzr", "C_MIDDLE": "OE", "C_LAST": "BARBARBAR",
+    "C_STREET_1": "qjfqhrhnoxgv", "C_STREET_2": "xhlnmgsfjqzc", "C_CITY": "prvdbubhgxjrpnlwc", "C_STATE": "HH",
+    "C_ZIP": "123456789", "C_PHONE": "1234567890123456", "C_SINCE": "2024-09-23 10:25:53", "C_CREDIT": "GC",
+    "C_CREDIT_LIM": 50000.0, "C_DISCOUNT": 0.4321, "C_BALANCE": -10.0, "C_YTD_PAYMENT": 10.0,
+    "C_PAYMENT_CNT": 1, "C_DELIVERY_CNT": 0, "C_DATA": "x" * 500
+}
+
+VALUES = {
+    "int": 1_000_000,
+    "small dict": {"a": 1, "b": 2, "c": "three"},
+    "tpcc district": DISTRICT,
+    "tpcc customer": CUSTOMER,
+}
+
+
+def per_read_us(fn) -> float:
+    return min(timeit.repeat(fn, number=N_READS, repeat=5)) / N_READS * 1_000_000
+
+
+def main():
+    print(f"{'value':<16}{'round trip (us)':>18}{'default (us)':>16}{'copy on write (us)':>22}")
+    for value_name, value in VALUES.items():
+        default_state = InMemoryOperatorState({OPERATOR_NAME})
+        cow_state = InMemoryOperatorState({OPERATOR_NAME}, copy_on_write_reads=True)
+        for state in (default_state, cow_state):
+            state.batch_insert({0: value}, OPERATOR_NAME)
+
+        def round_trip():
+            msgpack.decode(msgpack.encode(default_state.data[OPERATOR_NAME].get(0)))
+
+        def default_read():
+            default_state.private_copy(0, default_state.data[OPERATOR_NAME].get(0), OPERATOR_NAME)
+
+        def cow_read():
+            cow_state.private_copy(0, cow_state.data[OPERATOR_NAME].get(0), OPERATOR_NAME)
+
+        print(f"{value_name:<16}{per_read_us(round_trip):>18.3f}"
+              f"{per_read_us(default_read):>16.3f}{per_read_us(cow_read):>22.3f}")
+
+
+if __name__ == "__main__":
+    main()
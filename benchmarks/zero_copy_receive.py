@@ -0,0 +1,112 @@
+"""Throughput and memory of receiving and decoding frames with StreamReader.readexactly or with FramedProtocol.
+
+The stream path is the old receive loop, an 8 byte header and readexactly(size), followed by the old decode that
+sliced the payload out of the message. The framed path is FramedProtocol with decode_message reading through a view.
+Every frame is a msgpack encoded bytes payload, like a chain payload or a serialized state, and is decoded on receipt.
+A blocking socket in a thread sends the frames, so its writes do not count in the memory of the receiver. The peak
+is the most memory that tracemalloc saw allocated while one frame was received and decoded, sent one at a time
+after the first.
+
+Run from the project root: PYTHONPATH=.:system_x-package python benchmarks/zero_copy_receive.py
+"""
+import asyncio
+import socket
+import struct
+import threading
+import time
+import tracemalloc
+
+from system_x.common.base_networking import BaseNetworking
+from system_x.common.framed_protocol import FramedProtocol
+from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer, msgpack_deserialization
+
+# frame size: frames sent for the throughput
+FRAMES = {100: 200_000, 10_000: 10_000, 10_000_000: 10}
+FRAMES_FOR_PEAK = 5
+
+
+def make_frame(size: int) -> bytes:
+    # the msgpack bin header takes 5 bytes and the message header 2
+    message = BaseNetworking.encode_message(b'x' * (size - 7), MessageType.RunFunRemote, Serializer.MSGPACK)
+    return struct.pack('>Q', len(message)) + message
+
+
+def old_decode(data: bytes):
+    return msgpack_deserialization(data[2:])
+
+
+async def start_stream_server(on_message) -> asyncio.Server:
+    async def request_handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                (size, ) = struct.unpack('>Q', await reader.readexactly(8))
+                on_message(old_decode(await reader.readexactly(size)))
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    return await asyncio.start_server(request_handler, '127.0.0.1', 0, limit=2 ** 32)
+
+
+async def start_framed_server(on_message) -> asyncio.Server:
+    def frame_handler(message: bytes | bytearray):
+        on_message(BaseNetworking.decode_message(message))
+
+    return await asyncio.get_running_loop().create_server(lambda: FramedProtocol(frame_handler), '127.0.0.1', 0)
+
+
+def send(port: int, frame: bytes, n_frames: int, received: threading.Semaphore | None, peaks: list[int]):
+    with socket.create_connection(('127.0.0.1', port)) as sock:
+        for _ in range(n_frames):
+            if received is not None:
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+            sock.sendall(frame)
+            if received is not None:
+                received.acquire()
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+
+
+async def run(start_server, size: int, n_frames: int, lockstep: bool) -> tuple[float, int]:
+    frame = make_frame(size)
+    done = asyncio.Event()
+    received = threading.Semaphore(0) if lockstep else None
+    n_received = 0
+    peaks: list[int] = []
+
+    def on_message(message: bytes):
+        nonlocal n_received
+        assert len(message) == size - 7
+        n_received += 1
+        if received is not None:
+            received.release()
+        if n_received == n_frames:
+            done.set()
+
+    server = await start_server(on_message)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    sender = asyncio.create_task(asyncio.to_thread(send, port, frame, n_frames, received, peaks))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await sender
+    server.close()
+    await server.wait_closed()
+    # the first frame also pays for the connection
+    return elapsed, max(peaks[1:], default=0)
+
+
+def main():
+    print(f"{'frame (B)':<12}{'receive path':<14}{'MB/s':>10}{'peak (KB)':>14}{'peak / frame':>14}")
+    for size, n_frames in FRAMES.items():
+        for name, start_server in (("stream", start_stream_server), ("framed", start_framed_server)):
+            elapsed, _ = asyncio.run(run(start_server, size, n_frames, lockstep=False))
+            tracemalloc.start()
+            _, peak = asyncio.run(run(start_server, size, FRAMES_FOR_PEAK, lockstep=True))
+            tracemalloc.stop()
+            print(f"{size:<12}{name:<14}{size * n_frames / elapsed / 1e6:>10.1f}{peak / 1024:>14.1f}"
+                  f"{peak / size:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
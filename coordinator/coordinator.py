@@ -8,6 +8,7 @@ from confluent_kafka.admin import AdminClient, NewTopic, KafkaException
 from system_x.common.base_operator import BaseOperator
 from system_x.common.local_state_backends import LocalStateBackend
 from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
 from system_x.common.tcp_networking import NetworkingManager
 from system_x.common.stateflow_graph import StateflowGraph
 from system_x.common.stateflow_ingress import IngressTypes
@@ -129,7 +130,8 @@ class Coordinator(object):
                                                 self.workers,
                                                 self.operator_state_backend,
                                                 self.get_current_completed_snapshot_id()),
-                                           msg_type=MessageType.RecoveryOwn)
+                                           msg_type=MessageType.RecoveryOwn,
+                                           serializer=Serializer.CLOUDPICKLE)
         logging.info(f'SENT RECOVER TO DEAD WORKER: {worker[0]}:{worker[1]}')
 
     async def send_recovery_to_healthy_workers(self, workers_to_remove: set[int]):
@@ -148,7 +150,8 @@ class Coordinator(object):
                                                                          self.workers,
                                                                          self.operator_state_backend,
                                                                          self.get_current_completed_snapshot_id()),
-                                                                    msg_type=MessageType.RecoveryOther))
+                                                                    msg_type=MessageType.RecoveryOther,
+                                                                    serializer=Serializer.CLOUDPICKLE))
             logging.info('SENT RECOVER TO HEALTHY WORKERS')
 
     def create_kafka_ingress_topics(self, stateflow_graph: StateflowGraph):
@@ -1,5 +1,6 @@
 import asyncio
 import os
+from collections import deque
 import socket
 import time
 import concurrent.futures
@@ -12,7 +13,10 @@ import uvloop
 from minio import Minio
 import minio.error
 
+from system_x.common.framed_protocol import FramedProtocol
 from system_x.common.logging import logging
+from system_x.common.message_schemas import Message, Empty, AriaProcessingDone, AriaCommit, AriaFusedCommit, \
+    DeterministicReordering, RegisterWorker, SnapID, WorkerSignal, EpochStats
 from system_x.common.message_types import MessageType
 from system_x.common.tcp_networking import NetworkingManager, MessagingMode
 from system_x.common.protocols import Protocols
@@ -37,6 +41,8 @@ SNAPSHOT_COMPACTION_INTERVAL_SEC = int(os.getenv('SNAPSHOT_COMPACTION_INTERVAL_S
 
 HEARTBEAT_CHECK_INTERVAL: int = int(os.getenv('HEARTBEAT_CHECK_INTERVAL', 500))  # 100ms
 HEARTBEAT_LIMIT: int = int(os.getenv('HEARTBEAT_LIMIT', 5000))  # 5000ms
+# the epoch phase timings kept per worker for GetEpochStats
+EPOCH_STATS_HISTORY: int = int(os.getenv('EPOCH_STATS_HISTORY', 1_000))
 
 
 class CoordinatorService(object):
@@ -61,6 +67,8 @@ class CoordinatorService(object):
         self.protocol_socket.setblocking(False)
 
         self.aria_metadata: AriaSyncMetadata = ...
+        # worker_id: the last epoch records of the worker, oldest first
+        self.epoch_stats: dict[int, deque[dict]] = {}
 
     def create_task(self, coroutine):
         task = asyncio.create_task(coroutine)
@@ -79,9 +87,11 @@ class CoordinatorService(object):
                 logging.warning(f"Registering metadata with: {len(self.coordinator.workers)} workers")
                 self.aria_metadata = AriaSyncMetadata(len(self.coordinator.workers))
             case MessageType.RegisterWorker:  # REGISTER_WORKER
-                worker_ip, worker_port, protocol_port = self.networking.decode_message(data)
+                message: RegisterWorker = self.networking.decode_message(data)
+                worker_ip, worker_port = message.host, message.port
                 # A worker registered to the coordinator
-                worker_id, send_recovery = await self.coordinator.register_worker(worker_ip, worker_port, protocol_port)
+                worker_id, send_recovery = await self.coordinator.register_worker(worker_ip, worker_port,
+                                                                                  message.protocol_port)
                 reply = self.networking.encode_message(msg=worker_id,
                                                        msg_type=MessageType.RegisterWorker,
                                                        serializer=Serializer.MSGPACK)
@@ -93,24 +103,36 @@ class CoordinatorService(object):
                 self.healthy_workers.add(worker_id)
             case MessageType.SnapID:
                 # Get snap id from worker
-                worker_id, snapshot_id, start, end = self.networking.decode_message(data)
-                self.coordinator.register_snapshot(worker_id, snapshot_id, pool)
-                logging.warning(f'Worker: {worker_id} | '
-                                f'Completed snapshot: {snapshot_id} | '
-                                f'started at: {start} | '
-                                f'ended at: {end} | '
-                                f'took: {end - start}ms')
+                message: SnapID = self.networking.decode_message(data)
+                self.coordinator.register_snapshot(message.worker_id, message.snapshot_id, pool)
+                logging.warning(f'Worker: {message.worker_id} | '
+                                f'Completed snapshot: {message.snapshot_id} | '
+                                f'started at: {message.start} | '
+                                f'ended at: {message.end} | '
+                                f'took: {message.end - message.start}ms')
             case MessageType.Heartbeat:
                 # HEARTBEATS
-                worker_id = self.networking.decode_message(data)[0]
+                worker_id = self.networking.decode_message(data).worker_id
                 heartbeat_rcv_time = timer()
                 logging.info(f'Heartbeat received from: {worker_id} at time: {heartbeat_rcv_time}')
                 self.coordinator.register_worker_heartbeat(worker_id, heartbeat_rcv_time)
             case MessageType.ReadyAfterRecovery:
                 # report ready after recovery
-                worker_id = self.networking.decode_message(data)[0]
+                worker_id = self.networking.decode_message(data).worker_id
                 self.worker_is_healthy[worker_id].set()
                 logging.info(f'ready after recovery received from: {worker_id}')
+            case MessageType.EpochStats:
+                message: EpochStats = self.networking.decode_message(data)
+                if message.worker_id not in self.epoch_stats:
+                    self.epoch_stats[message.worker_id] = deque(maxlen=EPOCH_STATS_HISTORY)
+                self.epoch_stats[message.worker_id].extend(message.records)
+            case MessageType.GetEpochStats:
+                reply = self.networking.encode_message(msg={worker_id: list(records)
+                                                            for worker_id, records in self.epoch_stats.items()},
+                                                       msg_type=MessageType.GetEpochStats,
+                                                       serializer=Serializer.MSGPACK)
+                writer.write(reply)
+                await writer.drain()
             case _:
                 # Any other message type
                 logging.error(f"COORDINATOR SERVER: Non supported message type: {message_type}")
@@ -119,73 +141,68 @@ class CoordinatorService(object):
     async def protocol_controller(self, data):
         message_type: int = self.protocol_networking.get_msg_type(data)
         match message_type:
+            # The metadata is reset before the broadcast, a worker that receives it can already send the next barrier
             case MessageType.AriaProcessingDone:
                 if not self.aria_metadata.sent_proceed_msg:
                     self.aria_metadata.sent_proceed_msg = True
                     await self.worker_wants_to_proceed()
-                message = self.protocol_networking.decode_message(data)
-                if message == b'':
-                    remote_logic_aborts = set()
-                else:
-                    remote_logic_aborts = message[0]
-                sync_complete: bool = await self.aria_metadata.set_aria_processing_done(remote_logic_aborts)
+                message: AriaProcessingDone = self.protocol_networking.decode_message(data)
+                sync_complete: bool = await self.aria_metadata.set_aria_processing_done(message.logic_aborts)
                 if sync_complete:
+                    logic_aborts_everywhere = self.aria_metadata.logic_aborts_everywhere
+                    await self.aria_metadata.cleanup()
                     await self.finalize_worker_sync(MessageType(message_type),
-                                                    (self.aria_metadata.logic_aborts_everywhere,),
-                                                    Serializer.PICKLE)
+                                                    AriaProcessingDone(logic_aborts_everywhere))
+            case MessageType.AriaFusedCommit:
+                if not self.aria_metadata.sent_proceed_msg:
+                    self.aria_metadata.sent_proceed_msg = True
+                    await self.worker_wants_to_proceed()
+                message: AriaFusedCommit = self.protocol_networking.decode_message(data)
+                sync_complete: bool = await self.aria_metadata.set_aria_fused_commit_done(message.logic_aborts,
+                                                                                          message.concurrency_aborts,
+                                                                                          message.t_counter,
+                                                                                          message.processed_seq_size,
+                                                                                          message.remote_chains)
+                if sync_complete:
+                    fused_commit_message = AriaFusedCommit(self.aria_metadata.logic_aborts_everywhere,
+                                                           self.aria_metadata.concurrency_aborts_everywhere,
+                                                           self.aria_metadata.max_t_counter,
+                                                           self.aria_metadata.processed_seq_size,
+                                                           self.aria_metadata.remote_chains)
                     await self.aria_metadata.cleanup()
+                    await self.finalize_worker_sync(MessageType(message_type), fused_commit_message)
             case MessageType.AriaCommit:
-                message = self.protocol_networking.decode_message(data)
-                aborted, remote_t_counter, processed_seq_size = message
-                sync_complete: bool = await self.aria_metadata.set_aria_commit_done(aborted,
-                                                                                    remote_t_counter,
-                                                                                    processed_seq_size)
+                message: AriaCommit = self.protocol_networking.decode_message(data)
+                sync_complete: bool = await self.aria_metadata.set_aria_commit_done(message.concurrency_aborts,
+                                                                                    message.t_counter,
+                                                                                    message.processed_seq_size)
                 if sync_complete:
-                    await self.finalize_worker_sync(MessageType(message_type),
-                                                    (self.aria_metadata.concurrency_aborts_everywhere,
-                                                     self.aria_metadata.processed_seq_size,
-                                                     self.aria_metadata.max_t_counter),
-                                                    Serializer.PICKLE)
+                    commit_message = AriaCommit(self.aria_metadata.concurrency_aborts_everywhere,
+                                                self.aria_metadata.max_t_counter,
+                                                self.aria_metadata.processed_seq_size)
                     await self.aria_metadata.cleanup()
+                    await self.finalize_worker_sync(MessageType(message_type), commit_message)
             case MessageType.SyncCleanup | MessageType.AriaFallbackStart | MessageType.AriaFallbackDone:
                 sync_complete: bool = await self.aria_metadata.set_empty_sync_done()
                 if sync_complete:
-                    await self.finalize_worker_sync(MessageType(message_type),
-                                                    b'',
-                                                    Serializer.NONE)
                     await self.aria_metadata.cleanup()
+                    await self.finalize_worker_sync(MessageType(message_type), Empty())
             case MessageType.DeterministicReordering:
-                message = self.protocol_networking.decode_message(data)
-                remote_read_reservation, remote_write_set, remote_read_set = message
-                sync_complete: bool = await self.aria_metadata.set_deterministic_reordering_done(
-                    remote_read_reservation,
-                    remote_write_set,
-                    remote_read_set)
+                message: DeterministicReordering = self.protocol_networking.decode_message(data)
+                sync_complete: bool = await self.aria_metadata.set_deterministic_reordering_done(message.reads,
+                                                                                                 message.writes)
                 if sync_complete:
-                    await self.finalize_worker_sync(MessageType(message_type),
-                                                    (self.aria_metadata.global_read_reservations,
-                                                     self.aria_metadata.global_write_set,
-                                                     self.aria_metadata.global_read_set),
-                                                    Serializer.PICKLE)
+                    global_rw_sets = DeterministicReordering(self.aria_metadata.global_reads,
+                                                             self.aria_metadata.global_writes)
                     await self.aria_metadata.cleanup()
+                    await self.finalize_worker_sync(MessageType(message_type), global_rw_sets)
 
     async def start_puller(self):
-        async def request_handler(reader: StreamReader, writer: StreamWriter):
-            try:
-                while True:
-                    data = await reader.readexactly(8)
-                    (size,) = unpack('>Q', data)
-                    self.aio_task_scheduler.create_task(self.protocol_controller(await reader.readexactly(size)))
-            except asyncio.IncompleteReadError as e:
-                logging.warning(f"Client disconnected unexpectedly: {e}")
-            except asyncio.CancelledError:
-                pass
-            finally:
-                logging.warning("Closing the connection")
-                writer.close()
-                await writer.wait_closed()
-
-        server = await asyncio.start_server(request_handler, sock=self.protocol_socket, limit=2 ** 32)
+        def frame_handler(message: bytes | bytearray):
+            self.aio_task_scheduler.create_task(self.protocol_controller(message))
+
+        server = await asyncio.get_running_loop().create_server(lambda: FramedProtocol(frame_handler),
+                                                                sock=self.protocol_socket)
         async with server:
             await server.serve_forever()
 
@@ -217,24 +234,21 @@ class CoordinatorService(object):
         self.networking.start_networking_tasks()
         self.protocol_networking.start_networking_tasks()
 
-    async def finalize_worker_sync(self,
-                                   msg_type: MessageType,
-                                   message: tuple | bytes,
-                                   serializer: Serializer = Serializer.MSGPACK):
+    async def finalize_worker_sync(self, msg_type: MessageType, message: Message):
         async with asyncio.TaskGroup() as tg:
             for worker_id, worker in self.coordinator.workers.items():
                 tg.create_task(self.protocol_networking.send_message(worker[0], worker[2],
                                                                      msg=message,
                                                                      msg_type=msg_type,
-                                                                     serializer=serializer))
+                                                                     serializer=Serializer.SCHEMA))
 
     async def worker_wants_to_proceed(self):
         async with asyncio.TaskGroup() as tg:
             for worker_id, worker in self.coordinator.workers.items():
                 tg.create_task(self.protocol_networking.send_message(worker[0], worker[2],
-                                                                     msg=b'',
+                                                                     msg=Empty(),
                                                                      msg_type=MessageType.RemoteWantsToProceed,
-                                                                     serializer=Serializer.NONE))
+                                                                     serializer=Serializer.SCHEMA))
 
     async def heartbeat_monitor_coroutine(self):
         interval_time = HEARTBEAT_CHECK_INTERVAL / 1000
@@ -268,9 +282,9 @@ class CoordinatorService(object):
         async with asyncio.TaskGroup() as tg:
             for worker_id, worker in self.coordinator.workers.items():
                 tg.create_task(self.networking.send_message(worker[0], worker[1],
-                                                            msg=b'',
+                                                            msg=WorkerSignal(worker_id),
                                                             msg_type=MessageType.ReadyAfterRecovery,
-                                                            serializer=Serializer.NONE))
+                                                            serializer=Serializer.SCHEMA))
         logging.info('ready events sent')
 
     async def send_snapshot_marker(self):
@@ -279,9 +293,9 @@ class CoordinatorService(object):
             async with asyncio.TaskGroup() as tg:
                 for worker_id, worker in self.coordinator.workers.items():
                     tg.create_task(self.networking.send_message(worker[0], worker[1],
-                                                                msg=b'',
+                                                                msg=Empty(),
                                                                 msg_type=MessageType.SnapMarker,
-                                                                serializer=Serializer.NONE))
+                                                                serializer=Serializer.SCHEMA))
             logging.warning('Snapshot marker sent')
 
     @staticmethod
@@ -5,6 +5,7 @@ from system_x.common.operator import BaseOperator
 from system_x.common.stateflow_graph import StateflowGraph
 from system_x.common.stateflow_worker import StateflowWorker
 from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
 
 from .base_scheduler import BaseScheduler
 
@@ -46,7 +47,8 @@ class RoundRobin(BaseScheduler):
                                                   operator_partition_locations,
                                                   workers,
                                                   execution_graph.operator_state_backend),
-                                             msg_type=MessageType.ReceiveExecutionPlan))
+                                             msg_type=MessageType.ReceiveExecutionPlan,
+                                             serializer=Serializer.CLOUDPICKLE))
             for worker, operator_partitions in worker_assignments.items()]
 
         await asyncio.gather(*tasks)
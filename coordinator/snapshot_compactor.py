@@ -9,6 +9,7 @@ MINIO_URL: str = f"{os.environ['MINIO_HOST']}:{os.environ['MINIO_PORT']}"
 MINIO_ACCESS_KEY: str = os.environ['MINIO_ROOT_USER']
 MINIO_SECRET_KEY: str = os.environ['MINIO_ROOT_PASSWORD']
 SNAPSHOT_BUCKET_NAME: str = os.getenv('SNAPSHOT_BUCKET_NAME', "system_x-snapshots")
+MANIFEST_SUFFIX: str = ".manifest"
 
 
 def get_snapshots_per_worker(snapshot_files: list[str], max_snap_id: int) -> dict[int, list[tuple[int, str]]]:
@@ -43,7 +44,11 @@ def compact_deltas(minio_client, snapshot_files, max_snap_id):
                     data[operator_name] |= operator_state
             else:
                 data = loaded_data
+            for operator_name, deleted_keys in deser.get("deletes", {}).items():
+                for key in deleted_keys:
+                    data[operator_name].pop(key, None)
         # The new snapshot will have the latest metadata and merged operator state
+        # The tombstones are dropped, there are no older snapshots left for them to shadow
         bytes_file: bytes = msgpack_serialization({"data": data, "metadata": metadata})
         snapshot_name: str = f"w{worker_id}/0.bin"
         # Store the primary snapshot after compaction
@@ -53,6 +58,38 @@ def compact_deltas(minio_client, snapshot_files, max_snap_id):
             minio_client.remove_object(bucket_name=SNAPSHOT_BUCKET_NAME, object_name=snapshot_to_delete)
 
 
+def compact_segments(minio_client, manifest_files, max_snap_id):
+    """
+    Log structured snapshots are manifests of segment files, only the latest stable manifest of a worker and the
+    newer ones are kept, together with the segments they reference. Unreferenced segments older than the newest
+    stable one are removed, the newer ones may belong to a snapshot that is still being uploaded.
+    """
+    manifests_per_worker: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    for manifest_file in manifest_files:
+        worker_prefix, manifest_name = manifest_file.split("/")
+        manifests_per_worker[worker_prefix].append((int(manifest_name[:-len(MANIFEST_SUFFIX)]), manifest_file))
+    for worker_prefix, manifests in manifests_per_worker.items():
+        manifests.sort()
+        stable = [manifest for manifest in manifests if manifest[0] <= max_snap_id]
+        if not stable:
+            continue
+        manifests_to_keep = [stable[-1]] + [manifest for manifest in manifests if manifest[0] > max_snap_id]
+        referenced: dict[str, set[str]] = defaultdict(set)
+        for _, manifest_file in manifests_to_keep:
+            manifest = msgpack_deserialization(minio_client.get_object(SNAPSHOT_BUCKET_NAME, manifest_file).data)
+            for operator_name, segment_names in manifest["segments"].items():
+                referenced[operator_name].update(segment_names)
+        for segment_file in minio_client.list_objects(bucket_name=SNAPSHOT_BUCKET_NAME,
+                                                      prefix=f"{worker_prefix}/segments/",
+                                                      recursive=True):
+            _, _, operator_name, segment_name = segment_file.object_name.split("/")
+            if segment_name not in referenced[operator_name] and \
+                    referenced[operator_name] and segment_name < max(referenced[operator_name]):
+                minio_client.remove_object(bucket_name=SNAPSHOT_BUCKET_NAME, object_name=segment_file.object_name)
+        for _, manifest_file in stable[:-1]:
+            minio_client.remove_object(bucket_name=SNAPSHOT_BUCKET_NAME, object_name=manifest_file)
+
+
 def start_snapshot_compaction(max_snap_id: int):
     minio_client: Minio = Minio(
         MINIO_URL, access_key=MINIO_ACCESS_KEY,
@@ -63,3 +100,8 @@ def start_snapshot_compaction(max_snap_id: int):
                                                                           recursive=True)
                                  if sn_file.object_name.endswith(".bin")]
     compact_deltas(minio_client, snapshot_files, max_snap_id)
+    manifest_files: list[str] = [sn_file.object_name
+                                 for sn_file in minio_client.list_objects(bucket_name=SNAPSHOT_BUCKET_NAME,
+                                                                          recursive=True)
+                                 if sn_file.object_name.endswith(MANIFEST_SUFFIX)]
+    compact_segments(minio_client, manifest_files, max_snap_id)
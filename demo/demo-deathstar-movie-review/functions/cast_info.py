@@ -11,6 +11,6 @@ async def write(ctx: StatefulFunction, info: dict):
     return ctx.key
 
 
-@cast_info_operator.register
+@cast_info_operator.register_read_only
 async def read(ctx: StatefulFunction, cast_ids: list[str]):
     return [cast_info for cast_info in ctx.data if cast_info["id"] in cast_ids]
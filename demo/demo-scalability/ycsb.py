@@ -20,7 +20,7 @@ async def insert_batch(ctx: StatefulFunction, key_value_pairs: dict[any, any]):
     ctx.batch_insert(key_value_pairs)
 
 
-@ycsb_operator.register
+@ycsb_operator.register_read_only
 async def read(ctx: StatefulFunction):
     value: int = ctx.get()
     return ctx.key, value
@@ -10,6 +10,7 @@ from aiokafka.errors import KafkaConnectionError
 from .base_client import BaseSysXClient
 from .system_x_future import SysXAsyncFuture
 from ..common.base_operator import BaseOperator
+from ..common.message_schemas import Empty
 from ..common.message_types import MessageType
 from ..common.serialization import Serializer, msgpack_deserialization
 from ..common.stateflow_graph import StateflowGraph
@@ -124,4 +125,12 @@ class AsyncSysXClient(BaseSysXClient):
         await self._networking_manager.send_message(self._system_x_coordinator_adr,
                                                     self._system_x_coordinator_port,
                                                     msg=(stateflow_graph, ),
-                                                    msg_type=MessageType.SendExecutionGraph)
+                                                    msg_type=MessageType.SendExecutionGraph,
+                                                    serializer=Serializer.CLOUDPICKLE)
+
+    async def get_epoch_stats(self) -> dict[int, list[dict]]:
+        return await self._networking_manager.send_message_request_response(self._system_x_coordinator_adr,
+                                                                            self._system_x_coordinator_port,
+                                                                            msg=Empty(),
+                                                                            msg_type=MessageType.GetEpochStats,
+                                                                            serializer=Serializer.SCHEMA)
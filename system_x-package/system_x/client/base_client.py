@@ -127,3 +127,8 @@ class BaseSysXClient(ABC):
     @abstractmethod
     def submit_dataflow(self, stateflow_graph: StateflowGraph, external_modules: tuple = None):
         raise NotImplementedError
+
+    @abstractmethod
+    def get_epoch_stats(self) -> dict[int, list[dict]]:
+        """The last epoch phase timings of every worker, oldest first, as collected by the coordinator"""
+        raise NotImplementedError
@@ -3,6 +3,7 @@ import time
 import uuid
 import warnings
 import socket
+import struct
 from typing import Type
 
 from confluent_kafka import Producer, KafkaException, Consumer, Message
@@ -14,6 +15,7 @@ from .system_x_future import SysXFuture
 from ..common.base_operator import BaseOperator
 from ..common.serialization import Serializer, msgpack_deserialization
 from ..common.stateflow_graph import StateflowGraph
+from ..common.message_schemas import Empty
 from ..common.message_types import MessageType
 from ..common.tcp_networking import NetworkingManager
 
@@ -151,3 +153,13 @@ class SyncSysXClient(BaseSysXClient):
         s.connect((self._system_x_coordinator_adr, self._system_x_coordinator_port))
         s.send(msg)
         s.close()
+
+    def get_epoch_stats(self) -> dict[int, list[dict]]:
+        msg = NetworkingManager.encode_message(msg=Empty(),
+                                               msg_type=MessageType.GetEpochStats,
+                                               serializer=Serializer.SCHEMA)
+        with socket.create_connection((self._system_x_coordinator_adr, self._system_x_coordinator_port)) as s:
+            s.sendall(msg)
+            with s.makefile('rb') as reply:
+                (size, ) = struct.unpack('>Q', reply.read(8))
+                return NetworkingManager.decode_message(reply.read(size))
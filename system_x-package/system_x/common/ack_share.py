@@ -0,0 +1,47 @@
+"""Integer shares of the function chain acks.
+
+The root of a chain hands out a total weight that every fan-out splits exactly between its calls, the first call
+takes the remainder of the division. Every leaf acks its weight and the chain is complete once the weights add up
+to the total again, whatever order they arrive in. A weight smaller than a fan-out is rescaled by 2^ACK_SHARE_BITS
+first, so any nesting stays exact while every weight fits in a msgpack int64.
+
+A share is a (weight, scale) pair worth weight / 2^(ACK_SHARE_BITS * (scale + 1)) of the chain.
+"""
+ACK_SHARE_BITS: int = 62
+ROOT_ACK_SHARE: tuple[int, int] = (1 << ACK_SHARE_BITS, 0)
+EMPTY_ACK_SHARE: tuple[int, int] = (0, 0)
+
+
+def split_ack_share(ack_share: tuple[int, int], n_calls: int) -> list[tuple[int, int]]:
+    """The shares of n_calls calls that add up to ack_share"""
+    weight, scale = ack_share
+    if weight < n_calls:
+        weight <<= ACK_SHARE_BITS
+        scale += 1
+    call_weight, remainder = divmod(weight, n_calls)
+    return [(call_weight + remainder, scale)] + [(call_weight, scale)] * (n_calls - 1)
+
+
+def add_ack_share(total: tuple[int, int], ack_share: tuple[int, int]) -> tuple[int, int]:
+    total_weight, total_scale = total
+    weight, scale = ack_share
+    if scale > total_scale:
+        total_weight <<= ACK_SHARE_BITS * (scale - total_scale)
+        total_scale = scale
+    else:
+        weight <<= ACK_SHARE_BITS * (total_scale - scale)
+    return total_weight + weight, total_scale
+
+
+def compare_to_root(total: tuple[int, int]) -> int:
+    """
+    Compares the gathered shares of a chain to the whole chain.
+
+    Returns
+    -------
+    int
+        -1 while acks are missing, 0 when the chain is complete and 1 if a call acked twice
+    """
+    total_weight, total_scale = total
+    root_weight = 1 << (ACK_SHARE_BITS * (total_scale + 1))
+    return (total_weight > root_weight) - (total_weight < root_weight)
@@ -1,5 +1,4 @@
 import asyncio
-import fractions
 import socket
 import struct
 from abc import ABC, abstractmethod
@@ -7,8 +6,12 @@ from collections import defaultdict
 from enum import Enum, auto
 from pickle import UnpicklingError
 
+import msgspec
+
+from .ack_share import EMPTY_ACK_SHARE, add_ack_share, compare_to_root
 from .exceptions import SerializerNotSupported
 from .logging import logging
+from .message_schemas import Message, schema_serialization, schema_deserialization
 from .run_func_payload import RunFuncPayload
 from .serialization import Serializer, cloudpickle_serialization, msgpack_serialization, \
     pickle_serialization, cloudpickle_deserialization, msgpack_deserialization, pickle_deserialization
@@ -28,8 +31,8 @@ class BaseNetworking(ABC):
         self.host_port: int = host_port
         # event_id: ack_event
         self.waited_ack_events: dict[int, asyncio.Event] = {}
-        # tid: fraction
-        self.ack_fraction: dict[int, fractions.Fraction] = {}
+        # tid: (weight, scale) of the acked share of the chain
+        self.ack_shares: dict[int, tuple[int, int]] = {}
         # tid: (count, total)
         self.ack_cnts: dict[int, tuple[int, int]] = {}
         # t_id: list of workers
@@ -39,6 +42,8 @@ class BaseNetworking(ABC):
         self.remote_function_calls: dict[int, list[RunFuncPayload]] = defaultdict(list)
         # set of t_ids that aborted because of an exception
         self.logic_aborts_everywhere: set[int] = set()
+        # whether a function of this worker called a function on another worker in the epoch
+        self.sent_remote_calls: bool = False
         self.messaging_mode = mode
         self.worker_id = -1
         self.lock: asyncio.Lock = asyncio.Lock()
@@ -54,18 +59,18 @@ class BaseNetworking(ABC):
     async def send_message(self,
                            host,
                            port,
-                           msg: tuple | bytes,
+                           msg: Message | tuple | bytes,
                            msg_type: int,
-                           serializer: Serializer = Serializer.CLOUDPICKLE):
+                           serializer: Serializer = Serializer.SCHEMA):
         raise NotImplementedError
 
     @abstractmethod
     async def send_message_request_response(self,
                                             host,
                                             port,
-                                            msg: tuple | bytes,
+                                            msg: Message | tuple | bytes,
                                             msg_type: int,
-                                            serializer: Serializer = Serializer.CLOUDPICKLE):
+                                            serializer: Serializer = Serializer.SCHEMA):
         raise NotImplementedError
 
     def in_the_same_network(self, host: str, port: int) -> bool:
@@ -76,12 +81,13 @@ class BaseNetworking(ABC):
 
     def cleanup_after_epoch(self):
         self.waited_ack_events = {}
-        self.ack_fraction = {}
+        self.ack_shares = {}
         self.ack_cnts = {}
         self.aborted_events = {}
         self.remote_function_calls = defaultdict(list)
         self.logic_aborts_everywhere = set()
         self.chain_participants = defaultdict(list)
+        self.sent_remote_calls = False
 
     async def add_remote_function_call(self, t_id: int, payload: RunFuncPayload):
         async with self.lock:
@@ -92,11 +98,11 @@ class BaseNetworking(ABC):
             if participant != self.worker_id and participant not in self.chain_participants[t_id]:
                 self.chain_participants[t_id].append(participant)
 
-    async def add_ack_fraction_str(self,
-                                   ack_id: int,
-                                   fraction_str: str,
-                                   chain_participants: list[int],
-                                   partial_node_count: int):
+    async def add_ack_share(self,
+                            ack_id: int,
+                            ack_share: tuple[int, int],
+                            chain_participants: list[int],
+                            partial_node_count: int):
         if ack_id in self.aborted_events:
             # if the transaction was aborted we can instantly return
             return
@@ -105,14 +111,15 @@ class BaseNetworking(ABC):
                 self.add_chain_participants(ack_id, chain_participants)
                 self.ack_cnts[ack_id] = (self.ack_cnts[ack_id][0],
                                          self.ack_cnts[ack_id][1] + partial_node_count)
-                self.ack_fraction[ack_id] += fractions.Fraction(fraction_str)
-                if self.ack_fraction[ack_id] == 1:
+                self.ack_shares[ack_id] = add_ack_share(self.ack_shares[ack_id], ack_share)
+                chain_completion = compare_to_root(self.ack_shares[ack_id])
+                if chain_completion == 0:
                     # All ACK parts have been gathered
                     # logging.warning(f"Transaction total nodes: {self.ack_cnts[ack_id][1]}")
                     self.waited_ack_events[ack_id].set()
-                elif self.ack_fraction[ack_id] > 1:
+                elif chain_completion > 0:
                     # This should never happen, it means that multiple instances of the same function have run
-                    logging.error(f'ack: {ack_id} larger than 1 -> {self.ack_fraction[ack_id]}')
+                    logging.error(f'ack: {ack_id} larger than 1 -> {self.ack_shares[ack_id]}')
         except KeyError:
             logging.error(f'TID: {ack_id} not in ack list!')
 
@@ -140,14 +147,14 @@ class BaseNetworking(ABC):
         async with self.lock:
             logging.info(f'New function chain for T_ID: {t_id}')
             self.waited_ack_events[t_id] = asyncio.Event()
-            self.ack_fraction[t_id] = fractions.Fraction(0)
+            self.ack_shares[t_id] = EMPTY_ACK_SHARE
             self.ack_cnts[t_id] = (0, 0)
 
     async def reset_ack_for_fallback(self, ack_id: int):
         async with self.lock:
             if ack_id in self.waited_ack_events:
                 self.waited_ack_events[ack_id].clear()
-                self.ack_fraction[ack_id] = fractions.Fraction(0)
+                self.ack_shares[ack_id] = EMPTY_ACK_SHARE
             else:
                 logging.error(f"{ack_id} should exist!")
 
@@ -175,7 +182,11 @@ class BaseNetworking(ABC):
 
     @staticmethod
     def encode_message(msg: object | bytes, msg_type: int, serializer: Serializer) -> bytes:
-        if serializer == Serializer.CLOUDPICKLE:
+        # the schema messages are the hot path, checked first
+        if serializer == Serializer.SCHEMA:
+            msg = struct.pack('>B', msg_type) + struct.pack('>B', 4) + schema_serialization(msg)
+            return msg
+        elif serializer == Serializer.CLOUDPICKLE:
             msg = struct.pack('>B', msg_type) + struct.pack('>B', 0) + cloudpickle_serialization(msg)
             return msg
         elif serializer == Serializer.MSGPACK:
@@ -196,20 +207,38 @@ class BaseNetworking(ABC):
         return msg[0]
 
     @staticmethod
-    def decode_message(data):
+    def split_batch(data: bytes | bytearray | memoryview) -> list[memoryview]:
+        """Views of the messages of a Batch message without their size prefix, in the order they were sent"""
+        messages: list[memoryview] = []
+        view = memoryview(data)
+        offset = 2
+        while offset < len(view):
+            (size, ) = struct.unpack_from('>Q', view, offset)
+            offset += 8
+            messages.append(view[offset:offset + size])
+            offset += size
+        return messages
+
+    @staticmethod
+    def decode_message(data: bytes | bytearray | memoryview):
         try:
             serializer = data[1]
-            if serializer == 0:
-                msg = cloudpickle_deserialization(data[2:])
+            # the deserializers read the payload through a view, slicing the message would copy it
+            payload = memoryview(data)[2:]
+            if serializer == 4:
+                msg = schema_deserialization(data[0], payload)
+                return msg
+            elif serializer == 0:
+                msg = cloudpickle_deserialization(payload)
                 return msg
             elif serializer == 1:
-                msg = msgpack_deserialization(data[2:])
+                msg = msgpack_deserialization(payload)
                 return msg
             elif serializer == 2:
-                msg = pickle_deserialization(data[2:])
+                msg = pickle_deserialization(payload)
                 return msg
             elif serializer == 3:
-                msg = data[2:]
+                msg = bytes(payload)
                 return msg
             else:
                 logging.error(f'Serializer: {serializer} is not supported')
@@ -217,3 +246,6 @@ class BaseNetworking(ABC):
         except UnpicklingError:
             logging.error(f'Unpickling msg: {data}')
             raise UnpicklingError
+        except msgspec.DecodeError as e:
+            logging.error(f'Malformed msg of type {data[0]}: {e}')
+            raise
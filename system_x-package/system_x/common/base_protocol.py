@@ -3,6 +3,11 @@ from abc import abstractmethod, ABC
 
 class BaseTransactionalProtocol(ABC):
 
+    @property
+    def epoch(self) -> int:
+        """The epoch that the function calls run in, protocols without epochs stay at 0"""
+        return 0
+
     @abstractmethod
     async def run_function(self, *args, **kwargs):
         raise NotImplementedError
@@ -31,7 +31,11 @@ class BaseOperatorState(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def delete(self, key, operator_name: str):
+    def delete(self, key, t_id: int, operator_name: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_immediate(self, key, t_id: int, operator_name: str):
         raise NotImplementedError
 
     @abstractmethod
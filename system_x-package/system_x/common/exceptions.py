@@ -38,3 +38,17 @@ class FutureTimedOut(Exception):
     When a SysX future times out
     """
     pass
+
+
+class KeyNotInPartition(Exception):
+    """
+    When a function accesses a key of another partition than its own without a remote call
+    """
+    pass
+
+
+class ReadOnlyFunctionWrite(Exception):
+    """
+    When a function registered as read only writes state or calls other functions
+    """
+    pass
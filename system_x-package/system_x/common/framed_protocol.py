@@ -0,0 +1,82 @@
+import asyncio
+from struct import unpack_from
+from typing import Callable
+
+from .logging import logging
+
+# size of the reusable receive buffer of every connection, larger frames get a buffer of their own
+RECEIVE_BUFFER_SIZE: int = 256 * 1024
+FRAME_HEADER_SIZE: int = 8
+
+
+class FramedProtocol(asyncio.BufferedProtocol):
+    """Receives the `>Q` size prefixed frames of a connection and hands every frame to frame_handler.
+
+    The socket reads straight into a reusable buffer. A frame that fits in it is copied out once, since the handler
+    may keep it after the buffer is reused. A larger frame is read in place into a bytearray of its own that goes
+    to the handler as is. The handler runs in the event loop and must not block.
+    """
+
+    def __init__(self,
+                 frame_handler: Callable[[bytes | bytearray], None],
+                 buffer_size: int = RECEIVE_BUFFER_SIZE):
+        self.frame_handler = frame_handler
+        self.buffer: bytearray = bytearray(buffer_size)
+        self.view: memoryview = memoryview(self.buffer)
+        # the received bytes that are not parsed yet are buffer[start:end]
+        self.start: int = 0
+        self.end: int = 0
+        # the frame that is larger than the buffer and is being received in place
+        self.large_frame: bytearray | None = None
+        self.large_frame_received: int = 0
+
+    def connection_lost(self, exc: Exception | None):
+        if exc is not None:
+            logging.warning(f"Client disconnected unexpectedly: {exc}")
+        logging.warning("Closing the connection")
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if self.large_frame is not None:
+            return memoryview(self.large_frame)[self.large_frame_received:]
+        return self.view[self.end:]
+
+    def buffer_updated(self, nbytes: int):
+        if self.large_frame is not None:
+            self.large_frame_received += nbytes
+            if self.large_frame_received == len(self.large_frame):
+                frame = self.large_frame
+                self.large_frame = None
+                self.frame_handler(frame)
+            return
+        self.end += nbytes
+        self.parse_frames()
+
+    def parse_frames(self):
+        while self.end - self.start >= FRAME_HEADER_SIZE:
+            (size, ) = unpack_from('>Q', self.buffer, self.start)
+            frame_start = self.start + FRAME_HEADER_SIZE
+            received = self.end - frame_start
+            if size > len(self.buffer) - FRAME_HEADER_SIZE:
+                frame = bytearray(size)
+                received = min(received, size)
+                frame[:received] = self.view[frame_start:frame_start + received]
+                self.start = frame_start + received
+                if received < size:
+                    # the rest of the frame goes straight into it
+                    self.large_frame = frame
+                    self.large_frame_received = received
+                    self.start = self.end = 0
+                    return
+                self.frame_handler(frame)
+                continue
+            if received < size:
+                break
+            self.start = frame_start + size
+            self.frame_handler(bytes(self.view[frame_start:self.start]))
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.start > 0:
+            # move the partial frame to the front, it always fits in the buffer
+            partial = bytes(self.view[self.start:self.end])
+            self.buffer[:len(partial)] = partial
+            self.start, self.end = 0, len(partial)
@@ -3,3 +3,5 @@ from enum import Enum, auto
 
 class LocalStateBackend(Enum):
     DICT = auto()
+    # values kept encoded in memory mapped log segments, for state larger than the worker's memory
+    LOG_STRUCTURED = auto()
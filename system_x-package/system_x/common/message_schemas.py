@@ -0,0 +1,159 @@
+from typing import Any
+
+import msgspec
+
+from .message_types import MessageType
+from .run_func_payload import RunFuncPayload
+
+
+class Message(msgspec.Struct, array_like=True, gc=False):
+    """Base of the message schemas, encoded as msgpack arrays in field order.
+
+    Messages hold plain decoded data that never forms reference cycles, so they are not tracked by the garbage
+    collector.
+    """
+
+
+class Empty(Message):
+    pass
+
+
+# Transactional protocol, between the workers and through the coordinator
+
+class RunFunRemote(Message):
+    t_id: int
+    # the epoch of the sender, a call of the next epoch waits until the receiver has committed the current one
+    epoch: int
+    fallback_enabled: bool
+    # decoded as the payload that the receiver runs
+    payload: RunFuncPayload
+
+
+class Ack(Message):
+    ack_id: int
+    ack_share: tuple[int, int]
+    chain_participants: list[int]
+    partial_node_count: int
+
+
+class AckCache(Message):
+    ack_id: int
+
+
+class ChainAbort(Message):
+    ack_id: int
+    exception_str: str
+    request_id: bytes
+
+
+class Unlock(Message):
+    t_id: int
+    success: bool
+
+
+class AriaProcessingDone(Message):
+    logic_aborts: set[int]
+
+
+class AriaCommit(Message):
+    concurrency_aborts: set[int]
+    # the local t_counter of a worker, the max of all the workers in the result of the barrier
+    t_counter: int
+    processed_seq_size: int
+
+
+class AriaFusedCommit(Message):
+    logic_aborts: set[int]
+    concurrency_aborts: set[int]
+    t_counter: int
+    processed_seq_size: int
+    # whether a worker sent remote calls in the epoch, their reservations may have missed the conflict checks
+    remote_chains: bool
+
+
+class DeterministicReordering(Message):
+    # the encoded (key hash, t_id) accesses
+    reads: bytes
+    writes: bytes
+
+
+class PeerBarrierMessage(Message):
+    barrier_type: int
+    # the rounds of a barrier type are told apart by the epoch
+    epoch: int
+    stage: int
+    # the message of barrier_type, decoded with its own schema
+    payload: msgspec.Raw
+
+
+# Control plane, between the workers and the coordinator
+
+class RegisterWorker(Message):
+    host: str
+    port: int
+    protocol_port: int
+
+
+class SnapID(Message):
+    worker_id: int
+    snapshot_id: int
+    start: float
+    end: float
+
+
+class WorkerSignal(Message):
+    worker_id: int
+
+
+class EpochStats(Message):
+    worker_id: int
+    records: list[dict[str, Any]]
+
+
+# The execution graph, the execution plan and the recovery messages carry operators with their functions and stay on
+# cloudpickle, client messages use the serializer that the client picked. Replies on the request-response path are
+# untyped msgpack, since a reply shares the message type of its request.
+MESSAGE_SCHEMAS: dict[MessageType, type[Message]] = {
+    MessageType.RunFunRemote: RunFunRemote,
+    MessageType.Ack: Ack,
+    MessageType.AckCache: AckCache,
+    MessageType.ChainAbort: ChainAbort,
+    MessageType.Unlock: Unlock,
+    MessageType.AriaProcessingDone: AriaProcessingDone,
+    MessageType.AriaCommit: AriaCommit,
+    MessageType.AriaFusedCommit: AriaFusedCommit,
+    MessageType.DeterministicReordering: DeterministicReordering,
+    MessageType.SyncCleanup: Empty,
+    MessageType.AriaFallbackStart: Empty,
+    MessageType.AriaFallbackDone: Empty,
+    MessageType.RemoteWantsToProceed: Empty,
+    MessageType.PeerBarrier: PeerBarrierMessage,
+    MessageType.RegisterWorker: RegisterWorker,
+    MessageType.SnapID: SnapID,
+    MessageType.Heartbeat: WorkerSignal,
+    MessageType.ReadyAfterRecovery: WorkerSignal,
+    MessageType.SnapMarker: Empty,
+    MessageType.EpochStats: EpochStats,
+    MessageType.GetEpochStats: Empty,
+}
+
+encoder = msgspec.msgpack.Encoder()
+decoders: dict[int, msgspec.msgpack.Decoder] = {msg_type: msgspec.msgpack.Decoder(schema)
+                                                for msg_type, schema in MESSAGE_SCHEMAS.items()}
+
+
+def schema_serialization(message: Message) -> bytes:
+    return encoder.encode(message)
+
+
+def schema_deserialization(msg_type: int, serialized_message: bytes | memoryview) -> Message:
+    """Decodes and validates a message against the schema of its type, raises msgspec.ValidationError if it does
+    not match"""
+    return decoders[msg_type].decode(serialized_message)
+
+
+def peer_barrier_message(barrier_type: MessageType,
+                         epoch: int,
+                         stage: int,
+                         payload: Message) -> PeerBarrierMessage:
+    return PeerBarrierMessage(barrier_type, epoch, stage, msgspec.Raw(encoder.encode(payload)))
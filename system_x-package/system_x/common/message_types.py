@@ -31,6 +31,13 @@ class MessageType(IntEnum):
     RemoteWantsToProceed = 24
     ChainAbort = 25
     AckCache = 26
+    PeerBarrier = 27
+    AriaFusedCommit = 28
+    # several framed messages to the same destination in a single frame
+    Batch = 29
+    # the epoch phase timings of a worker, and their query from the coordinator
+    EpochStats = 30
+    GetEpochStats = 31
     SnapMarker = 99
     AlignStart = 100
     AlignEnd = 101
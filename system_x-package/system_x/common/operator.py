@@ -1,3 +1,6 @@
+from typing import Any, Callable
+
+from .message_schemas import Ack, AckCache, ChainAbort
 from .message_types import MessageType
 from .tcp_networking import NetworkingManager
 from .serialization import Serializer
@@ -19,6 +22,10 @@ class Operator(BaseOperator):
         # where the other functions exist
         self.__dns: dict[str, dict[str, tuple[str, int, int]]] = {}
         self.__functions: dict[str, type] = {}
+        # functions that only read, served from the last committed epoch outside the transactions
+        self.__read_only_functions: set[str] = set()
+        # secondary indexes on the state of each partition, index_name: function from a value to its index key
+        self.__indexes: dict[str, Callable[[Any], Any]] = {}
 
     @property
     def functions(self):
@@ -30,7 +37,7 @@ class Operator(BaseOperator):
                            request_id: bytes,
                            timestamp: int,
                            function_name: str,
-                           ack_payload: tuple[str, int, int, str, list[int], int] | None,
+                           ack_payload: tuple[str, int, int, tuple[int, int], list[int], int] | None,
                            fallback_mode: bool,
                            use_fallback_cache: bool,
                            params: tuple,
@@ -42,11 +49,11 @@ class Operator(BaseOperator):
                      f'function: {self.name}:{function_name} fallback mode: {fallback_mode}')
         if ack_payload is not None:
             # part of a chain (not root)
-            ack_host, ack_port, ack_id, fraction_str, chain_participants, partial_node_count = ack_payload
+            ack_host, ack_port, ack_id, ack_share, chain_participants, partial_node_count = ack_payload
             resp, n_remote_calls, partial_node_count = await f(*params,
                                                                ack_host=ack_host,
                                                                ack_port=ack_port,
-                                                               ack_share=fraction_str,
+                                                               ack_share=ack_share,
                                                                chain_participants=chain_participants,
                                                                partial_node_count=partial_node_count)
             if isinstance(resp, Exception):
@@ -56,52 +63,67 @@ class Operator(BaseOperator):
             elif n_remote_calls == 0:
                 # we need to count the last node as part of the chain
                 partial_node_count += 1
-                await self.__send_ack(ack_host, ack_port, ack_id, fraction_str, chain_participants, partial_node_count)
+                await self.__send_ack(ack_host, ack_port, ack_id, ack_share, chain_participants, partial_node_count)
         else:
             # root of a chain, or single call
             resp, _, _ = await f(*params)
         del f
         return resp
 
+    async def run_read_only_function(self,
+                                     key,
+                                     request_id: bytes,
+                                     timestamp: int,
+                                     function_name: str,
+                                     params: tuple,
+                                     protocol: BaseTransactionalProtocol):
+        f = self.__materialize_function(function_name, key, -1, request_id, timestamp,
+                                        False, False, protocol, read_only=True)
+        logging.info(f'RQ_ID: {request_id} read only function: {self.name}:{function_name}')
+        resp, _, _ = await f(f, *params)
+        del f
+        return resp
+
     async def _send_chain_abort(self, resp, ack_host, ack_port, ack_id, request_id) -> None:
         if self.__networking.in_the_same_network(ack_host, ack_port):
             self.__networking.abort_chain(ack_id, str(resp), request_id)
         else:
             await self.__networking.send_message(ack_host, ack_port,
-                                                 msg=(ack_id, str(resp), request_id),
+                                                 msg=ChainAbort(ack_id, str(resp), request_id),
                                                  msg_type=MessageType.ChainAbort,
-                                                 serializer=Serializer.MSGPACK)
+                                                 serializer=Serializer.SCHEMA)
 
     async def __send_cache_ack(self, ack_host, ack_port, ack_id) -> None:
         if self.__networking.in_the_same_network(ack_host, ack_port):
             # case when the ack host is the same worker
             await self.__networking.add_ack_cnt(ack_id)
         else:
-            await self.__networking.send_message(ack_host, ack_port,
-                                                 msg=(ack_id, ),
-                                                 msg_type=MessageType.AckCache,
-                                                 serializer=Serializer.MSGPACK)
+            await self.__networking.send_message_batched(ack_host, ack_port,
+                                                         msg=AckCache(ack_id),
+                                                         msg_type=MessageType.AckCache,
+                                                         serializer=Serializer.SCHEMA)
 
     async def __send_ack(self,
                          ack_host,
                          ack_port,
                          ack_id,
-                         fraction_str,
+                         ack_share,
                          chain_participants,
                          partial_node_count) -> None:
         if self.__networking.in_the_same_network(ack_host, ack_port):
             # case when the ack host is the same worker
-            await self.__networking.add_ack_fraction_str(ack_id, fraction_str, chain_participants, partial_node_count)
+            await self.__networking.add_ack_share(ack_id, ack_share, chain_participants, partial_node_count)
         else:
             if self.__networking.worker_id not in chain_participants:
                 chain_participants.append(self.__networking.worker_id)
-            await self.__networking.send_message(ack_host, ack_port,
-                                                 msg=(ack_id, fraction_str, chain_participants, partial_node_count),
-                                                 msg_type=MessageType.Ack,
-                                                 serializer=Serializer.MSGPACK)
+            await self.__networking.send_message_batched(ack_host, ack_port,
+                                                         msg=Ack(ack_id, ack_share, chain_participants,
+                                                                 partial_node_count),
+                                                         msg_type=MessageType.Ack,
+                                                         serializer=Serializer.SCHEMA)
 
     def __materialize_function(self, function_name, key, t_id, request_id, timestamp,
-                               fallback_mode, use_fallback_cache, protocol):
+                               fallback_mode, use_fallback_cache, protocol, read_only=False):
         f = StatefulFunction(key,
                              function_name,
                              self.name,
@@ -113,7 +135,8 @@ class Operator(BaseOperator):
                              request_id,
                              fallback_mode,
                              use_fallback_cache,
-                             protocol)
+                             protocol,
+                             read_only)
         try:
             f.run = self.__functions[function_name]
         except KeyError:
@@ -123,10 +146,24 @@ class Operator(BaseOperator):
     def register(self, func: type):
         self.__functions[func.__name__] = func
 
+    def register_read_only(self, func: type):
+        """Registers a function that never writes, its requests skip the epochs and read the committed state"""
+        self.register(func)
+        self.__read_only_functions.add(func.__name__)
+
+    def is_read_only(self, function_name: str) -> bool:
+        return function_name in self.__read_only_functions
+
+    def create_index(self, index_name: str, extractor: Callable[[Any], Any]):
+        """Declares a secondary index maintained on commit, extractor returns the index key of a value or None"""
+        self.__indexes[index_name] = extractor
+
     def attach_state_networking(self, state, networking, dns):
         self.__state = state
         self.__networking = networking
         self.__dns = dns
+        for index_name, extractor in self.__indexes.items():
+            state.declare_index(self.name, index_name, extractor)
 
     def set_n_partitions(self, n_partitions: int):
         self.n_partitions = n_partitions
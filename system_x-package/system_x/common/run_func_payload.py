@@ -1,28 +1,32 @@
-from dataclasses import dataclass
+from typing import Any
 
+import msgspec
 
-@dataclass
-class RunFuncPayload(object):
+# host, port, t_id, ack share, chain participants, partial node count
+AckPayload = tuple[str, int, int, tuple[int, int], list[int], int]
+
+
+class RunFuncPayload(msgspec.Struct, array_like=True, gc=False):
+    """A function call waiting to run, from the ingress, a local chain call or a remote call.
+
+    Encoded as a msgpack array in field order, so a RunFunRemote frame decodes straight into it.
+    """
     request_id: bytes
-    key: object
+    key: Any
     timestamp: int
     operator_name: str
     partition: int
     function_name: str
     params: tuple
-    response_socket: object = None
+    response_socket: Any = None
     kafka_offset: int = -1
-    # host, port, t_id, stake, chain_participants, partial_node_count
-    ack_payload: tuple[str, int, int, str, list[int], int] | None = None
+    ack_payload: AckPayload | None = None
 
 
-@dataclass
-class SequencedItem(object):
+class SequencedItem(msgspec.Struct, gc=False, order=True):
+    """A sequenced call, ordered by t_id. The t_ids of a sequence are unique, so the payloads are never compared."""
     t_id: int
     payload: RunFuncPayload
 
     def __hash__(self):
         return hash(self.t_id)
-
-    def __lt__(self, other):
-        return self.t_id < other.t_id
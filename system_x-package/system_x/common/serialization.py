@@ -11,6 +11,8 @@ class Serializer(Enum):
     MSGPACK = auto()
     PICKLE = auto()
     NONE = auto()
+    # msgpack validated against the schema of the message type, see message_schemas
+    SCHEMA = auto()
 
 
 def msgpack_serialization(serializable_object: object) -> bytes:
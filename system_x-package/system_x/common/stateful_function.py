@@ -1,5 +1,5 @@
 import asyncio
-import fractions
+import sys
 import traceback
 import uuid
 
@@ -10,11 +10,13 @@ import mmh3
 from .logging import logging
 from .tcp_networking import NetworkingManager
 
+from .ack_share import ROOT_ACK_SHARE, split_ack_share
 from .serialization import Serializer
 from .function import Function
 from .base_state import BaseOperatorState as State
 from .base_protocol import BaseTransactionalProtocol
-from .exceptions import NonSupportedKeyType
+from .exceptions import NonSupportedKeyType, KeyNotInPartition, ReadOnlyFunctionWrite
+from .message_schemas import RunFunRemote
 from .message_types import MessageType
 from .run_func_payload import RunFuncPayload
 
@@ -32,6 +34,13 @@ def make_key_hashable(key) -> int:
     raise NonSupportedKeyType()
 
 
+def prefix_end(prefix: str) -> str | None:
+    """The smallest string after all the strings with the prefix, None if they run to the end of the key order"""
+    # U+10FFFF has no successor, the trailing ones are dropped and the code point before them is incremented
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else None
+
+
 class StatefulFunction(Function):
 
     def __init__(self,
@@ -46,7 +55,8 @@ class StatefulFunction(Function):
                  request_id: bytes,
                  fallback_mode: bool,
                  use_fallback_cache: bool,
-                 protocol: BaseTransactionalProtocol):
+                 protocol: BaseTransactionalProtocol,
+                 read_only: bool = False):
         super().__init__(name=function_name)
         self.__operator_name = operator_name
         self.__state: State = operator_state
@@ -60,6 +70,8 @@ class StatefulFunction(Function):
         self.__use_fallback_cache: bool = use_fallback_cache
         self.__key = key
         self.__protocol = protocol
+        # read only functions see the last committed epoch without reservations and cannot write
+        self.__read_only: bool = read_only
 
     async def __call__(self, *args, **kwargs):
         try:
@@ -82,7 +94,7 @@ class StatefulFunction(Function):
                 # start of the chain
                 n_remote_calls = await self.__send_async_calls(ack_host="",
                                                                ack_port=-1,
-                                                               ack_share=1,
+                                                               ack_share=ROOT_ACK_SHARE,
                                                                chain_participants=[],
                                                                partial_node_count=partial_node_count,
                                                                is_root=True)
@@ -93,6 +105,8 @@ class StatefulFunction(Function):
 
     @property
     def data(self):
+        if self.__read_only:
+            return dict(self.__state.scan_committed(self.__operator_name))
         return self.__state.get_all(self.__t_id, self.__operator_name)
 
     @property
@@ -103,7 +117,9 @@ class StatefulFunction(Function):
         raise NotImplementedError
 
     def get(self):
-        if self.__fallback_enabled:
+        if self.__read_only:
+            value = self.__state.get_committed(self.key, self.__operator_name)
+        elif self.__fallback_enabled:
             value = self.__state.get_immediate(self.key, self.__t_id, self.__operator_name)
         else:
             value = self.__state.get(self.key, self.__t_id, self.__operator_name)
@@ -112,12 +128,72 @@ class StatefulFunction(Function):
 
     def put(self, value):
         # logging.info(f'PUT: {self.key}:{value} with t_id: {self.__t_id} operator: {self.__operator_name}')
+        self.__check_writable()
         if self.__fallback_enabled:
             self.__state.put_immediate(self.key, value, self.__t_id, self.__operator_name)
         else:
             self.__state.put(self.key, value, self.__t_id, self.__operator_name)
 
+    def delete(self):
+        self.__check_writable()
+        if self.__fallback_enabled:
+            self.__state.delete_immediate(self.key, self.__t_id, self.__operator_name)
+        else:
+            self.__state.delete(self.key, self.__t_id, self.__operator_name)
+
+    def get_many(self, keys) -> dict:
+        """Reads several keys of this function's partition within the transaction, without remote calls"""
+        self.__check_local_partition(keys)
+        if self.__read_only:
+            return {key: self.__state.get_committed(key, self.__operator_name) for key in keys}
+        if self.__fallback_enabled:
+            return {key: self.__state.get_immediate(key, self.__t_id, self.__operator_name) for key in keys}
+        return {key: self.__state.get(key, self.__t_id, self.__operator_name) for key in keys}
+
+    def put_many(self, kv_pairs: dict):
+        """Writes several keys of this function's partition within the transaction, without remote calls"""
+        self.__check_writable()
+        self.__check_local_partition(kv_pairs.keys())
+        if self.__fallback_enabled:
+            for key, value in kv_pairs.items():
+                self.__state.put_immediate(key, value, self.__t_id, self.__operator_name)
+        else:
+            for key, value in kv_pairs.items():
+                self.__state.put(key, value, self.__t_id, self.__operator_name)
+
+    def __check_writable(self):
+        if self.__read_only:
+            raise ReadOnlyFunctionWrite(f'Function: {self.__operator_name}:{self.name} is registered as read only')
+
+    def __check_local_partition(self, keys):
+        n_partitions: int = len(self.__dns[self.__operator_name].keys())
+        partition: int = make_key_hashable(self.key) % n_partitions
+        for key in keys:
+            if make_key_hashable(key) % n_partitions != partition:
+                raise KeyNotInPartition(f'Key: {key} is not in partition: {partition} of operator: '
+                                        f'{self.__operator_name} with key: {self.key}, use call_remote_async')
+
+    def scan(self, start=None, end=None, prefix: str | None = None) -> list[tuple]:
+        """The local (key, value) pairs of the operator with start <= key < end, or with the given string prefix,
+        in key order. Unlike data, only the scanned range is read."""
+        if prefix is not None:
+            start, end = prefix, prefix_end(prefix)
+        if self.__read_only:
+            return self.__state.scan_committed(self.__operator_name, start, end)
+        if self.__fallback_enabled:
+            return self.__state.scan_immediate(self.__t_id, self.__operator_name, start, end)
+        return self.__state.scan(self.__t_id, self.__operator_name, start, end)
+
+    def lookup(self, index_name: str, index_key) -> list[tuple]:
+        """The local (key, value) pairs of the operator whose key in the declared index index_name is index_key"""
+        if self.__read_only:
+            return self.__state.lookup_committed(self.__operator_name, index_name, index_key)
+        if self.__fallback_enabled:
+            return self.__state.lookup_immediate(self.__t_id, self.__operator_name, index_name, index_key)
+        return self.__state.lookup(self.__t_id, self.__operator_name, index_name, index_key)
+
     def batch_insert(self, kv_pairs: dict):
+        self.__check_writable()
         if kv_pairs:
             self.__state.batch_insert(kv_pairs, self.__operator_name)
 
@@ -132,7 +208,7 @@ class StatefulFunction(Function):
         if n_remote_calls == 0:
             return n_remote_calls
         # if fallback is enabled there is no need to call the functions because they are already cached
-        new_share_fraction: str = str(fractions.Fraction(f'1/{n_remote_calls}') * fractions.Fraction(ack_share))
+        call_ack_shares: list[tuple[int, int]] = split_ack_share(ack_share, n_remote_calls)
         if is_root:
             # This is the root
             ack_host = self.__networking.host_name
@@ -143,14 +219,14 @@ class StatefulFunction(Function):
                 chain_participants.append(self.__networking.worker_id)
             partial_node_count += 1
         remote_calls: list[Awaitable] = []
-        for entry in self.__async_remote_calls:
+        for entry, call_ack_share in zip(self.__async_remote_calls, call_ack_shares):
             operator_name, function_name, partition, key, params, is_local = entry
-            ack_payload: tuple[str, int, int, str, list[int], int] = (ack_host,
-                                                                      ack_port,
-                                                                      self.__t_id,
-                                                                      new_share_fraction,
-                                                                      chain_participants,
-                                                                      partial_node_count)
+            ack_payload: tuple[str, int, int, tuple[int, int], list[int], int] = (ack_host,
+                                                                                  ack_port,
+                                                                                  self.__t_id,
+                                                                                  call_ack_share,
+                                                                                  chain_participants,
+                                                                                  partial_node_count)
             # logging.warning(f'Sending F-call with ack payload: {ack_payload}')
             if is_local:
                 payload = RunFuncPayload(request_id=self.__request_id,
@@ -190,6 +266,7 @@ class StatefulFunction(Function):
                           function_name: Type | str,
                           key,
                           params: tuple = tuple()):
+        self.__check_writable()
         if isinstance(function_name, type):
             function_name = function_name.__name__
         partition: int = make_key_hashable(key) % len(self.__dns[operator_name].keys())
@@ -213,11 +290,12 @@ class StatefulFunction(Function):
                                                                                     params,
                                                                                     ack_payload)
         logging.info(f"Call RunFunRemote: {payload}")
-        await self.__networking.send_message(operator_host,
-                                             operator_port,
-                                             msg=payload,
-                                             msg_type=MessageType.RunFunRemote,
-                                             serializer=Serializer.MSGPACK)
+        self.__networking.sent_remote_calls = True
+        await self.__networking.send_message_batched(operator_host,
+                                                     operator_port,
+                                                     msg=payload,
+                                                     msg_type=MessageType.RunFunRemote,
+                                                     serializer=Serializer.SCHEMA)
 
     # @deprecated(reason="Request response is no longer supported")
     # async def __call_remote_function_request_response(self,
@@ -245,17 +323,11 @@ class StatefulFunction(Function):
                                        function_name: str, partition: int, params: tuple, ack_payload=None):
         try:
 
-            payload = (self.__t_id,  # __T_ID__
-                       self.__request_id,  # __RQ_ID__
-                       operator_name,  # __OP_NAME__
-                       function_name,  # __FUN_NAME__
-                       key,  # __KEY__
-                       partition,  # __PARTITION__
-                       self.__timestamp,  # __TIMESTAMP__
-                       self.__fallback_enabled,
-                       params)  # __PARAMS__
-            if ack_payload is not None:
-                payload += (ack_payload, )
+            payload = RunFunRemote(self.__t_id, self.__protocol.epoch, self.__fallback_enabled,
+                                   RunFuncPayload(request_id=self.__request_id, key=key, timestamp=self.__timestamp,
+                                                  operator_name=operator_name, partition=partition,
+                                                  function_name=function_name, params=params,
+                                                  ack_payload=ack_payload))
             operator_host = self.__dns[operator_name][str(partition)][0]
             operator_port = self.__dns[operator_name][str(partition)][2]
         except KeyError:
@@ -1,30 +1,55 @@
 import asyncio
+import os
 import socket
 import struct
-import sys
 from struct import unpack
 from timeit import default_timer as timer
 
 from .exceptions import SerializerNotSupported
 from .base_networking import BaseNetworking, MessagingMode
 from .logging import logging
+from .message_schemas import Message, schema_serialization
+from .message_types import MessageType
 from .serialization import Serializer, cloudpickle_serialization, msgpack_serialization, pickle_serialization
 from .util.aio_task_scheduler import AIOTaskScheduler
 
 
+def unix_socket_path(directory: str, port: int) -> str:
+    """The Unix domain socket that a worker listens on next to its TCP port"""
+    return os.path.join(directory, f'{port}.sock')
+
+
 class SysXSocketClient(object):
 
-    def __init__(self):
+    def __init__(self, unix_path: str | None = None):
         self.reader = None
         self.writer = None
         self.target_host = None
         self.target_port = None
+        # the Unix domain socket of a peer on the same host, used instead of TCP while it accepts connections
+        self.unix_path: str | None = unix_path
         self.lock = asyncio.Lock()
         self.n_retries = 3
+        # the messages queued since the writer task last took the queue, their size, and the future set once they
+        # are written if a sender waits for them
+        self.send_queue: list[bytes] = []
+        self.queued_bytes: int = 0
+        self.sent: asyncio.Future | None = None
+        # at most one writer task per connection, so the messages go out in the order they were queued
+        self.writer_task: asyncio.Task | None = None
 
     async def create_connection(self, host, port) -> bool:
         self.target_host = host
         self.target_port = port
+        if self.unix_path is not None:
+            try:
+                self.reader, self.writer = await asyncio.open_unix_connection(self.unix_path, limit=2 ** 32)
+            except OSError as e:
+                logging.warning(f"{self.unix_path} is not up, connecting to {host}:{port} over TCP -> {e}")
+                self.unix_path = None
+            else:
+                logging.info(f"Connection made to {host}:{port} through {self.unix_path}")
+                return True
         success = True
         i = 0
         while i < self.n_retries:
@@ -46,17 +71,60 @@ class SysXSocketClient(object):
         return success
 
     async def send_message(self, message: bytes):
+        """Queues the message for the writer task, waits for it to be written only while the queued and the buffered
+        bytes are above the high-water mark of the transport"""
+        self.send_queue.append(message)
+        self.queued_bytes += len(message)
+        if self.writer_task is None:
+            self.writer_task = asyncio.create_task(self.write_queued())
+        if self.above_high_water_mark():
+            if self.sent is None:
+                self.sent = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self.sent)
+
+    def above_high_water_mark(self) -> bool:
+        if self.writer is None:
+            return False
+        transport = self.writer.transport
+        return self.queued_bytes + transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]
+
+    def take_queue(self) -> tuple[list[bytes], asyncio.Future | None]:
+        messages, sent = self.send_queue, self.sent
+        self.send_queue, self.queued_bytes, self.sent = [], 0, None
+        return messages, sent
+
+    async def write_queued(self):
+        # The task runs from the loop iteration after it was created, by then every sender of the previous iteration
+        # has queued its message, and exits once the queue is empty
+        while self.send_queue:
+            async with self.lock:
+                # a request-response send may have written the queue while the task waited for the lock
+                messages, sent = self.take_queue()
+                try:
+                    if messages:
+                        await self.write_messages(messages)
+                except asyncio.CancelledError:
+                    if sent is not None:
+                        sent.cancel()
+                    raise
+            if sent is not None:
+                sent.set_result(None)
+        self.writer_task = None
+
+    async def write_messages(self, messages: list[bytes]):
         i = 0
-        await self.lock.acquire()
         while i < self.n_retries:
             try:
-                self.writer.write(message)
-                await self.writer.drain()
+                self.writer.writelines(messages)
+                transport = self.writer.transport
+                # drain only above the high-water mark, or to raise the error of a lost connection
+                if transport.is_closing() or transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]:
+                    await self.writer.drain()
             except (RuntimeError, ConnectionResetError, socket.error, BrokenPipeError):
-                logging.warning(f"Broken connection in rq-rs, close the old ones and retry. "
+                logging.warning(f"Broken connection, close the old ones and retry. "
                                 f"Attempt {i} at {self.target_host}:{self.target_port}")
                 # Broken connection, close the old one and retry
-                await self.close()
+                await self.close_connection()
                 await asyncio.sleep(0.1)
                 await self.create_connection(self.target_host, self.target_port)
             except Exception as e:
@@ -68,17 +136,19 @@ class SysXSocketClient(object):
                 # send_message successful
                 break
             i += 1
-        self.lock.release()
         if i == self.n_retries:
-            logging.error(f"Cannot send_message_rq_rs to worker {self.target_host}:{self.target_port}")
+            logging.error(f"Cannot send_message to worker {self.target_host}:{self.target_port}")
 
     async def send_message_rq_rs(self, message: bytes):
         i = 0
         resp = None
         await self.lock.acquire()
+        # the messages queued before the request go first
+        messages, sent = self.take_queue()
+        messages.append(message)
         while i < self.n_retries:
             try:
-                self.writer.write(message)
+                self.writer.writelines(messages)
                 await self.writer.drain()
                 (size, ) = unpack('>Q', await self.reader.readexactly(8))
                 resp = await self.reader.readexactly(size)
@@ -86,7 +156,7 @@ class SysXSocketClient(object):
                 logging.warning(f"Broken connection in rq-rs, close the old ones and retry. "
                                 f"Attempt {i} at {self.target_host}:{self.target_port}")
                 # Broken connection, close the old one and retry
-                await self.close()
+                await self.close_connection()
                 await asyncio.sleep(0.1)
                 await self.create_connection(self.target_host, self.target_port)
             except Exception as e:
@@ -98,11 +168,19 @@ class SysXSocketClient(object):
                 break
             i += 1
         self.lock.release()
+        if sent is not None:
+            sent.set_result(None)
         if i == self.n_retries:
             logging.error(f"Cannot send_message_rq_rs to worker {self.target_host}:{self.target_port}")
         return resp
 
     async def close(self):
+        # the queued messages are written first
+        if self.writer_task is not None:
+            await asyncio.shield(self.writer_task)
+        await self.close_connection()
+
+    async def close_connection(self):
         try:
             self.writer.close()
             await self.writer.wait_closed()
@@ -115,10 +193,16 @@ class SysXSocketClient(object):
 
 class SocketPool(object):
 
-    def __init__(self, host: str, port: int, size: int = 4, mode: MessagingMode = MessagingMode.WORKER_COR):
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 size: int = 4,
+                 mode: MessagingMode = MessagingMode.WORKER_COR,
+                 unix_path: str | None = None):
         self.host = host
         self.port = port
         self.size = size
+        self.unix_path = unix_path
         self.conns: list[SysXSocketClient] = []
         self.index: int = 0
         self.messaging_mode: MessagingMode = mode
@@ -134,7 +218,7 @@ class SocketPool(object):
 
     async def create_socket_connections(self):
         for _ in range(self.size):
-            client = SysXSocketClient()
+            client = SysXSocketClient(self.unix_path)
             await client.create_connection(self.host, self.port)
             self.conns.append(client)
 
@@ -149,7 +233,9 @@ class NetworkingManager(BaseNetworking):
     def __init__(self,
                  host_port,
                  size: int = 4,
-                 mode: MessagingMode = MessagingMode.WORKER_COR):
+                 mode: MessagingMode = MessagingMode.WORKER_COR,
+                 coalesce_window_us: int = -1,
+                 unix_socket_dir: str | None = None):
         super().__init__(host_port, mode)
         self.aio_task_scheduler = AIOTaskScheduler()
         self.pools: dict[tuple[str, int], SocketPool] = {}
@@ -159,6 +245,15 @@ class NetworkingManager(BaseNetworking):
         self.send_message_calls = 0
         self.send_message_size = 0
         self.write_buffer_len = 0
+        # send_message_batched waits this long for more messages to the same destination,
+        # 0 waits for a single event loop iteration and a negative window sends every message on its own
+        self.coalesce_window_us: int = coalesce_window_us
+        # (host, port): (encoded messages, future set once they are written)
+        self.outbound_batches: dict[tuple[str, int], tuple[list[bytes], asyncio.Future]] = {}
+        self.coalesced_messages = 0
+        # the connections to the other ports of this host go through their Unix domain sockets in this directory,
+        # None keeps every connection on TCP
+        self.unix_socket_dir: str | None = unix_socket_dir
 
     async def close_all_connections(self):
         for pool in self.pools.values():
@@ -174,15 +269,19 @@ class NetworkingManager(BaseNetworking):
         self.aio_task_scheduler.create_task(self.start_metrics())
 
     async def create_socket_connection(self, host: str, port):
-        self.pools[(host, port)] = SocketPool(host, port, size=self.socket_pool_size, mode=self.messaging_mode)
+        unix_path = None
+        if self.unix_socket_dir is not None and host == self.host_name:
+            unix_path = unix_socket_path(self.unix_socket_dir, port)
+        self.pools[(host, port)] = SocketPool(host, port, size=self.socket_pool_size, mode=self.messaging_mode,
+                                              unix_path=unix_path)
         await self.pools[(host, port)].create_socket_connections()
 
     async def send_message(self,
                            host,
                            port,
-                           msg: tuple | bytes,
+                           msg: Message | tuple | bytes,
                            msg_type: int,
-                           serializer: Serializer = Serializer.CLOUDPICKLE):
+                           serializer: Serializer = Serializer.SCHEMA):
         start_time = timer()
         msg = self.encode_message(msg=msg, msg_type=msg_type, serializer=serializer)
         async with self.get_socket_lock:
@@ -193,14 +292,56 @@ class NetworkingManager(BaseNetworking):
         end_time = timer()
         self.send_message_time += end_time - start_time
         self.send_message_calls += 1
-        self.send_message_size += sys.getsizeof(msg)
+        self.send_message_size += len(msg)
+
+    async def send_message_batched(self,
+                                   host,
+                                   port,
+                                   msg: Message | tuple | bytes,
+                                   msg_type: int,
+                                   serializer: Serializer = Serializer.SCHEMA):
+        """Like send_message, but the messages to the same destination within the coalescing window share a frame"""
+        if self.coalesce_window_us < 0:
+            await self.send_message(host, port, msg, msg_type, serializer)
+            return
+        destination = (host, port)
+        if destination not in self.outbound_batches:
+            self.outbound_batches[destination] = ([], asyncio.get_running_loop().create_future())
+            self.aio_task_scheduler.create_task(self.flush_batch(destination))
+        messages, sent = self.outbound_batches[destination]
+        messages.append(self.encode_message(msg=msg, msg_type=msg_type, serializer=serializer))
+        await asyncio.shield(sent)
+
+    async def flush_batch(self, destination: tuple[str, int]):
+        await asyncio.sleep(self.coalesce_window_us / 1_000_000)
+        messages, sent = self.outbound_batches.pop(destination)
+        try:
+            start_time = timer()
+            if len(messages) == 1:
+                msg = messages[0]
+            else:
+                msg = self.encode_message(msg=b''.join(messages), msg_type=MessageType.Batch,
+                                          serializer=Serializer.NONE)
+                self.coalesced_messages += len(messages)
+            async with self.get_socket_lock:
+                if destination not in self.pools:
+                    await self.create_socket_connection(*destination)
+                socket_conn = next(self.pools[destination])
+            await socket_conn.send_message(msg)
+            self.send_message_time += timer() - start_time
+            self.send_message_calls += 1
+            self.send_message_size += len(msg)
+        except Exception as e:
+            sent.set_exception(e)
+        else:
+            sent.set_result(None)
 
     async def send_message_request_response(self,
                                             host,
                                             port,
-                                            msg: tuple | bytes,
+                                            msg: Message | tuple | bytes,
                                             msg_type: int,
-                                            serializer: Serializer = Serializer.CLOUDPICKLE):
+                                            serializer: Serializer = Serializer.SCHEMA):
         msg = self.encode_message(msg=msg, msg_type=msg_type, serializer=serializer)
         async with self.get_socket_lock:
             if (host, port) not in self.pools:
@@ -228,12 +369,16 @@ class NetworkingManager(BaseNetworking):
             f'Send_message calls: {self.send_message_calls}, '
             f'Send_message time: {self.send_message_time / 1000} ms, '
             f'Avg message time: {avg_msg_time} ms, '
-            f'Avg message size: {avg_msg_size} B.'
+            f'Avg message size: {avg_msg_size} B, '
+            f'Coalesced messages: {self.coalesced_messages}.'
         )
 
     @staticmethod
     def encode_message(msg: object | bytes, msg_type: int, serializer: Serializer) -> bytes:
-        if serializer == Serializer.CLOUDPICKLE:
+        # the schema messages are the hot path, checked first
+        if serializer == Serializer.SCHEMA:
+            msg = struct.pack('>B', msg_type) + struct.pack('>B', 4) + schema_serialization(msg)
+        elif serializer == Serializer.CLOUDPICKLE:
             msg = struct.pack('>B', msg_type) + struct.pack('>B', 0) + cloudpickle_serialization(msg)
         elif serializer == Serializer.MSGPACK:
             msg = struct.pack('>B', msg_type) + struct.pack('>B', 1) + msgpack_serialization(msg)
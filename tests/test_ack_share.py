@@ -0,0 +1,43 @@
+import random
+import unittest
+
+from msgspec import msgpack
+
+from system_x.common.ack_share import (ROOT_ACK_SHARE, EMPTY_ACK_SHARE, split_ack_share, add_ack_share,
+                                       compare_to_root)
+
+
+def leaf_shares(ack_share: tuple[int, int], fan_outs: list[int]) -> list[tuple[int, int]]:
+    """The shares of a chain where every call at depth i calls fan_outs[i] functions"""
+    if not fan_outs:
+        return [ack_share]
+    return [leaf for call_share in split_ack_share(ack_share, fan_outs[0])
+            for leaf in leaf_shares(call_share, fan_outs[1:])]
+
+
+def path_shares(ack_share: tuple[int, int], fan_outs: list[int]) -> list[tuple[int, int]]:
+    """The shares of a chain that only fans out further along its first call"""
+    leaves = []
+    for fan_out in fan_outs:
+        call_shares = split_ack_share(ack_share, fan_out)
+        leaves += call_shares[1:]
+        ack_share = call_shares[0]
+    return leaves + [ack_share]
+
+
+class TestAckShare(unittest.TestCase):
+
+    def test_chain_completes_on_the_last_ack(self):
+        rng = random.Random(0)
+        chains = [leaf_shares(ROOT_ACK_SHARE, fan_outs) for fan_outs in ([1], [15, 1], [3, 7, 2], [2] * 12)]
+        # deep enough to exhaust the weight of the root and rescale it twice
+        chains.append(path_shares(ROOT_ACK_SHARE, [3] * 100))
+        for leaves in chains:
+            rng.shuffle(leaves)
+            total = EMPTY_ACK_SHARE
+            # the shares travel in the msgpack encoded ack messages
+            for leaf in msgpack.decode(msgpack.encode(leaves)):
+                assert compare_to_root(total) == -1
+                total = add_ack_share(total, leaf)
+            assert compare_to_root(total) == 0
+            assert compare_to_root(add_ack_share(total, leaves[0])) == 1
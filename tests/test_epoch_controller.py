@@ -0,0 +1,24 @@
+import unittest
+
+from worker.sequencer.epoch_controller import EpochSizeController
+
+
+class TestEpochSizeController(unittest.TestCase):
+
+    def test_epoch_size_follows_load(self):
+        controller = EpochSizeController(100, min_epoch_size=10, max_epoch_size=1_000, latency_slo_ms=50)
+        # a backlog within the SLO grows the epochs and the fetch window up to the cap
+        for epoch in range(20):
+            controller.observe(epoch, epoch_duration_ms=10, abort_rate=0.0, queue_depth=5_000)
+        assert controller.epoch_size == 1_000
+        assert controller.fetch_window_ms == controller.max_fetch_window_ms
+        # epochs over the SLO shrink them
+        assert controller.observe(20, epoch_duration_ms=80, abort_rate=0.0, queue_depth=5_000)
+        assert controller.epoch_size == 500
+        assert controller.fetch_window_ms == controller.min_fetch_window_ms
+        # so does contention
+        assert controller.observe(21, epoch_duration_ms=10, abort_rate=0.5, queue_depth=0)
+        assert controller.epoch_size == 250
+        # within the SLO without a backlog nothing changes
+        assert not controller.observe(22, epoch_duration_ms=10, abort_rate=0.0, queue_depth=100)
+        assert [decision.epoch for decision in controller.decisions][-2:] == [20, 21]
@@ -0,0 +1,33 @@
+import time
+import unittest
+
+from msgspec import msgpack
+
+from worker.transactional_protocols.epoch_stats import EpochPhaseTimer, summarize
+
+
+class TestEpochPhaseTimer(unittest.TestCase):
+
+    def test_phases_and_ring_buffer(self):
+        epoch_timer = EpochPhaseTimer(worker_id=0, history=3)
+        for epoch in range(5):
+            epoch_timer.start_epoch(time.time() * 1000)
+            epoch_timer.mark("functions")
+            time.sleep(0.002)
+            epoch_timer.mark("commit_sync")
+            # a phase that runs twice adds up
+            epoch_timer.mark("functions")
+            record = epoch_timer.end_epoch(epoch, sequence_size=10, logic_aborts=1, concurrency_aborts=2, chains=3,
+                                           messages_sent=4, bytes_sent=100)
+            assert list(record.phases) == ["functions", "commit_sync"]
+            assert record.phases["commit_sync"] >= 2
+            assert sum(record.phases.values()) <= record.duration_ms
+        # only the last epochs that fit in the ring buffer are reported, and only once
+        records = epoch_timer.take_unreported()
+        assert [record.epoch for record in records] == [2, 3, 4]
+        assert epoch_timer.take_unreported() == []
+        summary = summarize(records)
+        assert (summary["epochs"], summary["transactions"], summary["bytes_sent"]) == (3, 30, 300)
+        assert 99 <= sum(summary["phase_percentages"].values()) <= 100
+        # the records travel to the coordinator as msgpack maps
+        assert msgpack.decode(msgpack.encode(records))[0]["concurrency_aborts"] == 2
@@ -0,0 +1,38 @@
+import random
+import struct
+import unittest
+
+from system_x.common.base_networking import BaseNetworking
+from system_x.common.framed_protocol import FramedProtocol
+from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
+
+
+def receive(protocol: FramedProtocol, stream: bytes, max_chunk: int):
+    # like the event loop, write at most a chunk into the buffer the protocol hands out
+    offset = 0
+    while offset < len(stream):
+        buffer = protocol.get_buffer(-1)
+        n = min(len(buffer), random.randint(1, max_chunk), len(stream) - offset)
+        buffer[:n] = stream[offset:offset + n]
+        protocol.buffer_updated(n)
+        offset += n
+
+
+class TestFramedProtocol(unittest.TestCase):
+
+    def test_frames_across_reads(self):
+        random.seed(0)
+        messages = [BaseNetworking.encode_message((i, b'x' * random.choice((0, 10, 100, 1000))), MessageType.Ack,
+                                                  Serializer.MSGPACK)
+                    for i in range(500)]
+        # larger than the buffer, received in place
+        messages.insert(100, BaseNetworking.encode_message(b'y' * 5000, MessageType.Ack, Serializer.NONE))
+        stream = b''.join(struct.pack('>Q', len(message)) + message for message in messages)
+        for max_chunk in (1, 7, 512, len(stream)):
+            frames = []
+            receive(FramedProtocol(frames.append, buffer_size=1024), stream, max_chunk)
+            assert frames == messages
+            assert type(frames[100]) is bytearray
+            assert BaseNetworking.decode_message(frames[100]) == b'y' * 5000
+            assert BaseNetworking.decode_message(frames[0])[0] == 0
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import unittest
+from timeit import default_timer as timer
+from unittest import mock
+
+from aiokafka import TopicPartition
+
+for variable, value in (('DISCOVERY_HOST', 'localhost'), ('DISCOVERY_PORT', '8888'), ('KAFKA_URL', 'localhost:9092'),
+                        ('MINIO_HOST', 'localhost'), ('MINIO_PORT', '9000'), ('MINIO_ROOT_USER', 'minio'),
+                        ('MINIO_ROOT_PASSWORD', 'minio123')):
+    os.environ.setdefault(variable, value)
+
+from system_x.common.framed_protocol import FramedProtocol
+from system_x.common.message_types import MessageType
+from system_x.common.operator import Operator
+from system_x.common.run_func_payload import RunFuncPayload
+from system_x.common.tcp_networking import NetworkingManager, MessagingMode
+from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+from worker.transactional_protocols import aria
+from worker.transactional_protocols.aria import AriaProtocol
+
+
+async def transfer(ctx, amount: int):
+    # the deposit reaches the other worker after it checked the conflicts of its own transactions
+    await asyncio.sleep(0.2)
+    ctx.put(ctx.get() - amount)
+    ctx.call_remote_async('account', 'deposit', 1, (amount, ))
+
+
+async def deposit(ctx, amount: int):
+    ctx.put(ctx.get() + amount)
+
+
+def account_operator() -> Operator:
+    operator = Operator('account', n_partitions=2)
+    operator.register(transfer)
+    operator.register(deposit)
+    return operator
+
+
+async def start_worker(worker_id: int, server: asyncio.AbstractServer, servers: dict[int, asyncio.AbstractServer],
+                       protocols: dict[int, AriaProtocol]) -> AriaProtocol:
+    networking = NetworkingManager(server.sockets[0].getsockname()[1], mode=MessagingMode.PROTOCOL_PROTOCOL)
+    networking.set_worker_id(worker_id)
+    addresses = {w_id: (networking.host_name, 0, s.sockets[0].getsockname()[1]) for w_id, s in servers.items()}
+    dns = {'account': {str(w_id - 1): address for w_id, address in addresses.items()}}
+    state = InMemoryOperatorState({'account'})
+    state.batch_insert({worker_id - 1: 100}, 'account')
+    operator = account_operator()
+    operator.attach_state_networking(state, networking, dns)
+    protocol = AriaProtocol(worker_id=worker_id,
+                            peers={w_id: address for w_id, address in addresses.items() if w_id != worker_id},
+                            networking=networking,
+                            protocol_socket=server.sockets[0],
+                            registered_operators={('account', worker_id - 1): operator},
+                            topic_partitions=[TopicPartition('account', worker_id - 1)],
+                            state=state,
+                            async_snapshots=None)
+    protocol.egress = mock.AsyncMock()
+    protocol.snapshot_timer = timer()
+    protocols[worker_id] = protocol
+    return protocol
+
+
+class TestFusedBarriers(unittest.TestCase):
+
+    @mock.patch.multiple(aria, FUSED_BARRIERS=True, DECENTRALIZED_BARRIERS=True)
+    def test_cross_worker_chain(self):
+        async def run() -> list[int]:
+            protocols: dict[int, AriaProtocol] = {}
+            loop = asyncio.get_running_loop()
+
+            def frame_handler(worker_id: int):
+                def handle(message: bytes | bytearray):
+                    if message[0] == MessageType.Batch:
+                        for batched_message in protocols[worker_id].networking.split_batch(message):
+                            loop.create_task(protocols[worker_id].protocol_tcp_controller(batched_message))
+                    else:
+                        loop.create_task(protocols[worker_id].protocol_tcp_controller(message))
+                return handle
+
+            servers = {worker_id: await loop.create_server(lambda w_id=worker_id: FramedProtocol(frame_handler(w_id)),
+                                                           '0.0.0.0', 0)
+                       for worker_id in (1, 2)}
+            for worker_id, server in servers.items():
+                await start_worker(worker_id, server, servers, protocols)
+            # t_id 1 transfers from the account of worker 1 to the one of worker 2, t_id 2 deposits there directly
+            protocols[1].sequencer.sequence(RunFuncPayload(b'transfer', 0, 0, 'account', 0, 'transfer', (10, ),
+                                                           kafka_offset=0))
+            protocols[2].sequencer.sequence(RunFuncPayload(b'deposit', 1, 0, 'account', 1, 'deposit', (5, ),
+                                                           kafka_offset=0))
+            schedulers = []
+            for protocol in protocols.values():
+                protocol.started.set()
+                schedulers.append(asyncio.create_task(protocol.function_scheduler()))
+            while any(protocol.sequencer.epoch_counter < 1 for protocol in protocols.values()):
+                await asyncio.sleep(0.01)
+            balances = [protocols[1].local_state.get_committed(0, 'account'),
+                        protocols[2].local_state.get_committed(1, 'account')]
+            for scheduler in schedulers:
+                scheduler.cancel()
+            await asyncio.gather(*schedulers, return_exceptions=True)
+            for worker_id, protocol in protocols.items():
+                await protocol.networking.close_all_connections()
+                servers[worker_id].close()
+            return balances
+
+        # the check of worker 2 before the round missed the deposit of the chain, t_id 2 aborts after the commit round
+        assert asyncio.run(asyncio.wait_for(run(), 10)) == [90, 115]
+
+
+if __name__ == '__main__':
+    unittest.main()
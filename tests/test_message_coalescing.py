@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+from struct import unpack
+
+from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
+from system_x.common.tcp_networking import NetworkingManager, MessagingMode
+
+
+async def send_and_receive(coalesce_window_us: int, n_messages: int) -> tuple[list[bytes], list]:
+    frames: list[bytes] = []
+
+    async def request_handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                (size, ) = unpack('>Q', await reader.readexactly(8))
+                frames.append(await reader.readexactly(size))
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(request_handler, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    networking = NetworkingManager(None, size=1, mode=MessagingMode.PROTOCOL_PROTOCOL,
+                                   coalesce_window_us=coalesce_window_us)
+    async with asyncio.TaskGroup() as tg:
+        for i in range(n_messages):
+            tg.create_task(networking.send_message_batched('127.0.0.1', port, msg=(i, ),
+                                                           msg_type=MessageType.Ack,
+                                                           serializer=Serializer.MSGPACK))
+    await networking.close_all_connections()
+    await asyncio.sleep(0.05)
+    server.close()
+    await server.wait_closed()
+    messages = []
+    for frame in frames:
+        batch = networking.split_batch(frame) if frame[0] == MessageType.Batch else [frame]
+        messages += [networking.decode_message(message) for message in batch]
+    return frames, messages
+
+
+class TestMessageCoalescing(unittest.TestCase):
+
+    def test_messages_of_a_tick_share_a_frame(self):
+        frames, messages = asyncio.run(send_and_receive(coalesce_window_us=0, n_messages=100))
+        assert len(frames) == 1
+        assert messages == [[i] for i in range(100)]
+        frames, messages = asyncio.run(send_and_receive(coalesce_window_us=-1, n_messages=100))
+        assert len(frames) == 100
+        assert sorted(messages) == [[i] for i in range(100)]
@@ -0,0 +1,35 @@
+import unittest
+
+import msgspec
+
+from system_x.common.base_networking import BaseNetworking
+from system_x.common.message_schemas import AriaCommit, RunFunRemote, peer_barrier_message, schema_deserialization
+from system_x.common.message_types import MessageType
+from system_x.common.run_func_payload import RunFuncPayload
+from system_x.common.serialization import Serializer
+
+
+def round_trip(message, msg_type: MessageType):
+    return BaseNetworking.decode_message(BaseNetworking.encode_message(message, msg_type, Serializer.SCHEMA))
+
+
+class TestMessageSchemas(unittest.TestCase):
+
+    def test_typed_round_trip(self):
+        commit = AriaCommit({1, 2}, 10, 3)
+        assert round_trip(commit, MessageType.AriaCommit) == commit
+        call = RunFunRemote(1, 3, False, RunFuncPayload(b'rq', 'key', 0, 'stock', 0, 'update', (1, 'a'),
+                                                     ack_payload=('10.0.0.1', 6000, 1, (1 << 61, 0), [2], 0)))
+        assert round_trip(call, MessageType.RunFunRemote) == call
+        # the remote call is decoded into the payload that the receiver runs
+        assert type(round_trip(call, MessageType.RunFunRemote).payload) is RunFuncPayload
+        # the payload of a peer barrier is decoded with the schema of the barrier type
+        barrier = round_trip(peer_barrier_message(MessageType.AriaCommit, 7, 1, commit), MessageType.PeerBarrier)
+        assert schema_deserialization(barrier.barrier_type, barrier.payload) == commit
+
+    def test_malformed_messages_fail_at_decode(self):
+        with self.assertRaises(msgspec.ValidationError):
+            schema_deserialization(MessageType.AriaCommit, msgspec.msgpack.encode([[1], 'not a t_counter', 3]))
+        # a message of another type
+        with self.assertRaises(msgspec.ValidationError):
+            schema_deserialization(MessageType.Ack, msgspec.msgpack.encode(AriaCommit({1}, 10, 3)))
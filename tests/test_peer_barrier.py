@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from system_x.common.message_schemas import Empty, AriaProcessingDone, AriaCommit, AriaFusedCommit
+from system_x.common.message_types import MessageType
+
+from worker.transactional_protocols.peer_barrier import PeerBarrier
+
+
+async def run_epoch(n_workers: int, all_to_all_max: int) -> list[list]:
+    barriers: dict[int, PeerBarrier] = {}
+
+    async def send(worker_id: int, message: tuple):
+        barriers[worker_id].receive(*message)
+
+    for worker_id in range(n_workers):
+        barriers[worker_id] = PeerBarrier(worker_id, list(range(n_workers)), send, all_to_all_max=all_to_all_max)
+
+    async def worker(worker_id: int) -> list:
+        return [await barriers[worker_id].sync(MessageType.AriaProcessingDone, 0, AriaProcessingDone({worker_id})),
+                await barriers[worker_id].sync(MessageType.AriaCommit, 0, AriaCommit({worker_id * 10}, worker_id, 1)),
+                await barriers[worker_id].sync(MessageType.AriaFusedCommit, 0,
+                                               AriaFusedCommit(set(), {worker_id}, worker_id, 1, False)),
+                await barriers[worker_id].sync(MessageType.SyncCleanup, 0, Empty())]
+
+    return await asyncio.gather(*(worker(worker_id) for worker_id in range(n_workers)))
+
+
+class TestPeerBarrier(unittest.TestCase):
+
+    def test_all_to_all_and_tree(self):
+        n_workers = 7
+        expected = [AriaProcessingDone(set(range(n_workers))),
+                    AriaCommit({worker_id * 10 for worker_id in range(n_workers)}, n_workers - 1, n_workers),
+                    AriaFusedCommit(set(), set(range(n_workers)), n_workers - 1, n_workers, False),
+                    Empty()]
+        for all_to_all_max in (n_workers, 1):
+            results = asyncio.run(run_epoch(n_workers, all_to_all_max))
+            assert all(worker_results == expected for worker_results in results)
+
+    def test_next_epoch_contribution_first(self):
+        async def run() -> AriaFusedCommit:
+            sent: list[tuple] = []
+
+            async def send(worker_id: int, message: tuple):
+                sent.append((worker_id, message))
+
+            barrier = PeerBarrier(0, [0, 1, 2], send)
+            # worker 1 already finished epoch 5 and contributes to epoch 6 before worker 2 contributes to epoch 5
+            barrier.receive(MessageType.AriaFusedCommit, 5, 0, AriaFusedCommit(set(), {1}, 1, 1, False))
+            barrier.receive(MessageType.AriaFusedCommit, 6, 0, AriaFusedCommit(set(), {61}, 1, 1, True))
+            epoch_sync = asyncio.create_task(barrier.sync(MessageType.AriaFusedCommit, 5,
+                                                          AriaFusedCommit(set(), {0}, 0, 1, False)))
+            await asyncio.sleep(0)
+            assert not epoch_sync.done()
+            barrier.receive(MessageType.AriaFusedCommit, 5, 0, AriaFusedCommit(set(), {2}, 2, 1, False))
+            result = await epoch_sync
+            barrier.receive(MessageType.AriaFusedCommit, 6, 0, AriaFusedCommit(set(), {62}, 2, 1, False))
+            assert await barrier.sync(MessageType.AriaFusedCommit, 6, AriaFusedCommit(set(), {60}, 0, 1, False)) == \
+                AriaFusedCommit(set(), {60, 61, 62}, 2, 3, True)
+            return result
+
+        assert asyncio.run(run()) == AriaFusedCommit(set(), {0, 1, 2}, 2, 3, False)
@@ -1,6 +1,6 @@
 import unittest
 
-from system_x.common.run_func_payload import RunFuncPayload
+from system_x.common.run_func_payload import RunFuncPayload, SequencedItem
 
 from worker.sequencer.sequencer import Sequencer
 from worker.sequencer.calvin_sequencer import CalvinSequencer
@@ -9,7 +9,7 @@ from worker.sequencer.calvin_sequencer import CalvinSequencer
 class TestSequencer(unittest.TestCase):
 
     def test_sequencer(self):
-        test_payload = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0, ), None, None)
+        test_payload = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0, ))
         seq = Sequencer()
         seq.set_worker_id(1)
         seq.set_n_workers(2)
@@ -37,9 +37,9 @@ class TestSequencer(unittest.TestCase):
         assert [sq_item.t_id for sq_item in epoch] == [1, 11]
 
     def test_vanilla_sequencer(self):
-        test_payload1 = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0,), None, None)
-        test_payload2 = RunFuncPayload(b'1', 1, 1, 'test', 1, 'test', (1,), None, None)
-        test_payload3 = RunFuncPayload(b'2', 2, 2, 'test', 2, 'test', (2,), None, None)
+        test_payload1 = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0,))
+        test_payload2 = RunFuncPayload(b'1', 1, 1, 'test', 1, 'test', (1,))
+        test_payload3 = RunFuncPayload(b'2', 2, 2, 'test', 2, 'test', (2,))
         n1 = 3
         n2 = 3
         n3 = 3
@@ -73,7 +73,7 @@ class TestSequencer(unittest.TestCase):
             print(next(rr_gen))
 
     def test_four_sequencers(self):
-        test_payload = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0,), None, None)
+        test_payload = RunFuncPayload(b'0', 0, 0, 'test', 0, 'test', (0,))
         seq1 = Sequencer(max_size=2)
         seq2 = Sequencer(max_size=2)
         seq3 = Sequencer(max_size=2)
@@ -138,3 +138,48 @@ class TestSequencer(unittest.TestCase):
         print([sq_item.t_id for sq_item in e3])
         e4 = seq4.get_epoch()
         print([sq_item.t_id for sq_item in e4])
+
+    def test_conflict_aware_sequencer(self):
+        seq = Sequencer(max_size=3, conflict_aware=True)
+        keys = [0, 0, 1, 0, 2, 3]
+        seq.distributed_log = [SequencedItem(t_id, RunFuncPayload(b'0', key, 0, 'test', 0, 'test', (0, )))
+                               for t_id, key in enumerate(keys)]
+        assert [sq_item.t_id for sq_item in seq.get_epoch()] == [0, 2, 4]
+        seq.increment_epoch(max_t_counter=6, t_ids_to_reschedule=set())
+        assert [sq_item.t_id for sq_item in seq.get_epoch()] == [1, 5]
+        seq.increment_epoch(max_t_counter=6, t_ids_to_reschedule=set())
+        assert [sq_item.t_id for sq_item in seq.get_epoch()] == [3]
+        assert seq.deferred_conflicts == 3
+
+    def test_committed_offsets(self):
+        def sequence(seq: Sequencer, keys: dict[int, int]):
+            for offset, key in keys.items():
+                seq.sequence(RunFuncPayload(b'0', key, 0, 'test', 0, 'test', (0, ), kafka_offset=offset))
+
+        seq = Sequencer(conflict_aware=True)
+        seq.set_worker_id(0)
+        seq.set_n_workers(1)
+        offsets = {('test', 0): -1}
+        sequence(seq, {0: 0, 1: 0, 2: 1, 3: 2})
+        assert [sq_item.payload.kafka_offset for sq_item in seq.get_epoch()] == [0, 2, 3]
+        # offset 1 is deferred and offset 3 rescheduled, offset 2 commits above them
+        seq.commit_offsets({3}, offsets)
+        seq.increment_epoch(max_t_counter=4, t_ids_to_reschedule={3})
+        assert offsets == {('test', 0): 0}
+        assert seq.get_committed_offsets(offsets) == {('test', 0): [2]}
+
+        # the recovery from this snapshot replays the partition from offset 1 and skips offset 2
+        recovered = Sequencer(conflict_aware=True, committed_offsets=seq.get_committed_offsets(offsets))
+        recovered.set_worker_id(0)
+        recovered.set_n_workers(1)
+        recovered_offsets = dict(offsets)
+        sequence(recovered, {1: 0, 2: 1, 3: 2, 4: 3})
+        assert [sq_item.payload.kafka_offset for sq_item in recovered.get_epoch()] == [1, 3, 4]
+        recovered.commit_offsets(set(), recovered_offsets)
+        assert recovered_offsets == {('test', 0): 4}
+        assert recovered.get_committed_offsets(recovered_offsets) == {}
+
+        assert [sq_item.payload.kafka_offset for sq_item in seq.get_epoch()] == [3, 1]
+        seq.commit_offsets(set(), offsets)
+        assert offsets == {('test', 0): 3}
+        assert seq.get_committed_offsets(offsets) == {}
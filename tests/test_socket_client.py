@@ -0,0 +1,76 @@
+import asyncio
+import tempfile
+import unittest
+
+from system_x.common.message_types import MessageType
+from system_x.common.serialization import Serializer
+from system_x.common.tcp_networking import SysXSocketClient, NetworkingManager, unix_socket_path
+
+
+def receiving_handler(received: list[bytes]):
+    async def request_handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while data := await reader.read(2 ** 16):
+            received.append(data)
+        writer.close()
+    return request_handler
+
+
+async def start_server(received: list[bytes]) -> asyncio.Server:
+    return await asyncio.start_server(receiving_handler(received), '127.0.0.1', 0)
+
+
+class TestSocketClient(unittest.TestCase):
+
+    def test_queued_messages_keep_their_order(self):
+        async def run():
+            received: list[bytes] = []
+            server = await start_server(received)
+            client = SysXSocketClient()
+            await client.create_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+            writelines = client.writer.writelines
+            writes = []
+
+            def counting_writelines(messages):
+                writes.append(len(messages))
+                writelines(messages)
+
+            client.writer.writelines = counting_writelines
+            messages = [i.to_bytes(4, 'big') * (i % 100) for i in range(2000)]
+            await asyncio.gather(*(client.send_message(message) for message in messages))
+            # the senders of one loop iteration share a write
+            assert writes == [len(messages)]
+            await asyncio.sleep(0.05)
+            # a broken connection is reopened and the queued messages are written again
+            client.writer.transport.abort()
+            await client.send_message(b'after reconnect')
+            await client.close()
+            await asyncio.sleep(0.05)
+            assert b''.join(received) == b''.join(messages) + b'after reconnect'
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run(run())
+
+    def test_colocated_peers_over_unix_sockets(self):
+        async def run():
+            with tempfile.TemporaryDirectory() as directory:
+                unix_received: list[bytes] = []
+                unix_server = await asyncio.start_unix_server(receiving_handler(unix_received),
+                                                              unix_socket_path(directory, 6001))
+                tcp_received: list[bytes] = []
+                tcp_server = await asyncio.start_server(receiving_handler(tcp_received), '0.0.0.0', 0)
+                tcp_port = tcp_server.sockets[0].getsockname()[1]
+                networking = NetworkingManager(6000, size=1, unix_socket_dir=directory)
+                await networking.send_message(networking.host_name, 6001, msg=b'unix', msg_type=MessageType.Ack,
+                                              serializer=Serializer.NONE)
+                # a port of this host without a Unix domain socket is reached over TCP
+                await networking.send_message(networking.host_name, tcp_port, msg=b'tcp', msg_type=MessageType.Ack,
+                                              serializer=Serializer.NONE)
+                await networking.close_all_connections()
+                await asyncio.sleep(0.05)
+                assert networking.decode_message(b''.join(unix_received)[8:]) == b'unix'
+                assert networking.decode_message(b''.join(tcp_received)[8:]) == b'tcp'
+                unix_server.close()
+                tcp_server.close()
+
+        asyncio.run(run())
@@ -1,7 +1,13 @@
+import random
+import tempfile
 import unittest
 
-from tests.utils import commit_state, transaction, rerun_conflicts, commit_state3, merge_rw_reservations, merge_rw_sets
+from system_x.common.exceptions import KeyNotInPartition, ReadOnlyFunctionWrite
+from system_x.common.stateful_function import StatefulFunction
+from tests.utils import commit_state, transaction, rerun_conflicts, commit_state3, exchange_compact_rw_sets
 from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+from worker.operator_state.aria.log_store import LogStore
+from worker.operator_state.aria.log_structured_state import LogStructuredOperatorState
 
 operator_names = {"test"}
 
@@ -29,7 +35,7 @@ class TestState(unittest.TestCase):
         state.commit_fallback_transaction(2)
         reply = state.get(key=2, t_id=2, operator_name="test")
         assert reply == value_to_put
-        state.delete(key=2, operator_name="test")
+        state.delete(key=2, t_id=3, operator_name="test")
         exists = state.exists(key=1, operator_name="test")
         assert exists
         exists = state.exists(key=3, operator_name="test")
@@ -56,7 +62,7 @@ class TestState(unittest.TestCase):
         state.get(key=z_key, t_id=3, operator_name="test")
         conflicts = state.check_conflicts()
         assert conflicts == {2, 3}
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == set()
         # Bottom example
@@ -72,7 +78,7 @@ class TestState(unittest.TestCase):
         state.put(key=z_key, value=value_to_put, t_id=3, operator_name="test")
         conflicts = state.check_conflicts()
         assert conflicts == {1} or conflicts == {2} or conflicts == {3}
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == {1} or conflicts == {2} or conflicts == {3}
 
@@ -155,7 +161,7 @@ class TestState(unittest.TestCase):
         state.put(key=x_key, value=value_to_put, t_id=1, operator_name="test")
         # T2
         state.put(key=x_key, value=value_to_put, t_id=2, operator_name="test")
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == {2}
 
@@ -184,7 +190,7 @@ class TestState(unittest.TestCase):
         if x + y > 1:
             w1_state.put(key=1, value=y - 1, t_id=4, operator_name="test")
 
-        w1_state.set_global_read_write_sets(w1_state.reads, w1_state.write_sets, w1_state.read_sets)
+        exchange_compact_rw_sets(w1_state)
 
         conflicts = w1_state.check_conflicts_deterministic_reordering()
         committed_t_ids = w1_state.commit(conflicts)
@@ -285,12 +291,7 @@ class TestState(unittest.TestCase):
         z_conflicts = z_state.check_conflicts()
         conflicts = x_conflicts | y_conflicts | z_conflicts
         assert conflicts == {2, 3}
-        global_reads = merge_rw_reservations(merge_rw_reservations(x_state.reads, y_state.reads), z_state.reads)
-        global_write_sets = merge_rw_sets(merge_rw_sets(x_state.write_sets, y_state.write_sets), z_state.write_sets)
-        global_read_sets = merge_rw_sets(merge_rw_sets(x_state.read_sets, y_state.read_sets), z_state.read_sets)
-        x_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
-        y_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
-        z_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
+        exchange_compact_rw_sets(x_state, y_state, z_state)
         x_conflicts = x_state.check_conflicts_deterministic_reordering()
         y_conflicts = y_state.check_conflicts_deterministic_reordering()
         z_conflicts = z_state.check_conflicts_deterministic_reordering()
@@ -314,12 +315,7 @@ class TestState(unittest.TestCase):
         z_conflicts = z_state.check_conflicts()
         conflicts = x_conflicts | y_conflicts | z_conflicts
         assert conflicts == {1} or conflicts == {2} or conflicts == {3}
-        global_reads = merge_rw_reservations(merge_rw_reservations(x_state.reads, y_state.reads), z_state.reads)
-        global_write_sets = merge_rw_sets(merge_rw_sets(x_state.write_sets, y_state.write_sets), z_state.write_sets)
-        global_read_sets = merge_rw_sets(merge_rw_sets(x_state.read_sets, y_state.read_sets), z_state.read_sets)
-        x_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
-        y_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
-        z_state.set_global_read_write_sets(global_reads, global_write_sets, global_read_sets)
+        exchange_compact_rw_sets(x_state, y_state, z_state)
         x_conflicts = x_state.check_conflicts_deterministic_reordering()
         y_conflicts = y_state.check_conflicts_deterministic_reordering()
         z_conflicts = z_state.check_conflicts_deterministic_reordering()
@@ -400,7 +396,7 @@ class TestState(unittest.TestCase):
 
         conflicts = state.check_conflicts()
         assert conflicts == set()
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == set()
 
@@ -426,7 +422,7 @@ class TestState(unittest.TestCase):
 
         conflicts = state.check_conflicts()
         assert conflicts == {4}
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == {4}
 
@@ -452,7 +448,7 @@ class TestState(unittest.TestCase):
 
         conflicts = state.check_conflicts()
         assert conflicts == {3}
-        state.set_global_read_write_sets(state.reads, state.write_sets, state.read_sets)
+        exchange_compact_rw_sets(state)
         conflicts = state.check_conflicts_deterministic_reordering()
         assert conflicts == {3}
 
@@ -529,3 +525,331 @@ class TestState(unittest.TestCase):
 
         assert w1_state.data == {'test': {0: 9998, 2: 10002}}
         assert w2_state.data == {'test': {1: 10000, 3: 10000}}
+
+    def test_vectorized_conflict_detection(self):
+        # the array backed reservations must produce the same abort sets as the dict based ones
+        rng = random.Random(42)
+        for _ in range(50):
+            states = [InMemoryOperatorState(operator_names), InMemoryOperatorState(operator_names)]
+            vectorized_states = [InMemoryOperatorState(operator_names, vectorized=True),
+                                 InMemoryOperatorState(operator_names, vectorized=True)]
+            t_ids = rng.sample(range(1, 200), 30)
+            for t_id in t_ids:
+                for _ in range(rng.randint(1, 4)):
+                    key = rng.randint(0, 15)
+                    worker = key % 2
+                    if rng.random() < 0.5:
+                        states[worker].get(key=key, t_id=t_id, operator_name="test")
+                        vectorized_states[worker].get(key=key, t_id=t_id, operator_name="test")
+                    else:
+                        states[worker].put(key=key, value=t_id, t_id=t_id, operator_name="test")
+                        vectorized_states[worker].put(key=key, value=t_id, t_id=t_id, operator_name="test")
+            logic_aborts = set(rng.sample(t_ids, 3))
+            for state in states + vectorized_states:
+                state.remove_aborted_from_rw_sets(logic_aborts)
+            for state, vectorized_state in zip(states, vectorized_states):
+                assert state.check_conflicts() == vectorized_state.check_conflicts()
+                assert state.check_conflicts_snapshot_isolation() == \
+                       vectorized_state.check_conflicts_snapshot_isolation()
+            exchange_compact_rw_sets(*states)
+            exchange_compact_rw_sets(*vectorized_states)
+            for state, vectorized_state in zip(states, vectorized_states):
+                assert state.check_conflicts_deterministic_reordering() == \
+                       vectorized_state.check_conflicts_deterministic_reordering()
+
+    def test_copy_on_write_reads(self):
+        state = InMemoryOperatorState(operator_names, copy_on_write_reads=True)
+        flat_value = {"balance": 10, "name": "a"}
+        nested_value = {"balance": 10, "items": [1, 2]}
+        state.put(key=0, value=flat_value, t_id=1, operator_name="test")
+        state.put(key=1, value=nested_value, t_id=1, operator_name="test")
+        state.put(key=2, value=5, t_id=1, operator_name="test")
+        state.commit(set())
+        state.cleanup()
+        # mutating what was read must not leak into the committed state
+        for _ in range(2):
+            value = state.get(key=0, t_id=2, operator_name="test")
+            value["balance"] -= 1
+            value = state.get(key=1, t_id=2, operator_name="test")
+            value["items"].append(3)
+        assert state.get(key=0, t_id=2, operator_name="test") == flat_value
+        assert state.get(key=1, t_id=2, operator_name="test") == nested_value
+        assert state.get(key=2, t_id=2, operator_name="test") == 5
+        # a commit invalidates the cached copy of the updated keys
+        state.put(key=1, value={"balance": 9, "items": [1, 2, 3]}, t_id=2, operator_name="test")
+        state.commit(set())
+        state.cleanup()
+        assert state.get(key=1, t_id=3, operator_name="test") == {"balance": 9, "items": [1, 2, 3]}
+        assert state.get_immediate(key=1, t_id=3, operator_name="test") == {"balance": 9, "items": [1, 2, 3]}
+
+    def test_min_reservations(self):
+        state = InMemoryOperatorState(operator_names)
+        for t_id in (5, 3, 7):
+            state.get(key=0, t_id=t_id, operator_name="test")
+            state.put(key=0, value=t_id, t_id=t_id, operator_name="test")
+        state.put(key=1, value=4, t_id=4, operator_name="test")
+        assert state.reads == {"test": {0: 3}}
+        assert state.writes == {"test": {0: 3, 1: 4}}
+        # removing the holder of a reservation hands it to the next lowest t_id
+        state.remove_aborted_from_rw_sets({3, 4})
+        assert state.reads == {"test": {0: 5}}
+        assert state.writes == {"test": {0: 5}}
+
+    def test_hot_key_contenders(self):
+        state = InMemoryOperatorState(operator_names)
+        for t_id in (9, 5, 3, 7, 8):
+            for _ in range(3):
+                state.get(key=0, t_id=t_id, operator_name="test")
+        state.get(key=1, t_id=9, operator_name="test")
+        # every t_id waits once behind the reservation, and a key with a single accessor has no contenders
+        contending_t_ids, heap = state.read_contenders["test"][0]
+        assert contending_t_ids == {5, 7, 8, 9} and sorted(heap) == [5, 7, 8, 9]
+        assert 1 not in state.read_contenders["test"]
+        # a released contender is skipped when the reservation is handed over
+        state.remove_aborted_from_rw_sets({5})
+        state.remove_aborted_from_rw_sets({3, 9})
+        assert state.reads == {"test": {0: 7}}
+        assert state.read_contenders["test"][0][0] == {8}
+        state.remove_aborted_from_rw_sets({7})
+        assert state.reads == {"test": {0: 8}}
+        assert state.read_contenders["test"] == {}
+        # a single contender is kept without a set and a heap
+        for t_id in (10, 11, 11):
+            state.get(key=1, t_id=t_id, operator_name="test")
+        assert state.read_contenders["test"] == {1: 11}
+        state.remove_aborted_from_rw_sets({10})
+        assert state.reads == {"test": {0: 8, 1: 11}}
+        assert state.read_contenders["test"] == {}
+
+    def test_fallback_dependencies(self):
+        state = InMemoryOperatorState(operator_names)
+        # key 0: w1 r2 r3 w4 w5 r6, key 1: r2 w7
+        state.put(key=0, value=1, t_id=1, operator_name="test")
+        state.get(key=0, t_id=2, operator_name="test")
+        state.get(key=1, t_id=2, operator_name="test")
+        state.get(key=0, t_id=3, operator_name="test")
+        state.get(key=0, t_id=4, operator_name="test")
+        state.put(key=0, value=4, t_id=4, operator_name="test")
+        state.put(key=0, value=5, t_id=5, operator_name="test")
+        state.get(key=0, t_id=6, operator_name="test")
+        state.put(key=1, value=7, t_id=7, operator_name="test")
+        dependencies, locks = state.get_dep_transactions({1, 2, 3, 4, 5, 6, 7})
+        assert set(locks) == {1, 2, 3, 4, 5, 6, 7}
+        # only the immediate predecessors, reads of the same key do not wait for each other
+        assert dependencies == {2: {1}, 3: {1}, 4: {2, 3}, 5: {4}, 6: {5}, 7: {2}}
+        # t_ids that are not rescheduled are not waited on
+        dependencies, _ = state.get_dep_transactions({2, 3, 5})
+        assert dependencies == {5: {2, 3}}
+
+    def test_deletes(self):
+        state = InMemoryOperatorState(operator_names)
+        state.batch_insert({0: 10, 1: 20, 2: 30}, "test")
+        state.clear_delta_map()
+        # a delete conflicts like a put
+        state.delete(key=0, t_id=1, operator_name="test")
+        state.put(key=0, value=11, t_id=2, operator_name="test")
+        state.delete(key=1, t_id=3, operator_name="test")
+        state.put(key=1, value=21, t_id=3, operator_name="test")
+        assert state.get(key=0, t_id=1, operator_name="test") is None
+        conflicts = state.check_conflicts()
+        assert conflicts == {2}
+        state.commit(conflicts)
+        state.cleanup()
+        assert state.data == {"test": {1: 21, 2: 30}}
+        assert state.get_data_for_snapshot() == {"test": {1: 21}}
+        assert state.get_deletes_for_snapshot() == {"test": {0}}
+        # a put after a delete clears the tombstone
+        state.put(key=0, value=12, t_id=4, operator_name="test")
+        state.commit(set())
+        state.cleanup()
+        assert state.get_deletes_for_snapshot() == {"test": set()}
+        # fallback deletes
+        state.delete_immediate(key=2, t_id=5, operator_name="test")
+        assert state.get_immediate(key=2, t_id=5, operator_name="test") is None
+        state.commit_fallback_transaction(5)
+        assert state.data == {"test": {0: 12, 1: 21}}
+        assert state.get_deletes_for_snapshot() == {"test": {2}}
+        state.clear_delta_map()
+        assert state.get_deletes_for_snapshot() == {"test": set()}
+
+    def test_log_structured_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            state = LogStructuredOperatorState(operator_names, directory, segment_size=256)
+            state.batch_insert({key: {"balance": key} for key in range(10)}, "test")
+            # same conflict detection as the in memory state
+            value = state.get(key=0, t_id=1, operator_name="test")
+            value["balance"] += 1
+            state.put(key=0, value=value, t_id=1, operator_name="test")
+            state.put(key=0, value={"balance": -1}, t_id=2, operator_name="test")
+            state.delete(key=1, t_id=3, operator_name="test")
+            conflicts = state.check_conflicts()
+            assert conflicts == {2}
+            state.commit(conflicts)
+            state.cleanup()
+            assert state.get(key=0, t_id=4, operator_name="test") == {"balance": 1}
+            assert not state.exists(key=1, operator_name="test")
+            # overwrite everything a few times so that compaction kicks in
+            for t_id in range(5, 10):
+                for key in range(2, 10):
+                    state.put(key=key, value={"balance": t_id}, t_id=t_id, operator_name="test")
+                state.commit(set())
+                state.cleanup()
+            store = state.stores["test"]
+            assert store.garbage_ratio < 0.9
+            assert state.get_all(t_id=10, operator_name="test") == {0: {"balance": 1},
+                                                                     **{key: {"balance": 9} for key in range(2, 10)}}
+            # the sealed segments rebuild the same state
+            staged = state.stage_segments_for_snapshot(snapshot_id=0)
+            assert staged["test"]
+            state.close()
+            recovered = LogStructuredOperatorState(operator_names, directory, segment_size=256)
+            assert recovered.get_all(t_id=10, operator_name="test") == {
+                0: {"balance": 1}, **{key: {"balance": 9} for key in range(2, 10)}}
+            recovered.close()
+
+    def test_log_store_compaction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = LogStore(directory, segment_size=1024, compaction_step_bytes=64)
+            # a segment of cold keys that are never overwritten
+            store.put_many({f"cold{key}": key for key in range(10)})
+            store.seal()
+            for version in range(20):
+                store.put_many({f"hot{key}": version for key in range(10)})
+                store.delete("hot0")
+            store.seal()
+            cold_segment = store.segments[0]
+            assert cold_segment.dead_ratio == 0
+            # one step reads at most compaction_step_bytes and one more record of the segment with the most garbage
+            assert not store.compact_step()
+            assert store.compacting is not cold_segment
+            assert store.compaction_offset <= 64 + max(location[3] for location in store.index.values())
+            for _ in range(1000):
+                store.compact_step()
+            assert store.compacting is None
+            assert cold_segment.segment_id in store.segments
+            assert all(segment.dead_ratio <= store.compaction_threshold
+                       for segment in store.segments.values() if segment.sealed)
+            expected = {**{f"cold{key}": key for key in range(10)}, **{f"hot{key}": 19 for key in range(1, 10)}}
+            assert {key: store.get(key) for key in store.keys()} == expected
+            store.close()
+            recovered = LogStore(directory, segment_size=1024)
+            assert {key: recovered.get(key) for key in recovered.keys()} == expected
+            recovered.close()
+
+    def test_scans_and_indexes(self):
+        state = InMemoryOperatorState(operator_names)
+        state.declare_index("test", "by_last", lambda customer: customer["last"])
+        state.batch_insert({"1:1": {"last": "BAR"}, "1:2": {"last": "OUGHT"}, "2:1": {"last": "BAR"}}, "test")
+        assert state.scan(t_id=1, operator_name="test", start="1:", end="1;") == [("1:1", {"last": "BAR"}),
+                                                                                 ("1:2", {"last": "OUGHT"})]
+        assert state.reads == {"test": {"1:1": 1, "1:2": 1}}
+        assert [key for key, _ in state.lookup(t_id=2, operator_name="test", index_name="by_last",
+                                               index_key="BAR")] == ["1:1", "2:1"]
+        # a smaller t_id inserting into the scanned range is a phantom for t_id 1, the index is untouched
+        state.put(key="1:3", value={"last": "ABLE"}, t_id=0, operator_name="test")
+        # a larger t_id moving a key into the looked up index key does not affect t_id 2
+        state.put(key="1:2", value={"last": "BAR"}, t_id=3, operator_name="test")
+        assert state.check_conflicts() == {1}
+        assert state.check_conflicts_deterministic_reordering() == {1, 3}
+        state.commit({1})
+        state.cleanup()
+        assert [key for key, _ in state.lookup(t_id=4, operator_name="test", index_name="by_last",
+                                               index_key="BAR")] == ["1:1", "1:2", "2:1"]
+        assert state.scan(t_id=4, operator_name="test", start="1:", end="1;")[-1] == ("1:3", {"last": "ABLE"})
+        # own writes are part of the scan and lookup
+        state.delete(key="1:1", t_id=5, operator_name="test")
+        state.put(key="3:1", value={"last": "BAR"}, t_id=5, operator_name="test")
+        assert [key for key, _ in state.lookup(t_id=5, operator_name="test", index_name="by_last",
+                                               index_key="BAR")] == ["1:2", "2:1", "3:1"]
+        state.commit(set())
+        state.cleanup()
+        assert state.index_entries["test"]["by_last"] == {"BAR": {"1:2", "2:1", "3:1"}, "ABLE": {"1:3"}}
+
+    def test_ordered_keys(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_structured_state = LogStructuredOperatorState(operator_names, directory, segment_size=1024)
+            for state in (InMemoryOperatorState(operator_names), log_structured_state):
+                state.batch_insert({key: key for key in range(0, 20, 2)}, "test")
+                assert state.scan_committed("test", 4, 9) == [(4, 4), (6, 6), (8, 8)]
+                # the commits keep the keys of the first scan in order
+                state.put(key=5, value=5, t_id=1, operator_name="test")
+                state.delete(key=6, t_id=1, operator_name="test")
+                state.put(key=7, value=7, t_id=2, operator_name="test")
+                state.delete(key=7, t_id=2, operator_name="test")
+                state.commit(set())
+                state.cleanup()
+                assert state.ordered_keys("test") == [0, 2, 4, 5, 8, 10, 12, 14, 16, 18]
+                state.batch_insert({key: key for key in range(1, 400, 2)}, "test")
+                assert state.ordered_keys("test") == sorted(set(range(0, 20, 2)) - {6} | set(range(1, 400, 2)))
+            log_structured_state.close()
+        state = InMemoryOperatorState(operator_names)
+        last = chr(0x10FFFF)
+        state.batch_insert({key: key for key in ("a", "a" + last, "a" + last + "b", "b", last, last * 2)}, "test")
+        ctx = StatefulFunction(key="a", function_name="f", operator_name="test", operator_state=state, networking=None,
+                               timestamp=0, dns={"test": {"0": ("localhost", 5000, 6000)}}, t_id=1, request_id=b"",
+                               fallback_mode=False, use_fallback_cache=False, protocol=None)
+        assert [key for key, _ in ctx.scan(prefix="a")] == ["a", "a" + last, "a" + last + "b"]
+        assert [key for key, _ in ctx.scan(prefix="a" + last)] == ["a" + last, "a" + last + "b"]
+        assert [key for key, _ in ctx.scan(prefix=last)] == [last, last * 2]
+
+    def test_predicate_conflicts(self):
+        state = InMemoryOperatorState(operator_names)
+        state.declare_index("test", "by_last", lambda customer: customer["last"])
+        state.batch_insert({"b": {"last": "X"}}, "test")
+        state.scan(t_id=2, operator_name="test", start="a", end="c")
+        state.scan(t_id=3, operator_name="test", start=None, end="b")
+        state.scan(t_id=4, operator_name="test", start="x", end=None)
+        state.lookup(t_id=5, operator_name="test", index_name="by_last", index_key="X")
+        state.lookup(t_id=6, operator_name="test", index_name="by_last", index_key="Y")
+        # t_id 1 writes into the range of t_id 2 and moves "b" out of index key X into Y
+        state.put(key="b", value={"last": "Y"}, t_id=1, operator_name="test")
+        state.put(key=0, value={"last": "Z"}, t_id=7, operator_name="test")
+        assert state.check_predicate_conflicts() == {2, 5, 6}
+        # t_id 7 writes a key of another type than the ranges
+        assert state.check_predicate_conflicts(include_war=True) == {2, 5, 6}
+        state.put(key="z", value={"last": "X"}, t_id=7, operator_name="test")
+        assert state.check_predicate_conflicts(include_war=True) == {2, 5, 6, 7}
+
+    def test_get_many_put_many(self):
+        state = InMemoryOperatorState(operator_names)
+        state.batch_insert({0: 0, 2: 2, 4: 4}, "test")
+        dns = {"test": {"0": ("localhost", 5000, 6000), "1": ("localhost", 5001, 6001)}}
+        ctx = StatefulFunction(key=0, function_name="f", operator_name="test", operator_state=state, networking=None,
+                               timestamp=0, dns=dns, t_id=1, request_id=b"", fallback_mode=False,
+                               use_fallback_cache=False, protocol=None)
+        assert ctx.get_many([2, 4, 6]) == {2: 2, 4: 4, 6: None}
+        ctx.put_many({2: 3, 6: 7})
+        assert state.reads == {"test": {2: 1, 4: 1, 6: 1}}
+        assert state.writes == {"test": {2: 1, 6: 1}}
+        # odd keys hash to the other partition
+        with self.assertRaises(KeyNotInPartition):
+            ctx.get_many([1])
+        with self.assertRaises(KeyNotInPartition):
+            ctx.put_many({3: 3})
+
+    def test_read_only_function(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_structured_state = LogStructuredOperatorState(operator_names, directory, segment_size=1024)
+            for state in (InMemoryOperatorState(operator_names), log_structured_state):
+                state.batch_insert({0: {"v": 0}, 2: {"v": 2}}, "test")
+                dns = {"test": {"0": ("localhost", 5000, 6000)}}
+                ctx = StatefulFunction(key=0, function_name="f", operator_name="test", operator_state=state,
+                                       networking=None, timestamp=0, dns=dns, t_id=-1, request_id=b"",
+                                       fallback_mode=False, use_fallback_cache=False, protocol=None, read_only=True)
+                # an uncommitted write of the running epoch is not visible
+                state.put(key=2, value={"v": 3}, t_id=1, operator_name="test")
+                assert ctx.get() == {"v": 0}
+                assert ctx.get_many([2, 4]) == {2: {"v": 2}, 4: None}
+                assert ctx.scan() == [(0, {"v": 0}), (2, {"v": 2})]
+                assert ctx.data == {0: {"v": 0}, 2: {"v": 2}}
+                # no reservations are taken
+                assert state.reads == {"test": {}}
+                ctx.get()["v"] = 1
+                assert state.get_committed(0, "test") == {"v": 0}
+                for write in (lambda: ctx.put(1), ctx.delete, lambda: ctx.put_many({2: 2}),
+                              lambda: ctx.call_remote_async("test", "f", 2)):
+                    with self.assertRaises(ReadOnlyFunctionWrite):
+                        write()
+                state.commit(set())
+                assert ctx.get_many([2]) == {2: {"v": 3}}
+            log_structured_state.close()
@@ -1,9 +1,11 @@
 import os
+import shutil
 import socket
 import time
 import io
 
 from minio import Minio
+from system_x.common.message_schemas import SnapID
 from system_x.common.message_types import MessageType
 from system_x.common.tcp_networking import NetworkingManager
 
@@ -17,6 +19,7 @@ MINIO_URL: str = f"{os.environ['MINIO_HOST']}:{os.environ['MINIO_PORT']}"
 MINIO_ACCESS_KEY: str = os.environ['MINIO_ROOT_USER']
 MINIO_SECRET_KEY: str = os.environ['MINIO_ROOT_PASSWORD']
 SNAPSHOT_BUCKET_NAME: str = os.getenv('SNAPSHOT_BUCKET_NAME', "system_x-snapshots")
+MANIFEST_SUFFIX: str = ".manifest"
 
 
 class AsyncSnapshotsMinio(BaseSnapshotter):
@@ -41,9 +44,42 @@ class AsyncSnapshotsMinio(BaseSnapshotter):
         snapshot_name: str = f"w{worker_id}/{snapshot_id}.bin"
         minio_client.put_object(SNAPSHOT_BUCKET_NAME, snapshot_name, io.BytesIO(bytes_file), len(bytes_file))
         end = time.time()*1000
-        msg = NetworkingManager.encode_message(msg=(worker_id, snapshot_id, start, end),
+        msg = NetworkingManager.encode_message(msg=SnapID(worker_id, snapshot_id, start, end),
                                                msg_type=MessageType.SnapID,
-                                               serializer=Serializer.MSGPACK)
+                                               serializer=Serializer.SCHEMA)
+
+        s = socket.socket()
+        s.connect((COORDINATOR_HOST, COORDINATOR_PORT))
+        s.send(msg)
+        s.close()
+        return True
+
+    @staticmethod
+    def store_segments_snapshot(snapshot_id: int,
+                                worker_id: str,
+                                staging_dir: str,
+                                staged_segments: dict[str, list[str]],
+                                manifest: dict,
+                                start):
+        """Uploads the sealed segments of the log structured state as they are, followed by the manifest
+        that lists the segments (and metadata) making up this snapshot"""
+        minio_client: Minio = Minio(
+            MINIO_URL, access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY, secure=False
+        )
+        for operator_name, segment_paths in staged_segments.items():
+            for segment_path in segment_paths:
+                minio_client.fput_object(SNAPSHOT_BUCKET_NAME,
+                                         f"w{worker_id}/segments/{operator_name}/{os.path.basename(segment_path)}",
+                                         segment_path)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        bytes_file: bytes = msgpack_serialization(manifest)
+        snapshot_name: str = f"w{worker_id}/{snapshot_id}{MANIFEST_SUFFIX}"
+        minio_client.put_object(SNAPSHOT_BUCKET_NAME, snapshot_name, io.BytesIO(bytes_file), len(bytes_file))
+        end = time.time()*1000
+        msg = NetworkingManager.encode_message(msg=SnapID(worker_id, snapshot_id, start, end),
+                                               msg_type=MessageType.SnapID,
+                                               serializer=Serializer.SCHEMA)
 
         s = socket.socket()
         s.connect((COORDINATOR_HOST, COORDINATOR_PORT))
@@ -82,5 +118,36 @@ class AsyncSnapshotsMinio(BaseSnapshotter):
                     data[operator_name].update(operator_state)
             else:
                 data = loaded_data
+            # the keys deleted in this delta, older snapshots do not have tombstones
+            for operator_name, deleted_keys in deser.get("deletes", {}).items():
+                for key in deleted_keys:
+                    data[operator_name].pop(key, None)
         # The recovered snapshot will have the latest metadata and merged operator state
         return data, metadata
+
+    def retrieve_segments_snapshot(self, snapshot_id, directory: str):
+        """Downloads the segments of the latest manifest up to the given snapshot to the (emptied) state directory"""
+        self.snapshot_id = snapshot_id + 1
+        shutil.rmtree(directory, ignore_errors=True)
+        if snapshot_id == -1:
+            return None
+        minio_client: Minio = Minio(
+            MINIO_URL, access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY, secure=False
+        )
+        manifest_ids: list[int] = [int(sn_file.object_name.split("/")[1][:-len(MANIFEST_SUFFIX)])
+                                   for sn_file in minio_client.list_objects(bucket_name=SNAPSHOT_BUCKET_NAME,
+                                                                            prefix=f"w{self.worker_id}/",
+                                                                            recursive=True)
+                                   if sn_file.object_name.endswith(MANIFEST_SUFFIX)]
+        manifest_ids = [sn_id for sn_id in manifest_ids if sn_id <= snapshot_id]
+        if not manifest_ids:
+            return None
+        manifest_name: str = f"w{self.worker_id}/{max(manifest_ids)}{MANIFEST_SUFFIX}"
+        manifest = msgpack_deserialization(minio_client.get_object(SNAPSHOT_BUCKET_NAME, manifest_name).data)
+        for operator_name, segment_names in manifest["segments"].items():
+            for segment_name in segment_names:
+                minio_client.fget_object(SNAPSHOT_BUCKET_NAME,
+                                         f"w{self.worker_id}/segments/{operator_name}/{segment_name}",
+                                         os.path.join(directory, operator_name, segment_name))
+        return manifest["metadata"]
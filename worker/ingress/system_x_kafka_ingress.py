@@ -1,5 +1,6 @@
 import asyncio
 import uuid
+from typing import Callable
 
 from aiokafka import AIOKafkaConsumer, TopicPartition
 from aiokafka.errors import UnknownTopicOrPartitionError, KafkaConnectionError
@@ -21,13 +22,16 @@ class SysXKafkaIngress(BaseIngress):
                  worker_id: int,
                  kafka_url: str,
                  epoch_interval_ms: int,
-                 sequence_max_size: int):
+                 sequence_max_size: int,
+                 fast_path: Callable[[RunFuncPayload], bool] | None = None):
         self.worker_id = worker_id
         self.sequencer = sequencer
         self.networking = networking
         self.kafka_url = kafka_url
         self.epoch_interval_ms = epoch_interval_ms
         self.sequence_max_size = sequence_max_size
+        # takes over the requests that do not need an epoch, returns whether it did
+        self.fast_path: Callable[[RunFuncPayload], bool] | None = fast_path
 
         self.started: asyncio.Event = asyncio.Event()
 
@@ -62,6 +66,8 @@ class SysXKafkaIngress(BaseIngress):
                                                               operator_name=operator_name, partition=partition,
                                                               function_name=fun_name, kafka_offset=msg.offset,
                                                               params=params)
+            if self.fast_path is not None and self.fast_path(run_func_payload):
+                return
             logging.info(f'SEQ FROM KAFKA: {run_func_payload.function_name} {run_func_payload.key}')
             self.sequencer.sequence(run_func_payload)
         else:
@@ -103,5 +109,8 @@ class SysXKafkaIngress(BaseIngress):
                                 self.handle_message_from_kafka(message)
                     # end_seq = timer()
                     # self.sequencing_time += end_seq - start_seq
+                if self.sequencer.work_available.is_set():
+                    # let the woken up function scheduler take the lock before the next poll
+                    await asyncio.sleep(0)
         finally:
             await self.kafka_consumer.stop()
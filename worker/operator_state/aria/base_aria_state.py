@@ -1,30 +1,81 @@
 import asyncio
 from abc import abstractmethod
+from bisect import bisect_left, insort
 from collections import defaultdict
+from heapq import heappop, heappush
+from typing import Any, Callable, Iterable
 
 from system_x.common.base_state import BaseOperatorState
 
+from worker.operator_state.aria.predicate_index import PredicateIndex, in_range
+from worker.operator_state.aria.rw_set_exchange import decode_accesses, encode_accesses, reordering_aborts
+from worker.operator_state.aria.vectorized_reservations import VectorizedReservations
+
+# Each bisect.insort into the ordered keys shifts the keys after it, a commit that adds more new keys than this sorts
+# them in at once, timsort merges them with the ordered keys in linear time
+INSORT_MAX_KEYS: int = 128
+
 
 class BaseAriaState(BaseOperatorState):
     # read write sets
     # operator_name: {t_id: set(keys)}
     read_sets: dict[str, dict[int, set[any]]]
-    global_read_sets: dict[str, dict[int, set[any]]]
     # operator_name: {t_id: {key: value}}
     write_sets: dict[str, dict[int, dict[any, any]]]
-    global_write_sets: dict[str, dict[int, dict[any, any]]]
-    # the reads and writes with the lowest t_id
+    # the keys of the write sets that are deletes
+    # operator_name: {t_id: set(keys)}
+    delete_sets: dict[str, dict[int, set[any]]]
+    # the reads and writes with the lowest t_id, maintained at insertion time
     # operator_name: {key: t_id}
-    writes: dict[str, dict[any, list[int]]]
+    writes: dict[str, dict[any, int]]
     # operator_name: {key: t_id}
-    reads: dict[str, dict[any, list[int]]]
-    global_reads: dict[str, dict[any, list[int]]]
+    reads: dict[str, dict[any, int]]
+    # the (key hash, t_id) accesses of all the workers for the deterministic reordering, see rw_set_exchange
+    global_reads: bytes
+    global_writes: bytes
+    # the other t_ids that reserved an already reserved key, to hand the reservation over on aborts. A single contender
+    # is kept as is, from the second one on the set holds each t_id once and the heap orders them, dropping the
+    # released ones lazily.
+    # operator_name: {key: t_id | (set(t_id), heap of t_id)}
+    write_contenders: dict[str, dict[any, int | tuple[set[int], list[int]]]]
+    read_contenders: dict[str, dict[any, int | tuple[set[int], list[int]]]]
     # Calvin snapshot things
     # tid: {operator_name: {key, value}}
     fallback_commit_buffer: dict[int, dict[str, dict[any, any]]]
+    # tid: {operator_name: set(keys)}
+    fallback_delete_buffer: dict[int, dict[str, set[any]]]
+    # Scans and index lookups of each transaction, checked against the writes of the epoch for phantoms
+    # operator_name: {t_id: [('range', start, end) | ('index', index_name, index_key)]}
+    predicate_reads: dict[str, dict[int, list[tuple]]]
+    # Declared secondary indexes, maintained at commit time
+    # operator_name: {index_name: function from a value to its index key}
+    indexes: dict[str, dict[str, Callable[[Any], Any]]]
+    # operator_name: {index_name: {index_key: set(keys)}}
+    index_entries: dict[str, dict[str, dict[Any, set[Any]]]]
+    # operator_name: {index_name: {key: index_key}}
+    indexed_keys: dict[str, dict[str, dict[Any, Any]]]
+    # Array backed reservations used instead of reads/writes when vectorized conflict detection is enabled
+    # operator_name: VectorizedReservations
+    access_logs: dict[str, VectorizedReservations]
 
-    def __init__(self, operator_names: set[str]):
+    def __init__(self, operator_names: set[str], vectorized: bool = False):
         super().__init__(operator_names)
+        self.vectorized: bool = vectorized
+        self.access_logs = {operator_name: VectorizedReservations() for operator_name in self.operator_names}
+        # The epoch arena: the per operator reservation state is allocated once and cleared in place every epoch
+        self.write_sets = {operator_name: {} for operator_name in self.operator_names}
+        self.delete_sets = {operator_name: {} for operator_name in self.operator_names}
+        self.writes = {operator_name: {} for operator_name in self.operator_names}
+        self.write_contenders = {operator_name: {} for operator_name in self.operator_names}
+        self.reads = {operator_name: {} for operator_name in self.operator_names}
+        self.read_contenders = {operator_name: {} for operator_name in self.operator_names}
+        self.read_sets = {operator_name: {} for operator_name in self.operator_names}
+        self.predicate_reads = {operator_name: {} for operator_name in self.operator_names}
+        self.fallback_commit_buffer = defaultdict(lambda: defaultdict(dict))
+        self.fallback_delete_buffer = {}
+        self.indexes = {operator_name: {} for operator_name in self.operator_names}
+        self.index_entries = {operator_name: {} for operator_name in self.operator_names}
+        self.indexed_keys = {operator_name: {} for operator_name in self.operator_names}
         self.cleanup()
 
     def put(self, key, value, t_id: int, operator_name: str):
@@ -32,12 +83,24 @@ class BaseAriaState(BaseOperatorState):
             self.write_sets[operator_name][t_id][key] = value
         else:
             self.write_sets[operator_name][t_id] = {key: value}
-        if key in self.writes[operator_name]:
-            self.writes[operator_name][key].append(t_id)
+        if self.vectorized:
+            self.access_logs[operator_name].add(key, t_id, is_write=True)
         else:
-            self.writes[operator_name][key] = [t_id]
+            self.reserve(self.writes[operator_name], self.write_contenders[operator_name], key, t_id)
+        if t_id in self.delete_sets[operator_name]:
+            self.delete_sets[operator_name][t_id].discard(key)
+
+    def delete(self, key, t_id: int, operator_name: str):
+        """A delete is a write of None that removes the key on commit"""
+        self.put(key, None, t_id, operator_name)
+        if t_id in self.delete_sets[operator_name]:
+            self.delete_sets[operator_name][t_id].add(key)
+        else:
+            self.delete_sets[operator_name][t_id] = {key}
 
     def put_immediate(self, key, value, t_id: int, operator_name: str):
+        if t_id in self.fallback_delete_buffer and operator_name in self.fallback_delete_buffer[t_id]:
+            self.fallback_delete_buffer[t_id][operator_name].discard(key)
         if t_id in self.fallback_commit_buffer:
             if operator_name in self.fallback_commit_buffer[t_id]:
                 self.fallback_commit_buffer[t_id][operator_name][key] = value
@@ -46,10 +109,23 @@ class BaseAriaState(BaseOperatorState):
         else:
             self.fallback_commit_buffer[t_id] = {operator_name: {key: value}}
 
-    def set_global_read_write_sets(self, global_read_reservations, global_write_set, global_read_set):
-        self.global_reads = global_read_reservations
-        self.global_write_sets = global_write_set
-        self.global_read_sets = global_read_set
+    def delete_immediate(self, key, t_id: int, operator_name: str):
+        self.put_immediate(key, None, t_id, operator_name)
+        if t_id in self.fallback_delete_buffer:
+            if operator_name in self.fallback_delete_buffer[t_id]:
+                self.fallback_delete_buffer[t_id][operator_name].add(key)
+            else:
+                self.fallback_delete_buffer[t_id][operator_name] = {key}
+        else:
+            self.fallback_delete_buffer[t_id] = {operator_name: {key}}
+
+    def get_compact_rw_sets(self) -> tuple[bytes, bytes]:
+        """The local reads and writes as key hashes and t_ids, without values, for the deterministic reordering"""
+        return encode_accesses(self.read_sets), encode_accesses(self.write_sets)
+
+    def set_global_compact_rw_sets(self, global_reads: bytes, global_writes: bytes):
+        self.global_reads = global_reads
+        self.global_writes = global_writes
 
     @abstractmethod
     def batch_insert(self, kv_pairs: dict, operator_name: str):
@@ -68,22 +144,233 @@ class BaseAriaState(BaseOperatorState):
         raise NotImplementedError
 
     @abstractmethod
-    def delete(self, key, operator_name: str):
+    def get_committed(self, key, operator_name: str):
+        """A private copy of the value of the last committed epoch, for read only functions that take no reservations"""
         raise NotImplementedError
 
     @abstractmethod
     def exists(self, key, operator_name: str):
         raise NotImplementedError
 
+    @abstractmethod
+    def ordered_keys(self, operator_name: str) -> list[Any]:
+        """The committed keys of the operator in key order"""
+        raise NotImplementedError
+
+    @staticmethod
+    def update_ordered_keys(ordered_keys: list[Any], inserted: list[Any], deleted: Iterable[Any]):
+        """Keeps the ordered keys of an operator in key order after the committed inserts and deletes"""
+        for key in deleted:
+            del ordered_keys[bisect_left(ordered_keys, key)]
+        if len(inserted) > INSORT_MAX_KEYS:
+            ordered_keys.extend(inserted)
+            ordered_keys.sort()
+        else:
+            for key in inserted:
+                insort(ordered_keys, key)
+
+    @abstractmethod
+    def committed_items(self, operator_name: str) -> Iterable[tuple[Any, Any]]:
+        raise NotImplementedError
+
+    def scan(self, t_id: int, operator_name: str, start=None, end=None) -> list[tuple[Any, Any]]:
+        """
+        Returns the (key, value) pairs with start <= key < end in key order, as seen by the transaction.
+        Only the returned keys get read reservations, the range itself is checked for phantoms at conflict time.
+        """
+        self.add_predicate_read(t_id, operator_name, ('range', start, end))
+        return self.read_matching(self.keys_in_range(operator_name, start, end), t_id, operator_name,
+                                  ('range', start, end), fallback_mode=False)
+
+    def scan_immediate(self, t_id: int, operator_name: str, start=None, end=None) -> list[tuple[Any, Any]]:
+        return self.read_matching(self.keys_in_range(operator_name, start, end), t_id, operator_name,
+                                  ('range', start, end), fallback_mode=True)
+
+    def lookup(self, t_id: int, operator_name: str, index_name: str, index_key) -> list[tuple[Any, Any]]:
+        """Returns the (key, value) pairs of the partition whose index key is index_key, in key order"""
+        self.add_predicate_read(t_id, operator_name, ('index', index_name, index_key))
+        return self.read_matching(self.index_entries[operator_name][index_name].get(index_key, ()), t_id,
+                                  operator_name, ('index', index_name, index_key), fallback_mode=False)
+
+    def lookup_immediate(self, t_id: int, operator_name: str, index_name: str, index_key) -> list[tuple[Any, Any]]:
+        return self.read_matching(self.index_entries[operator_name][index_name].get(index_key, ()), t_id,
+                                  operator_name, ('index', index_name, index_key), fallback_mode=True)
+
+    def scan_committed(self, operator_name: str, start=None, end=None) -> list[tuple[Any, Any]]:
+        return [(key, self.get_committed(key, operator_name)) for key in self.keys_in_range(operator_name, start, end)]
+
+    def lookup_committed(self, operator_name: str, index_name: str, index_key) -> list[tuple[Any, Any]]:
+        return [(key, self.get_committed(key, operator_name))
+                for key in sorted(self.index_entries[operator_name][index_name].get(index_key, ()))]
+
+    def keys_in_range(self, operator_name: str, start, end) -> list[Any]:
+        keys = self.ordered_keys(operator_name)
+        lo = 0 if start is None else bisect_left(keys, start)
+        hi = len(keys) if end is None else bisect_left(keys, end)
+        return keys[lo:hi]
+
+    def read_matching(self, keys: Iterable[Any], t_id: int, operator_name: str, predicate: tuple,
+                      fallback_mode: bool) -> list[tuple[Any, Any]]:
+        # the transaction's own writes that match the predicate replace the committed values
+        if fallback_mode:
+            own_writes = self.fallback_commit_buffer.get(t_id, {}).get(operator_name, {})
+            own_deletes = self.fallback_delete_buffer.get(t_id, {}).get(operator_name, ())
+        else:
+            own_writes = self.write_sets[operator_name].get(t_id, {})
+            own_deletes = self.delete_sets[operator_name].get(t_id, ())
+        result = {}
+        for key in keys:
+            result[key] = self.get_immediate(key, t_id, operator_name) if fallback_mode \
+                else self.get(key, t_id, operator_name)
+        for key, value in own_writes.items():
+            if key in own_deletes or not self.matches(operator_name, predicate, key, value, after_write=True):
+                result.pop(key, None)
+            else:
+                result[key] = value
+        return sorted(result.items(), key=lambda item: item[0])
+
+    def add_predicate_read(self, t_id: int, operator_name: str, predicate: tuple):
+        if t_id in self.predicate_reads[operator_name]:
+            self.predicate_reads[operator_name][t_id].append(predicate)
+        else:
+            self.predicate_reads[operator_name][t_id] = [predicate]
+
+    def matches(self, operator_name: str, predicate: tuple, key, value, after_write: bool = False) -> bool:
+        """Whether a key matches a scan or index lookup, before or after the given value is written to it"""
+        kind, first, second = predicate
+        if kind == 'range':
+            return in_range(key, first, second)
+        if after_write:
+            return value is not None and self.indexes[operator_name][first](value) == second
+        return self.indexed_keys[operator_name][first].get(key) == second
+
+    def declare_index(self, operator_name: str, index_name: str, extractor: Callable[[Any], Any]):
+        """Declares a secondary index on the values of an operator, extractor returns the index key or None"""
+        self.indexes[operator_name][index_name] = extractor
+        self.index_entries[operator_name][index_name] = {}
+        self.indexed_keys[operator_name][index_name] = {}
+        self.update_indexes(operator_name, dict(self.committed_items(operator_name)), None)
+
+    def update_indexes(self, operator_name: str, updates: dict, deletes: set | None):
+        for index_name, extractor in self.indexes[operator_name].items():
+            entries = self.index_entries[operator_name][index_name]
+            indexed_keys = self.indexed_keys[operator_name][index_name]
+            for key, value in updates.items():
+                old_index_key = indexed_keys.pop(key, None)
+                if old_index_key is not None:
+                    entries[old_index_key].discard(key)
+                    if not entries[old_index_key]:
+                        del entries[old_index_key]
+                if (deletes and key in deletes) or value is None:
+                    continue
+                index_key = extractor(value)
+                if index_key is not None:
+                    indexed_keys[key] = index_key
+                    if index_key in entries:
+                        entries[index_key].add(key)
+                    else:
+                        entries[index_key] = {key}
+
+    def check_predicate_conflicts(self, include_war: bool = False) -> set[int]:
+        """
+        Phantom detection for scans and index lookups, which are always local to the partition.
+        Every written key is matched once against the PredicateIndex of the scans and lookups of the epoch.
+        A scanning transaction conflicts with a smaller t_id that wrote a key matching its predicate (RAW) and,
+        if include_war is set, a writing transaction with a smaller t_id that scanned a predicate it writes into.
+
+        Returns
+        -------
+        set[int]
+            the set of transaction ids to abort
+        """
+        aborted_transactions = set()
+        for operator_name, predicate_reads in self.predicate_reads.items():
+            if not predicate_reads:
+                continue
+            predicate_index = PredicateIndex(predicate_reads)
+            # the index keys are only computed if there are index lookups
+            indexes = self.indexes[operator_name] if predicate_index.index_readers else {}
+            indexed_keys = self.indexed_keys[operator_name]
+            # key: [(writer t_id, value)]
+            key_writers: dict[Any, list[tuple[int, Any]]] = defaultdict(list)
+            for writer_t_id, ws in self.write_sets[operator_name].items():
+                for key, value in ws.items():
+                    key_writers[key].append((writer_t_id, value))
+            for key, writers in key_writers.items():
+                # the scans of the key and the lookups of its committed index keys, whatever the written value
+                key_readers = predicate_index.range_readers(key)
+                for index_name in indexes:
+                    key_readers |= predicate_index.lookup_readers(index_name, indexed_keys[index_name].get(key))
+                for writer_t_id, value in writers:
+                    readers = key_readers
+                    if value is not None:
+                        for index_name, extractor in indexes.items():
+                            readers = readers | predicate_index.lookup_readers(index_name, extractor(value))
+                    for reader_t_id in readers:
+                        if reader_t_id != writer_t_id and (reader_t_id > writer_t_id or include_war):
+                            aborted_transactions.add(max(reader_t_id, writer_t_id))
+        return aborted_transactions
+
     @abstractmethod
     def commit(self, aborted_from_remote: set[int]) -> set[int]:
         raise NotImplementedError
 
+    @staticmethod
+    def reserve(reservations: dict[any, int], contenders: dict[any, int | tuple[set[int], list[int]]], key, t_id: int):
+        reserved_t_id = reservations.get(key)
+        if reserved_t_id is None:
+            reservations[key] = t_id
+            return
+        if t_id == reserved_t_id:
+            return
+        if t_id < reserved_t_id:
+            reservations[key] = t_id
+            t_id = reserved_t_id
+        key_contenders = contenders.get(key)
+        if key_contenders is None:
+            contenders[key] = t_id
+        elif type(key_contenders) is int:
+            if t_id != key_contenders:
+                contenders[key] = ({key_contenders, t_id},
+                                   [key_contenders, t_id] if key_contenders < t_id else [t_id, key_contenders])
+        elif t_id not in key_contenders[0]:
+            key_contenders[0].add(t_id)
+            heappush(key_contenders[1], t_id)
+
+    @staticmethod
+    def release(reservations: dict[any, int], contenders: dict[any, int | tuple[set[int], list[int]]], keys: set[any],
+                t_id: int):
+        """Removes the t_id from the reservations of its keys, the next contender of a key takes the reservation over"""
+        for key in keys:
+            key_contenders = contenders.get(key)
+            if reservations.get(key) != t_id:
+                # a contender of the key
+                if key_contenders == t_id:
+                    del contenders[key]
+                elif type(key_contenders) is tuple:
+                    key_contenders[0].discard(t_id)
+                    if not key_contenders[0]:
+                        del contenders[key]
+            elif key_contenders is None:
+                del reservations[key]
+            elif type(key_contenders) is int:
+                reservations[key] = key_contenders
+                del contenders[key]
+            else:
+                t_ids, heap = key_contenders
+                next_t_id = heappop(heap)
+                while next_t_id not in t_ids:
+                    next_t_id = heappop(heap)
+                reservations[key] = next_t_id
+                t_ids.remove(next_t_id)
+                if not t_ids:
+                    del contenders[key]
+
     def deal_with_reads(self, key, t_id: int, operator_name: str):
-        if key in self.reads[operator_name]:
-            self.reads[operator_name][key].append(t_id)
+        if self.vectorized:
+            self.access_logs[operator_name].add(key, t_id, is_write=False)
         else:
-            self.reads[operator_name][key] = [t_id]
+            self.reserve(self.reads[operator_name], self.read_contenders[operator_name], key, t_id)
         if t_id in self.read_sets[operator_name]:
             self.read_sets[operator_name][t_id].add(key)
         else:
@@ -96,13 +383,6 @@ class BaseAriaState(BaseOperatorState):
                 return True
         return False
 
-    @staticmethod
-    def min_rw_reservations(reservations: dict[str, dict[any, list[int]]]) -> dict[str, dict[any, int]]:
-        new__reservations = {}
-        for operator_name, reservation in reservations.items():
-            new__reservations[operator_name] = {key: min(t_ids) for key, t_ids in reservation.items() if t_ids}
-        return new__reservations
-
     def check_conflicts(self) -> set[int]:
         """Checks for conflicts based on Arias default method
 
@@ -111,8 +391,10 @@ class BaseAriaState(BaseOperatorState):
         set[int]
             the set of transaction ids to abort
         """
-        aborted_transactions = set()
-        minimized_writes = self.min_rw_reservations(self.writes)
+        aborted_transactions = self.check_predicate_conflicts()
+        if self.vectorized:
+            return aborted_transactions | {t_id for access_log in self.access_logs.values()
+                                           for t_id in access_log.check_conflicts().tolist()}
         for operator_name, write_set in self.write_sets.items():
             read_set = self.read_sets[operator_name]
             t_ids: set[int] = set(read_set.keys()).union(set(write_set.keys()))
@@ -120,7 +402,7 @@ class BaseAriaState(BaseOperatorState):
                 rs = read_set.get(t_id, set())
                 ws = write_set.get(t_id, dict())
                 read_write_set = rs.union(ws)
-                if self.has_conflicts(t_id, read_write_set, minimized_writes[operator_name]):
+                if self.has_conflicts(t_id, read_write_set, self.writes[operator_name]):
                     aborted_transactions.add(t_id)
         return aborted_transactions
 
@@ -132,26 +414,17 @@ class BaseAriaState(BaseOperatorState):
         set[int]
             the set of transaction ids to abort
         """
-        aborted_transactions = set()
-        merged_reads = self.min_rw_reservations(self.global_reads)
-        minimized_writes = self.min_rw_reservations(self.writes)
+        # the reordering needs both sides of a dependency, which for phantoms are only known locally
+        aborted_transactions = self.check_predicate_conflicts(include_war=True)
+        global_aborts = reordering_aborts(decode_accesses(self.global_reads), decode_accesses(self.global_writes))
+        if global_aborts.size == 0:
+            return aborted_transactions
+        # only report the local transactions, the other workers report theirs
+        local_t_ids = set()
         for operator_name in self.write_sets.keys():
-            write_set = self.global_write_sets[operator_name]
-            read_set = self.global_read_sets[operator_name]
-            t_ids: set[int] = set(self.write_sets[operator_name].keys()) | set(self.read_sets[operator_name].keys())
-            for t_id in t_ids:
-                ws = write_set.get(t_id, set())
-                waw = self.has_conflicts(t_id, ws, minimized_writes[operator_name])
-                if waw:
-                    aborted_transactions.add(t_id)
-                    continue
-                war = self.has_conflicts(t_id, ws, merged_reads[operator_name])
-                rs = read_set.get(t_id, set())
-                raw = self.has_conflicts(t_id, rs, minimized_writes[operator_name])
-                if not war or not raw:
-                    continue
-                aborted_transactions.add(t_id)
-        return aborted_transactions
+            local_t_ids.update(self.write_sets[operator_name].keys())
+            local_t_ids.update(self.read_sets[operator_name].keys())
+        return aborted_transactions | local_t_ids.intersection(global_aborts.tolist())
 
     def check_conflicts_snapshot_isolation(self) -> set[int]:
         """Checks for conflicts based only on write-after-write dependencies leading to snapshot isolation
@@ -161,83 +434,118 @@ class BaseAriaState(BaseOperatorState):
         set[int]
             the set of transaction ids to abort
         """
+        if self.vectorized:
+            return {t_id for access_log in self.access_logs.values()
+                    for t_id in access_log.check_conflicts_snapshot_isolation().tolist()}
         aborted_transactions = set()
-        minimized_writes = self.min_rw_reservations(self.writes)
         for operator_name in self.write_sets.keys():
             t_ids: set[int] = set(self.write_sets[operator_name].keys())
             for t_id in t_ids:
                 ws = self.write_sets[operator_name].get(t_id, set())
-                waw = self.has_conflicts(t_id, ws, minimized_writes[operator_name])
+                waw = self.has_conflicts(t_id, ws, self.writes[operator_name])
                 if waw:
                     aborted_transactions.add(t_id)
         return aborted_transactions
 
     def cleanup(self):
-        self.write_sets = {operator_name: {} for operator_name in self.operator_names}
-        self.writes = {operator_name: {} for operator_name in self.operator_names}
-        self.reads = {operator_name: {} for operator_name in self.operator_names}
-        self.read_sets = {operator_name: {} for operator_name in self.operator_names}
-        self.global_write_sets = {operator_name: {} for operator_name in self.operator_names}
-        self.global_reads = {operator_name: {} for operator_name in self.operator_names}
-        self.global_read_sets = {operator_name: {} for operator_name in self.operator_names}
-        self.fallback_commit_buffer = defaultdict(lambda: defaultdict(dict))
+        for operator_name in self.operator_names:
+            self.write_sets[operator_name].clear()
+            self.delete_sets[operator_name].clear()
+            self.writes[operator_name].clear()
+            self.write_contenders[operator_name].clear()
+            self.reads[operator_name].clear()
+            self.read_contenders[operator_name].clear()
+            self.read_sets[operator_name].clear()
+            self.predicate_reads[operator_name].clear()
+        self.global_reads = b''
+        self.global_writes = b''
         self.fallback_commit_buffer.clear()
+        self.fallback_delete_buffer.clear()
+        for access_log in self.access_logs.values():
+            access_log.clear()
 
     def get_dep_transactions(self,
                              t_ids_to_reschedule: set[int]) -> tuple[dict[int, set[int]], dict[int, asyncio.Event]]:
         """
         Returns a dict[int, set[int]] where key is the t_id and the value is a set of the transaction ids it depends on.
+        Only the immediate predecessors per key are kept, the rest of the order follows transitively.
         """
         tid_locks = {tid: asyncio.Event() for tid in t_ids_to_reschedule}
         t_id_dependencies: dict[int, set[int]] = defaultdict(set)
 
-        # Combine reads and writes for faster processing
-        combined_accesses = defaultdict(lambda: defaultdict(list))
-        for operator_name, reservations in self.reads.items():
-            for key, t_ids in reservations.items():
-                combined_accesses[operator_name][key].extend(t_ids)
-        for operator_name, reservations in self.writes.items():
-            for key, t_ids in reservations.items():
-                combined_accesses[operator_name][key].extend(t_ids)
-
-        # Preprocess combined accesses
-        for operator_name, access_dict in combined_accesses.items():
-            for t_ids in access_dict.values():
-                valid_t_ids_accessed_key = t_ids_to_reschedule & set(t_ids)
-                for t_id in valid_t_ids_accessed_key:
-                    # Ensure smaller t_ids do not depend on larger ones
-                    smaller_t_ids = {tid for tid in valid_t_ids_accessed_key if tid < t_id}
-                    t_id_dependencies[t_id].update(smaller_t_ids)
+        for operator_name in self.operator_names:
+            read_set = self.read_sets[operator_name]
+            write_set = self.write_sets[operator_name]
+            # Combine the reads and writes of the rescheduled transactions per key
+            # key: {t_id: is_write}
+            key_accessors: dict[any, dict[int, bool]] = defaultdict(dict)
+            for t_id in t_ids_to_reschedule:
+                for key in read_set.get(t_id, ()):
+                    key_accessors[key][t_id] = False
+                for key in write_set.get(t_id, ()):
+                    key_accessors[key][t_id] = True
+            for accessors in key_accessors.values():
+                if len(accessors) > 1:
+                    self.add_predecessor_edges(sorted(accessors.items()), t_id_dependencies)
+            # a scan or index lookup is ordered with the rescheduled writes into it, like a read of a key
+            for reader_t_id, predicates in self.predicate_reads[operator_name].items():
+                if reader_t_id not in t_ids_to_reschedule:
+                    continue
+                for predicate in predicates:
+                    accessors = {t_id: True for t_id in t_ids_to_reschedule
+                                 if t_id != reader_t_id and
+                                 any(self.matches(operator_name, predicate, key, value) or
+                                     self.matches(operator_name, predicate, key, value, after_write=True)
+                                     for key, value in write_set.get(t_id, {}).items())}
+                    if accessors:
+                        accessors[reader_t_id] = False
+                        self.add_predecessor_edges(sorted(accessors.items()), t_id_dependencies)
 
         return t_id_dependencies, tid_locks
 
+    @staticmethod
+    def add_predecessor_edges(accessors: list[tuple[int, bool]], t_id_dependencies: dict[int, set[int]]):
+        """
+        Makes every accessor of a key, sorted by t_id, wait for its immediate predecessors.
+        A write waits for the reads since the previous write or else for the previous write,
+        a read waits for the previous write. Reads of the same key do not wait for each other.
+        """
+        last_write: int | None = None
+        reads_since_last_write: list[int] = []
+        for t_id, is_write in accessors:
+            if is_write:
+                if reads_since_last_write:
+                    t_id_dependencies[t_id].update(reads_since_last_write)
+                    reads_since_last_write = []
+                elif last_write is not None:
+                    t_id_dependencies[t_id].add(last_write)
+                last_write = t_id
+            else:
+                if last_write is not None:
+                    t_id_dependencies[t_id].add(last_write)
+                reads_since_last_write.append(t_id)
+
     def remove_aborted_from_rw_sets(self, global_logic_aborts: set[int]):
         """
         Here we delete the t_ids of the aborted transactions from the rw sets and reservations as if they never existed.
+        The work done is proportional to the read/write sets of the aborted transactions.
         """
         if not global_logic_aborts:
             return
 
-        # Remove aborted t_ids from read_sets and write_sets
-        self.read_sets = {
-            operator_name: {tid: value for tid, value in self.read_sets[operator_name].items()
-                            if tid not in global_logic_aborts}
-            for operator_name in self.operator_names
-        }
-        self.write_sets = {
-            operator_name: {tid: value for tid, value in self.write_sets[operator_name].items()
-                            if tid not in global_logic_aborts}
-            for operator_name in self.operator_names
-        }
-
-        # Update reads and writes dictionaries
-        self.reads = {
-            operator_name: {key: [tid for tid in t_ids if tid not in global_logic_aborts]
-                            for key, t_ids in self.reads[operator_name].items()}
-            for operator_name in self.operator_names
-        }
-        self.writes = {
-            operator_name: {key: [tid for tid in t_ids if tid not in global_logic_aborts]
-                            for key, t_ids in self.writes[operator_name].items()}
-            for operator_name in self.operator_names
-        }
+        if self.vectorized:
+            for access_log in self.access_logs.values():
+                access_log.remove_t_ids(global_logic_aborts)
+
+        for operator_name in self.operator_names:
+            for t_id in global_logic_aborts:
+                read_set = self.read_sets[operator_name].pop(t_id, None)
+                write_set = self.write_sets[operator_name].pop(t_id, None)
+                self.delete_sets[operator_name].pop(t_id, None)
+                self.predicate_reads[operator_name].pop(t_id, None)
+                if self.vectorized:
+                    continue
+                if read_set:
+                    self.release(self.reads[operator_name], self.read_contenders[operator_name], read_set, t_id)
+                if write_set:
+                    self.release(self.writes[operator_name], self.write_contenders[operator_name], write_set, t_id)
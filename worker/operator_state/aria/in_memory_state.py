@@ -4,36 +4,118 @@ from msgspec import msgpack
 
 from worker.operator_state.aria.base_aria_state import BaseAriaState
 
+# Values of these types cannot be mutated by a function, so they are safe to return without a copy
+IMMUTABLE_VALUE_TYPES: tuple[type, ...] = (int, float, str, bytes, bool, type(None))
+# Read cache marker of flat dicts and lists, for which a shallow copy is already a private copy
+SHALLOW_COPY: bytes = b''
+
+
+def is_flat(value: Any) -> bool:
+    if isinstance(value, dict):
+        return all(isinstance(v, IMMUTABLE_VALUE_TYPES) for v in value.values())
+    if isinstance(value, list):
+        return all(isinstance(v, IMMUTABLE_VALUE_TYPES) for v in value)
+    return False
+
 
 class InMemoryOperatorState(BaseAriaState):
 
     data: dict[str, dict[Any, Any]]
-
-    def __init__(self, operator_names: set[str]):
-        super().__init__(operator_names)
+    # Copy on write reads: how to copy each committed mutable value, either its msgpack encoding or SHALLOW_COPY
+    # operator_name: {key: encoded value | SHALLOW_COPY}
+    read_cache: dict[str, dict[Any, bytes]]
+    # The keys deleted since the last snapshot, the delta_map counterpart of deletes
+    # operator_name: set(keys)
+    tombstones: dict[str, set[Any]]
+    # The committed keys in key order for scans, built on the first scan and kept in order by the commits
+    # operator_name: [keys] | None
+    sorted_keys: dict[str, list[Any] | None]
+
+    def __init__(self, operator_names: set[str], vectorized: bool = False, copy_on_write_reads: bool = False):
+        super().__init__(operator_names, vectorized)
+        self.copy_on_write_reads: bool = copy_on_write_reads
         self.data = {}
         self.delta_map = {}
+        self.read_cache = {}
+        self.tombstones = {}
+        self.sorted_keys = {}
         for operator_name in self.operator_names:
             self.data[operator_name] = {}
             self.delta_map[operator_name] = {}
+            self.read_cache[operator_name] = {}
+            self.tombstones[operator_name] = set()
+            self.sorted_keys[operator_name] = None
 
     def set_data_from_snapshot(self, data: dict[str, dict[Any, Any]]):
         if data:
             self.data = data
+            for operator_name in self.operator_names:
+                self.read_cache[operator_name] = {}
+                self.sorted_keys[operator_name] = None
+                for index_name, extractor in self.indexes[operator_name].items():
+                    self.declare_index(operator_name, index_name, extractor)
+
+    def private_copy(self, key, value, operator_name: str) -> Any:
+        """Returns a copy of a committed value that the calling function is free to mutate.
+
+        Immutable values are shared as they are. In copy on write mode the way to copy a mutable value is decided
+        once after it gets committed: flat containers are shallow copied and nested ones are encoded once, so that
+        every read only pays for decoding them.
+        """
+        if isinstance(value, IMMUTABLE_VALUE_TYPES):
+            return value
+        if not self.copy_on_write_reads:
+            return msgpack.decode(msgpack.encode(value))
+        cached = self.read_cache[operator_name].get(key)
+        if cached is None:
+            cached = SHALLOW_COPY if is_flat(value) else msgpack.encode(value)
+            self.read_cache[operator_name][key] = cached
+        if cached == SHALLOW_COPY:
+            return value.copy()
+        return msgpack.decode(cached)
+
+    def invalidate_read_cache(self, keys, operator_name: str):
+        if self.copy_on_write_reads:
+            read_cache = self.read_cache[operator_name]
+            for key in keys:
+                read_cache.pop(key, None)
 
     def get_data_for_snapshot(self):
         return self.delta_map
 
+    def get_deletes_for_snapshot(self):
+        return self.tombstones
+
     def clear_delta_map(self):
         for operator_name in self.operator_names:
             self.delta_map[operator_name] = {}
+            self.tombstones[operator_name] = set()
+
+    def apply_updates(self, updates: dict, deletes: set, operator_name: str):
+        """Applies committed writes to the data and the delta map, the deleted keys are dropped from both"""
+        data = self.data[operator_name]
+        if self.sorted_keys[operator_name] is not None:
+            self.update_ordered_keys(self.sorted_keys[operator_name],
+                                     [key for key in updates if key not in data and not (deletes and key in deletes)],
+                                     [key for key in deletes if key in data] if deletes else ())
+        self.update_indexes(operator_name, updates, deletes)
+        data.update(updates)
+        self.delta_map[operator_name].update(updates)
+        tombstones = self.tombstones[operator_name]
+        if tombstones:
+            tombstones.difference_update(updates.keys())
+        if deletes:
+            for key in deletes:
+                data.pop(key, None)
+                self.delta_map[operator_name].pop(key, None)
+            tombstones.update(deletes)
+        self.invalidate_read_cache(updates.keys(), operator_name)
 
     def commit_fallback_transaction(self, t_id: int):
         if t_id in self.fallback_commit_buffer:
+            deletes = self.fallback_delete_buffer.get(t_id, {})
             for operator_name, kv_pairs in self.fallback_commit_buffer[t_id].items():
-                for key, value in kv_pairs.items():
-                    self.data[operator_name][key] = value
-                    self.delta_map[operator_name][key] = value
+                self.apply_updates(kv_pairs, deletes.get(operator_name), operator_name)
 
     def get_all(self, t_id: int, operator_name: str):
         for key in self.data[operator_name].keys():
@@ -41,36 +123,45 @@ class InMemoryOperatorState(BaseAriaState):
         return self.data[operator_name]
 
     def batch_insert(self, kv_pairs: dict, operator_name: str):
-        self.data[operator_name].update(kv_pairs)
-        self.delta_map[operator_name].update(kv_pairs)
+        self.apply_updates(kv_pairs, set(), operator_name)
 
     def get(self, key, t_id: int, operator_name: str) -> Any:
         self.deal_with_reads(key, t_id, operator_name)
         # if transaction wrote to this key, read from the write set
         if t_id in self.write_sets[operator_name] and key in self.write_sets[operator_name][t_id]:
             return self.write_sets[operator_name][t_id][key]
-        return msgpack.decode(msgpack.encode(self.data[operator_name].get(key)))
+        return self.private_copy(key, self.data[operator_name].get(key), operator_name)
 
     def get_immediate(self, key, t_id: int, operator_name: str):
         if key in self.fallback_commit_buffer[t_id][operator_name]:
             return self.fallback_commit_buffer[t_id][operator_name][key]
-        return msgpack.decode(msgpack.encode(self.data[operator_name].get(key)))
+        return self.get_committed(key, operator_name)
 
-    def delete(self, key, operator_name: str):
-        # Need to find a way to implement deletes
-        pass
+    def get_committed(self, key, operator_name: str):
+        return self.private_copy(key, self.data[operator_name].get(key), operator_name)
 
     def exists(self, key, operator_name: str):
         return key in self.data[operator_name]
 
+    def ordered_keys(self, operator_name: str) -> list[Any]:
+        if self.sorted_keys[operator_name] is None:
+            self.sorted_keys[operator_name] = sorted(self.data[operator_name].keys())
+        return self.sorted_keys[operator_name]
+
+    def committed_items(self, operator_name: str):
+        return self.data[operator_name].items()
+
     def commit(self, aborted_from_remote: set[int]) -> set[int]:
         committed_t_ids = set()
         for operator_name in self.write_sets.keys():
             updates_to_commit = {}
+            deletes_to_commit = set()
+            delete_sets = self.delete_sets[operator_name]
             for t_id, ws in self.write_sets[operator_name].items():
                 if t_id not in aborted_from_remote:
                     updates_to_commit.update(ws)
+                    if t_id in delete_sets:
+                        deletes_to_commit.update(delete_sets[t_id])
                     committed_t_ids.add(t_id)
-            self.data[operator_name].update(updates_to_commit)
-            self.delta_map[operator_name].update(updates_to_commit)
+            self.apply_updates(updates_to_commit, deletes_to_commit, operator_name)
         return committed_t_ids
@@ -0,0 +1,296 @@
+import mmap
+import os
+import struct
+from typing import Any, Iterator
+
+from msgspec import msgpack
+
+# key length, value length, is tombstone
+RECORD_HEADER = struct.Struct('<IIB')
+SEGMENT_SUFFIX: str = '.seg'
+
+
+def segment_name(segment_id: int) -> str:
+    return f"{segment_id:010d}{SEGMENT_SUFFIX}"
+
+
+def encode_record(encoded_key: bytes, encoded_value: bytes, is_tombstone: bool = False) -> bytes:
+    return RECORD_HEADER.pack(len(encoded_key), len(encoded_value), is_tombstone) + encoded_key + encoded_value
+
+
+class Segment(object):
+    """A single file of the log, memory mapped.
+
+    The active segment is pre-allocated to its capacity and written through the mapping, sealing it truncates
+    the file to the written records and maps it read only. Sealed segments are never modified again.
+    """
+
+    def __init__(self, segment_id: int, path: str, capacity: int | None = None):
+        self.segment_id: int = segment_id
+        self.path: str = path
+        # bytes of records that are overwritten, deleted or tombstones
+        self.dead: int = 0
+        self.sealed: bool = capacity is None
+        if self.sealed:
+            self._file = open(path, 'rb')
+            self.size: int = os.fstat(self._file.fileno()).st_size
+            self._mmap: mmap.mmap | None = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+                if self.size else None
+        else:
+            self._file = open(path, 'w+b')
+            self._file.truncate(capacity)
+            self.size: int = 0
+            self._mmap: mmap.mmap | None = mmap.mmap(self._file.fileno(), capacity)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def capacity(self) -> int:
+        return self.size if self.sealed else len(self._mmap)
+
+    def fits(self, n_bytes: int) -> bool:
+        return not self.sealed and self.size + n_bytes <= len(self._mmap)
+
+    def append(self, record: bytes) -> int:
+        offset = self.size
+        self._mmap[offset:offset + len(record)] = record
+        self.size += len(record)
+        return offset
+
+    def read(self, offset: int, length: int) -> memoryview:
+        return memoryview(self._mmap)[offset:offset + length]
+
+    @property
+    def dead_ratio(self) -> float:
+        return self.dead / self.size if self.size else 1.0
+
+    def records(self, start: int = 0) -> Iterator[tuple[Any, int, int, bool, int]]:
+        """
+        Yields (key, value offset, value length, is tombstone, record length) in the order they were written,
+        from the record at the start offset on
+        """
+        offset = start
+        while offset < self.size:
+            key_length, value_length, is_tombstone = RECORD_HEADER.unpack_from(self._mmap, offset)
+            if key_length == 0:
+                # the pre-allocated tail of a segment that was not sealed
+                break
+            key_offset = offset + RECORD_HEADER.size
+            value_offset = key_offset + key_length
+            key = msgpack.decode(self._mmap[key_offset:value_offset])
+            record_length = RECORD_HEADER.size + key_length + value_length
+            yield key, value_offset, value_length, bool(is_tombstone), record_length
+            offset += record_length
+
+    def seal(self):
+        if self.sealed:
+            return
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(self.size)
+        self._file.close()
+        self.sealed = True
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def remove(self):
+        self.close()
+        os.remove(self.path)
+
+
+class LogStore(object):
+    """Append only store of encoded values in memory mapped segment files with an in memory key index.
+
+    Every put or delete appends a record to the active segment and points the index to it, the records it
+    replaces become garbage. Compaction rewrites the live records of the sealed segment with the most garbage at the
+    head of the log and removes it, a step at a time so that a commit only copies a bounded number of bytes. The
+    tombstones of the oldest segment are dropped since there are no older segments left, the ones of a newer
+    segment are rewritten while their key stays deleted.
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, compaction_threshold: float = 0.5,
+                 compaction_step_bytes: int = 256 * 1024):
+        self.directory: str = directory
+        self.segment_size: int = segment_size
+        self.compaction_threshold: float = compaction_threshold
+        # the bytes of records a compaction step reads before it stops for the epoch
+        self.compaction_step_bytes: int = compaction_step_bytes
+        # the segment being compacted and the offset of its next record
+        self.compacting: Segment | None = None
+        self.compaction_offset: int = 0
+        os.makedirs(directory, exist_ok=True)
+        # key: (segment_id, value offset, value length, record length)
+        self.index: dict[Any, tuple[int, int, int, int]] = {}
+        # segment_id: Segment in log order
+        self.segments: dict[int, Segment] = {}
+        self.active: Segment | None = None
+        # the sealed segments that have not been handed to a snapshot yet
+        self.unshipped: list[int] = []
+        self.next_segment_id: int = 0
+        self.live_bytes: int = 0
+        self.dead_bytes: int = 0
+        self._load()
+
+    def _load(self):
+        segment_ids = sorted(int(file_name[:-len(SEGMENT_SUFFIX)]) for file_name in os.listdir(self.directory)
+                             if file_name.endswith(SEGMENT_SUFFIX))
+        for segment_id in segment_ids:
+            segment = Segment(segment_id, os.path.join(self.directory, segment_name(segment_id)))
+            self.segments[segment_id] = segment
+            for key, value_offset, value_length, is_tombstone, record_length in segment.records():
+                self._mark_dead(key)
+                if is_tombstone:
+                    self.index.pop(key, None)
+                    segment.dead += record_length
+                    self.dead_bytes += record_length
+                else:
+                    self.index[key] = (segment_id, value_offset, value_length, record_length)
+                    self.live_bytes += record_length
+        if segment_ids:
+            self.next_segment_id = segment_ids[-1] + 1
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    @property
+    def garbage_ratio(self) -> float:
+        total_bytes = self.live_bytes + self.dead_bytes
+        return self.dead_bytes / total_bytes if total_bytes else 0.0
+
+    def get(self, key) -> Any:
+        location = self.index.get(key)
+        if location is None:
+            return None
+        segment_id, value_offset, value_length, _ = location
+        return msgpack.decode(self.segments[segment_id].read(value_offset, value_length))
+
+    def put(self, key, value):
+        encoded_key = msgpack.encode(key)
+        self._append(key, encoded_key, msgpack.encode(value))
+
+    def put_many(self, kv_pairs: dict):
+        for key, value in kv_pairs.items():
+            self.put(key, value)
+
+    def delete(self, key):
+        if key not in self.index:
+            return
+        self._mark_dead(key)
+        del self.index[key]
+        self._append_tombstone(msgpack.encode(key))
+
+    def _append_tombstone(self, encoded_key: bytes):
+        record = encode_record(encoded_key, b'', is_tombstone=True)
+        segment = self._segment_for(len(record))
+        segment.append(record)
+        segment.dead += len(record)
+        self.dead_bytes += len(record)
+
+    def _append(self, key, encoded_key: bytes, encoded_value: bytes):
+        record = encode_record(encoded_key, encoded_value)
+        segment = self._segment_for(len(record))
+        offset = segment.append(record)
+        self._mark_dead(key)
+        self.index[key] = (segment.segment_id, offset + RECORD_HEADER.size + len(encoded_key), len(encoded_value),
+                           len(record))
+        self.live_bytes += len(record)
+
+    def _mark_dead(self, key):
+        location = self.index.get(key)
+        if location is not None:
+            segment_id, _, _, record_length = location
+            self.segments[segment_id].dead += record_length
+            self.live_bytes -= record_length
+            self.dead_bytes += record_length
+
+    def _segment_for(self, n_bytes: int) -> Segment:
+        if self.active is None or not self.active.fits(n_bytes):
+            self.seal()
+            segment_id = self.next_segment_id
+            self.next_segment_id += 1
+            self.active = Segment(segment_id,
+                                  os.path.join(self.directory, segment_name(segment_id)),
+                                  capacity=max(self.segment_size, n_bytes))
+            self.segments[segment_id] = self.active
+        return self.active
+
+    def seal(self):
+        """Seals the active segment, the next write starts a new one"""
+        if self.active is not None:
+            self.active.seal()
+            self.unshipped.append(self.active.segment_id)
+            self.active = None
+
+    def take_unshipped(self) -> list[Segment]:
+        """Seals the active segment and returns the sealed segments that no snapshot has shipped yet"""
+        self.seal()
+        unshipped = [self.segments[segment_id] for segment_id in self.unshipped]
+        self.unshipped = []
+        return unshipped
+
+    def segment_names(self) -> list[str]:
+        return [segment.name for segment in self.segments.values()]
+
+    def compact_step(self) -> bool:
+        """
+        Rewrites the live records of up to compaction_step_bytes of a sealed segment whose garbage exceeds the
+        threshold at the head of the log, the segment is removed once all of its records are read.
+
+        Returns
+        -------
+        bool
+            whether a segment was removed
+        """
+        if self.compacting is None:
+            candidates = [segment for segment in self.segments.values()
+                          if segment.sealed and segment.dead_ratio > self.compaction_threshold]
+            if not candidates:
+                return False
+            self.compacting = max(candidates, key=lambda segment: segment.dead_ratio)
+            self.compaction_offset = 0
+        segment = self.compacting
+        is_oldest = next(iter(self.segments)) == segment.segment_id
+        end = min(segment.size, self.compaction_offset + self.compaction_step_bytes)
+        for key, value_offset, value_length, is_tombstone, record_length in segment.records(self.compaction_offset):
+            key_offset = value_offset - (record_length - RECORD_HEADER.size - value_length)
+            if is_tombstone:
+                # an older segment may still hold a record of the deleted key
+                if not is_oldest and key not in self.index:
+                    self._append_tombstone(bytes(segment.read(key_offset, value_offset - key_offset)))
+            elif self.index.get(key) == (segment.segment_id, value_offset, value_length, record_length):
+                self._append(key, bytes(segment.read(key_offset, value_offset - key_offset)),
+                             bytes(segment.read(value_offset, value_length)))
+            self.compaction_offset = value_offset + value_length
+            if self.compaction_offset >= end:
+                break
+        else:
+            # the pre-allocated tail of a segment that was not sealed holds no records
+            self.compaction_offset = segment.size
+        if self.compaction_offset < segment.size:
+            return False
+        self.compacting = None
+        self.dead_bytes -= segment.dead
+        del self.segments[segment.segment_id]
+        if segment.segment_id in self.unshipped:
+            self.unshipped.remove(segment.segment_id)
+        segment.remove()
+        return True
+
+    def close(self):
+        self.seal()
+        for segment in self.segments.values():
+            segment.close()
@@ -0,0 +1,136 @@
+import os
+from typing import Any
+
+from worker.operator_state.aria.base_aria_state import BaseAriaState
+from worker.operator_state.aria.log_store import LogStore
+
+STAGING_DIR_NAME: str = "staged"
+
+
+class LogStructuredOperatorState(BaseAriaState):
+    """Aria operator state that keeps the committed values encoded in memory mapped segment files.
+
+    Only the keys and the location of their latest value are kept in memory, the values are decoded on every read
+    which also gives the function a private copy. The read/write sets and conflict detection are the ones of
+    BaseAriaState, only committed values reach the log.
+    """
+
+    # operator_name: LogStore
+    stores: dict[str, LogStore]
+    # The committed keys in key order for scans, built on the first scan and kept in order by the commits
+    # operator_name: [keys] | None
+    sorted_keys: dict[str, list[Any] | None]
+
+    def __init__(self,
+                 operator_names: set[str],
+                 directory: str,
+                 segment_size: int = 64 * 1024 * 1024,
+                 compaction_threshold: float = 0.5,
+                 compaction_step_bytes: int = 256 * 1024,
+                 vectorized: bool = False):
+        super().__init__(operator_names, vectorized)
+        self.directory: str = directory
+        self.stores = {operator_name: LogStore(os.path.join(directory, operator_name),
+                                               segment_size=segment_size,
+                                               compaction_threshold=compaction_threshold,
+                                               compaction_step_bytes=compaction_step_bytes)
+                       for operator_name in self.operator_names}
+        self.sorted_keys = {operator_name: None for operator_name in self.operator_names}
+
+    def get_all(self, t_id: int, operator_name: str):
+        store = self.stores[operator_name]
+        for key in store.keys():
+            self.deal_with_reads(key, t_id, operator_name)
+        return {key: store.get(key) for key in store.keys()}
+
+    def batch_insert(self, kv_pairs: dict, operator_name: str):
+        self.apply_updates(kv_pairs, None, operator_name)
+
+    def get(self, key, t_id: int, operator_name: str) -> Any:
+        self.deal_with_reads(key, t_id, operator_name)
+        # if transaction wrote to this key, read from the write set
+        if t_id in self.write_sets[operator_name] and key in self.write_sets[operator_name][t_id]:
+            return self.write_sets[operator_name][t_id][key]
+        return self.stores[operator_name].get(key)
+
+    def get_immediate(self, key, t_id: int, operator_name: str):
+        if key in self.fallback_commit_buffer[t_id][operator_name]:
+            return self.fallback_commit_buffer[t_id][operator_name][key]
+        return self.stores[operator_name].get(key)
+
+    def get_committed(self, key, operator_name: str):
+        return self.stores[operator_name].get(key)
+
+    def exists(self, key, operator_name: str):
+        return key in self.stores[operator_name]
+
+    def ordered_keys(self, operator_name: str) -> list[Any]:
+        if self.sorted_keys[operator_name] is None:
+            self.sorted_keys[operator_name] = sorted(self.stores[operator_name].keys())
+        return self.sorted_keys[operator_name]
+
+    def committed_items(self, operator_name: str):
+        store = self.stores[operator_name]
+        return ((key, store.get(key)) for key in store.keys())
+
+    def apply_updates(self, updates: dict, deletes: set | None, operator_name: str):
+        store = self.stores[operator_name]
+        if self.sorted_keys[operator_name] is not None:
+            self.update_ordered_keys(self.sorted_keys[operator_name],
+                                     [key for key in updates if key not in store and not (deletes and key in deletes)],
+                                     [key for key in updates if deletes and key in deletes and key in store])
+        self.update_indexes(operator_name, updates, deletes)
+        for key, value in updates.items():
+            if deletes and key in deletes:
+                store.delete(key)
+            else:
+                store.put(key, value)
+
+    def commit_fallback_transaction(self, t_id: int):
+        if t_id in self.fallback_commit_buffer:
+            deletes = self.fallback_delete_buffer.get(t_id, {})
+            for operator_name, kv_pairs in self.fallback_commit_buffer[t_id].items():
+                self.apply_updates(kv_pairs, deletes.get(operator_name), operator_name)
+
+    def commit(self, aborted_from_remote: set[int]) -> set[int]:
+        committed_t_ids = set()
+        for operator_name in self.write_sets.keys():
+            delete_sets = self.delete_sets[operator_name]
+            for t_id, ws in self.write_sets[operator_name].items():
+                if t_id not in aborted_from_remote:
+                    self.apply_updates(ws, delete_sets.get(t_id), operator_name)
+                    committed_t_ids.add(t_id)
+            # Compact at most compaction_step_bytes of a segment per epoch to bound the extra work
+            self.stores[operator_name].compact_step()
+        return committed_t_ids
+
+    def stage_segments_for_snapshot(self, snapshot_id: int) -> dict[str, list[str]]:
+        """
+        Seals the active segments and hard links the ones not shipped yet to a staging directory,
+        so that the upload is not affected by a compaction removing them in the meantime.
+
+        Returns
+        -------
+        dict[str, list[str]]
+            the staged segment paths per operator
+        """
+        staged: dict[str, list[str]] = {}
+        for operator_name, store in self.stores.items():
+            staging_dir = os.path.join(self.staging_dir(snapshot_id), operator_name)
+            os.makedirs(staging_dir, exist_ok=True)
+            staged[operator_name] = []
+            for segment in store.take_unshipped():
+                staged_path = os.path.join(staging_dir, segment.name)
+                os.link(segment.path, staged_path)
+                staged[operator_name].append(staged_path)
+        return staged
+
+    def get_segment_manifest(self) -> dict[str, list[str]]:
+        return {operator_name: store.segment_names() for operator_name, store in self.stores.items()}
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
+
+    def staging_dir(self, snapshot_id: int) -> str:
+        return os.path.join(self.directory, STAGING_DIR_NAME, str(snapshot_id))
@@ -0,0 +1,71 @@
+from bisect import bisect_right
+from itertools import islice
+from typing import Any
+
+
+def in_range(key, start, end) -> bool:
+    try:
+        return (start is None or start <= key) and (end is None or key < end)
+    except TypeError:
+        # keys of another type than the range are never in it
+        return False
+
+
+class PredicateIndex(object):
+    """The scans and index lookups of an operator in one epoch, indexed to find the readers of a written key.
+
+    The ranges are ordered by their start, so a key is only compared with the ranges that start at or before it, and
+    the index lookups are keyed by (index name, index key).
+    """
+
+    def __init__(self, predicate_reads: dict[int, list[tuple]]):
+        # (start, end, reader t_id), the ranges without a start go first
+        self.ranges: list[tuple[Any, Any, int]] = []
+        # (index_name, index_key): set(reader t_id)
+        self.index_readers: dict[tuple[str, Any], set[int]] = {}
+        open_ranges: list[tuple[Any, Any, int]] = []
+        for reader_t_id, predicates in predicate_reads.items():
+            for kind, first, second in predicates:
+                if kind == 'range':
+                    (open_ranges if first is None else self.ranges).append((first, second, reader_t_id))
+                elif (first, second) in self.index_readers:
+                    self.index_readers[(first, second)].add(reader_t_id)
+                else:
+                    self.index_readers[(first, second)] = {reader_t_id}
+        self.n_open_ranges: int = len(open_ranges)
+        # the starts of the other ranges in order, None if they are of types that cannot be ordered
+        self.starts: list[Any] | None
+        try:
+            self.ranges.sort(key=lambda predicate_range: predicate_range[0])
+            self.starts = [start for start, _, _ in self.ranges]
+        except TypeError:
+            self.starts = None
+        self.ranges = open_ranges + self.ranges
+
+    def range_readers(self, key) -> set[int]:
+        """
+        Returns
+        -------
+        set[int]
+            the t_ids that scanned a range around the key
+        """
+        n_candidates = len(self.ranges)
+        if self.starts is not None:
+            try:
+                n_candidates = self.n_open_ranges + bisect_right(self.starts, key)
+            except TypeError:
+                pass
+        readers = set()
+        for start, end, reader_t_id in islice(self.ranges, n_candidates):
+            if in_range(key, start, end):
+                readers.add(reader_t_id)
+        return readers
+
+    def lookup_readers(self, index_name: str, index_key) -> set[int]:
+        """
+        Returns
+        -------
+        set[int]
+            the t_ids that looked up the index key
+        """
+        return self.index_readers.get((index_name, index_key), set())
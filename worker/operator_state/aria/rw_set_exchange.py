@@ -0,0 +1,57 @@
+"""Compact read/write set exchange of the deterministic reordering.
+
+Every access is shipped as a (key hash, t_id) pair in int64 arrays, values never leave the worker. A hash collision
+can only make two keys look like one, which may cause a spurious abort but never hides a conflict.
+"""
+from typing import Iterable
+
+import mmh3
+import numpy as np
+
+from worker.operator_state.aria.vectorized_reservations import min_per_key
+
+
+def hash_key(operator_name: str, key) -> int:
+    return mmh3.hash64(f"{operator_name}:{key!r}")[0]
+
+
+def encode_accesses(rw_sets: dict[str, dict[int, Iterable]]) -> bytes:
+    """Encodes {operator_name: {t_id: keys}} as int64 (key hash, t_id) pairs sorted by both"""
+    key_hashes: list[int] = []
+    t_ids: list[int] = []
+    for operator_name, rw_set in rw_sets.items():
+        for t_id, keys in rw_set.items():
+            for key in keys:
+                key_hashes.append(hash_key(operator_name, key))
+                t_ids.append(t_id)
+    accesses = np.array([key_hashes, t_ids], dtype=np.int64).reshape(2, -1)
+    # pairs are laid out next to each other so that concatenating encodings concatenates the accesses
+    return np.ascontiguousarray(accesses[:, np.lexsort((accesses[1], accesses[0]))].T).tobytes()
+
+
+def decode_accesses(encoded: bytes) -> np.ndarray:
+    """The (2, n) view of the key hashes and the t_ids"""
+    return np.frombuffer(encoded, dtype=np.int64).reshape(-1, 2).T
+
+
+def reordering_aborts(reads: np.ndarray, writes: np.ndarray) -> np.ndarray:
+    """
+    Arias deterministic reordering over the accesses of every worker: a t_id aborts on a write-after-write
+    dependency, or when it has both a write-after-read and a read-after-write dependency on smaller t_ids.
+
+    Returns
+    -------
+    np.ndarray
+        the sorted t_ids to abort
+    """
+    read_hashes, read_t_ids = reads
+    write_hashes, write_t_ids = writes
+    key_hashes = np.unique(np.concatenate((read_hashes, write_hashes)))
+    read_key_ids = np.searchsorted(key_hashes, read_hashes)
+    write_key_ids = np.searchsorted(key_hashes, write_hashes)
+    min_reads = min_per_key(read_key_ids, read_t_ids, key_hashes.size)
+    min_writes = min_per_key(write_key_ids, write_t_ids, key_hashes.size)
+    waw = np.unique(write_t_ids[min_writes[write_key_ids] < write_t_ids])
+    war = np.unique(write_t_ids[min_reads[write_key_ids] < write_t_ids])
+    raw = np.unique(read_t_ids[min_writes[read_key_ids] < read_t_ids])
+    return np.union1d(waw, np.intersect1d(war, raw, assume_unique=True))
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+# Sentinel for keys that have no reservation, larger than any t_id
+NO_RESERVATION: int = np.iinfo(np.int64).max
+
+
+def min_per_key(key_ids: np.ndarray, t_ids: np.ndarray, n_keys: int) -> np.ndarray:
+    """Computes the minimum t_id per dense key id.
+
+    Returns an array of size n_keys where position i holds the lowest t_id that accessed key i,
+    or NO_RESERVATION if the key was not accessed.
+    """
+    min_t_ids = np.full(n_keys, NO_RESERVATION, dtype=np.int64)
+    if key_ids.size == 0:
+        return min_t_ids
+    order = np.argsort(key_ids, kind='stable')
+    sorted_key_ids = key_ids[order]
+    sorted_t_ids = t_ids[order]
+    group_starts = np.flatnonzero(np.concatenate(([True], sorted_key_ids[1:] != sorted_key_ids[:-1])))
+    min_t_ids[sorted_key_ids[group_starts]] = np.minimum.reduceat(sorted_t_ids, group_starts)
+    return min_t_ids
+
+
+class VectorizedReservations(object):
+    """Array backed access log of a single operator for one epoch.
+
+    Keys are interned to dense integer ids and every access is kept as a (key_id, t_id, is_write) record
+    in growable NumPy arrays, so that the minimum reservations and the conflict checks of an epoch are
+    computed with a handful of array operations instead of per key / per t_id Python loops.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.key_to_id: dict[any, int] = {}
+        self.id_to_key: list[any] = []
+        self.size: int = 0
+        self._key_ids: np.ndarray = np.empty(initial_capacity, dtype=np.int64)
+        self._t_ids: np.ndarray = np.empty(initial_capacity, dtype=np.int64)
+        self._is_write: np.ndarray = np.empty(initial_capacity, dtype=np.bool_)
+
+    @property
+    def n_keys(self) -> int:
+        return len(self.id_to_key)
+
+    @property
+    def key_ids(self) -> np.ndarray:
+        return self._key_ids[:self.size]
+
+    @property
+    def t_ids(self) -> np.ndarray:
+        return self._t_ids[:self.size]
+
+    @property
+    def is_write(self) -> np.ndarray:
+        return self._is_write[:self.size]
+
+    def intern(self, key) -> int:
+        key_id = self.key_to_id.get(key)
+        if key_id is None:
+            key_id = len(self.id_to_key)
+            self.key_to_id[key] = key_id
+            self.id_to_key.append(key)
+        return key_id
+
+    def add(self, key, t_id: int, is_write: bool):
+        if self.size == self._key_ids.size:
+            self._grow()
+        self._key_ids[self.size] = self.intern(key)
+        self._t_ids[self.size] = t_id
+        self._is_write[self.size] = is_write
+        self.size += 1
+
+    def _grow(self):
+        new_capacity = self._key_ids.size * 2
+        self._key_ids = np.resize(self._key_ids, new_capacity)
+        self._t_ids = np.resize(self._t_ids, new_capacity)
+        self._is_write = np.resize(self._is_write, new_capacity)
+
+    def remove_t_ids(self, t_ids_to_remove: set[int]):
+        if not t_ids_to_remove or self.size == 0:
+            return
+        keep = ~np.isin(self.t_ids, np.fromiter(t_ids_to_remove, dtype=np.int64))
+        n_kept = int(np.count_nonzero(keep))
+        self._key_ids[:n_kept] = self.key_ids[keep]
+        self._t_ids[:n_kept] = self.t_ids[keep]
+        self._is_write[:n_kept] = self.is_write[keep]
+        self.size = n_kept
+
+    def clear(self):
+        self.key_to_id.clear()
+        self.id_to_key.clear()
+        self.size = 0
+
+    def min_writes(self) -> np.ndarray:
+        writes = self.is_write
+        return min_per_key(self.key_ids[writes], self.t_ids[writes], self.n_keys)
+
+    def check_conflicts(self) -> np.ndarray:
+        # Every read or write of a t_id conflicts if a smaller t_id wrote to the same key
+        min_writes = self.min_writes()
+        conflicts = min_writes[self.key_ids] < self.t_ids
+        return np.unique(self.t_ids[conflicts])
+
+    def check_conflicts_snapshot_isolation(self) -> np.ndarray:
+        # Only the writes of a t_id conflict if a smaller t_id wrote to the same key
+        writes = self.is_write
+        key_ids = self.key_ids[writes]
+        t_ids = self.t_ids[writes]
+        conflicts = min_per_key(key_ids, t_ids, self.n_keys)[key_ids] < t_ids
+        return np.unique(t_ids[conflicts])
@@ -30,8 +30,11 @@ class UnsafeOperatorState(BaseOperatorState):
         """Fallback not applicable"""
         pass
 
-    async def delete(self, key, operator_name: str):
-        # Need to find a way to implement deletes
+    async def delete(self, key, t_id: int, operator_name: str):
+        self.data[operator_name].pop(key, None)
+
+    async def delete_immediate(self, key, t_id: int, operator_name: str):
+        """Fallback not applicable"""
         pass
 
     async def exists(self, key, operator_name: str):
@@ -0,0 +1,80 @@
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class EpochSizeDecision(object):
+    epoch: int
+    epoch_size: int
+    fetch_window_ms: int
+    reason: str
+
+
+class EpochSizeController(object):
+    """Feedback controller of the epoch size cap and the ingress fetch window.
+
+    After every epoch it looks at how long the epoch took, its abort rate and how many sequenced transactions
+    are still waiting. Epochs over the latency SLO or with too many aborts shrink multiplicatively, a backlog
+    that the current cap cannot drain grows it while the epochs stay within the SLO, and an idle queue brings
+    the fetch window back to its minimum so that a single transaction does not wait for a full window.
+    """
+
+    def __init__(self,
+                 epoch_size: int,
+                 min_epoch_size: int = 16,
+                 max_epoch_size: int = 10_000,
+                 latency_slo_ms: float = 50.0,
+                 max_abort_rate: float = 0.2,
+                 min_fetch_window_ms: int = 1,
+                 max_fetch_window_ms: int = 20,
+                 growth: float = 1.5,
+                 shrink: float = 0.5,
+                 history: int = 100):
+        self.min_epoch_size: int = min_epoch_size
+        self.max_epoch_size: int = max_epoch_size
+        self.epoch_size: int = min(max(epoch_size, min_epoch_size), max_epoch_size)
+        self.latency_slo_ms: float = latency_slo_ms
+        self.max_abort_rate: float = max_abort_rate
+        self.min_fetch_window_ms: int = min_fetch_window_ms
+        self.max_fetch_window_ms: int = max_fetch_window_ms
+        self.fetch_window_ms: int = min_fetch_window_ms
+        self.growth: float = growth
+        self.shrink: float = shrink
+        # the last decisions that changed the epoch size or the fetch window, oldest first
+        self.decisions: deque[EpochSizeDecision] = deque(maxlen=history)
+
+    def observe(self, epoch: int, epoch_duration_ms: float, abort_rate: float, queue_depth: int) -> bool:
+        """
+        Adjusts the epoch size and the fetch window to the last epoch.
+
+        Returns
+        -------
+        bool
+            whether the epoch size or the fetch window changed
+        """
+        if epoch_duration_ms > self.latency_slo_ms:
+            reason = f"epoch took {epoch_duration_ms:.1f}ms over the {self.latency_slo_ms}ms SLO"
+            epoch_size = int(self.epoch_size * self.shrink)
+            fetch_window_ms = self.min_fetch_window_ms
+        elif abort_rate > self.max_abort_rate:
+            reason = f"abort rate {abort_rate:.2f} over {self.max_abort_rate}"
+            epoch_size = int(self.epoch_size * self.shrink)
+            fetch_window_ms = self.fetch_window_ms
+        elif queue_depth > self.epoch_size and epoch_duration_ms * self.growth <= self.latency_slo_ms:
+            reason = f"backlog of {queue_depth} over the epoch size"
+            epoch_size = int(self.epoch_size * self.growth) + 1
+            # a longer poll gathers bigger batches per lock acquisition
+            fetch_window_ms = min(self.fetch_window_ms * 2, self.max_fetch_window_ms)
+        elif queue_depth == 0:
+            reason = "idle queue"
+            epoch_size = self.epoch_size
+            fetch_window_ms = self.min_fetch_window_ms
+        else:
+            return False
+        epoch_size = min(max(epoch_size, self.min_epoch_size), self.max_epoch_size)
+        if epoch_size == self.epoch_size and fetch_window_ms == self.fetch_window_ms:
+            return False
+        self.epoch_size = epoch_size
+        self.fetch_window_ms = fetch_window_ms
+        self.decisions.append(EpochSizeDecision(epoch, epoch_size, fetch_window_ms, reason))
+        return True
@@ -1,4 +1,5 @@
 import asyncio
+from collections import defaultdict, deque
 
 from system_x.common.logging import logging
 from system_x.common.run_func_payload import RunFuncPayload, SequencedItem
@@ -6,7 +7,13 @@ from system_x.common.run_func_payload import RunFuncPayload, SequencedItem
 
 class Sequencer(object):
 
-    def __init__(self, max_size: int = None, t_counter: int = 0, epoch_counter: int = 0):
+    def __init__(self,
+                 max_size: int = None,
+                 t_counter: int = 0,
+                 epoch_counter: int = 0,
+                 conflict_aware: bool = False,
+                 conflict_lookahead: int = 4,
+                 committed_offsets: dict[tuple[str, int], list[int]] = None):
         self.distributed_log: list[SequencedItem] = []
         self.current_epoch: list[SequencedItem] = []
         self.t_counter: int = t_counter
@@ -15,6 +22,23 @@ class Sequencer(object):
         self.epoch_counter: int = epoch_counter
         self.max_size: int = max_size
         self.lock: asyncio.Lock = asyncio.Lock()
+        # set when there may be an epoch to run, the function scheduler sleeps on it while the log is empty
+        self.work_available: asyncio.Event = asyncio.Event()
+        # Conflict aware epochs take at most one transaction per target key, the others move to the next epoch
+        # keeping their t_id and order, like the rescheduled concurrency aborts. The lookahead bounds the scan
+        # of the log to lookahead * max_size items.
+        self.conflict_aware: bool = conflict_aware
+        self.conflict_lookahead: int = conflict_lookahead
+        # the transactions moved to a later epoch because of a key conflict, i.e. the aborts avoided
+        self.deferred_conflicts: int = 0
+        # The Kafka offsets of the sequenced transactions per (operator, partition) in order, until they commit. The
+        # recorded offset of a partition stays below the oldest one still deferred or rescheduled, the offsets
+        # committed above it are kept, so that the replay after a recovery does not run them twice.
+        self.uncommitted_offsets: dict[tuple[str, int], deque[int]] = defaultdict(deque)
+        self.committed_offsets: dict[tuple[str, int], set[int]] = defaultdict(set)
+        if committed_offsets is not None:
+            for topic_partition, offsets in committed_offsets.items():
+                self.committed_offsets[topic_partition].update(offsets)
 
     def set_worker_id(self, worker_id: int):
         self.worker_id = worker_id
@@ -23,14 +47,23 @@ class Sequencer(object):
         self.n_workers = n_workers
 
     def sequence(self, message: RunFuncPayload):
+        if message.kafka_offset >= 0:
+            topic_partition = (message.operator_name, message.partition)
+            if message.kafka_offset in self.committed_offsets[topic_partition]:
+                # replayed after a recovery, the snapshot already has its effects
+                return
+            self.uncommitted_offsets[topic_partition].append(message.kafka_offset)
         t_id = self.worker_id + self.t_counter * self.n_workers
         self.t_counter += 1
         logging.info(f'Sequencing message: {message.key} with t_id: {t_id}')
         self.distributed_log.append(SequencedItem(t_id, message))
+        self.work_available.set()
 
     def get_epoch(self) -> list[SequencedItem]:
         if len(self.distributed_log) > 0:
-            if self.max_size is None:
+            if self.conflict_aware:
+                self.current_epoch = self.get_conflict_free_epoch()
+            elif self.max_size is None:
                 self.current_epoch = self.distributed_log
                 self.distributed_log = []
             else:
@@ -39,6 +72,31 @@ class Sequencer(object):
             return self.current_epoch
         return []
 
+    def get_conflict_free_epoch(self) -> list[SequencedItem]:
+        scan_size = len(self.distributed_log) if self.max_size is None else self.max_size * self.conflict_lookahead
+        epoch: list[SequencedItem] = []
+        deferred: list[SequencedItem] = []
+        epoch_keys: set = set()
+        n_scanned = 0
+        for sequenced_item in self.distributed_log[:scan_size]:
+            if self.max_size is not None and len(epoch) == self.max_size:
+                break
+            n_scanned += 1
+            target_key = self.conflict_key(sequenced_item.payload)
+            if target_key in epoch_keys:
+                deferred.append(sequenced_item)
+            else:
+                epoch_keys.add(target_key)
+                epoch.append(sequenced_item)
+        self.deferred_conflicts += len(deferred)
+        self.distributed_log = deferred + self.distributed_log[n_scanned:]
+        return epoch
+
+    @staticmethod
+    def conflict_key(payload: RunFuncPayload):
+        # only the target key is known before running the function, the keys of remote calls are not declared
+        return payload.operator_name, payload.partition, payload.key
+
     def increment_epoch(self,
                         max_t_counter: int,
                         t_ids_to_reschedule: set[int]):
@@ -50,6 +108,41 @@ class Sequencer(object):
         self.epoch_counter += 1
         self.current_epoch = []
 
+    def commit_offsets(self,
+                       t_ids_to_reschedule: set[int],
+                       topic_partition_offsets: dict[tuple[str, int], int]):
+        """
+        Moves the offset of every partition of the epoch up to the last one below which all the sequenced
+        transactions committed, the rescheduled and the deferred ones are read again after a recovery.
+        """
+        for sequenced_item in self.current_epoch:
+            payload = sequenced_item.payload
+            if sequenced_item.t_id in t_ids_to_reschedule or payload.kafka_offset < 0:
+                continue
+            topic_partition = (payload.operator_name, payload.partition)
+            uncommitted = self.uncommitted_offsets[topic_partition]
+            committed = self.committed_offsets[topic_partition]
+            committed.add(payload.kafka_offset)
+            while uncommitted and uncommitted[0] in committed:
+                topic_partition_offsets[topic_partition] = uncommitted.popleft()
+                committed.remove(topic_partition_offsets[topic_partition])
+            if not uncommitted and committed:
+                # the offsets left over from a recovery that the partition has moved past
+                committed.difference_update([offset for offset in committed
+                                             if offset <= topic_partition_offsets[topic_partition]])
+
+    def get_committed_offsets(self,
+                              topic_partition_offsets: dict[tuple[str, int], int]) -> dict[tuple[str, int], list[int]]:
+        """
+        Returns
+        -------
+        dict[tuple[str, int], list[int]]
+            the committed offsets above the recorded offset of their partition, skipped when replayed after a recovery
+        """
+        return {topic_partition: sorted(offset for offset in offsets
+                                        if offset > topic_partition_offsets[topic_partition])
+                for topic_partition, offsets in self.committed_offsets.items() if offsets}
+
     def get_aborted_sequence(self,
                              t_ids_to_reschedule: set[int]) -> list[SequencedItem]:
         if t_ids_to_reschedule:
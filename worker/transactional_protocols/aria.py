@@ -1,8 +1,10 @@
 import asyncio
+import json
 import os
 import concurrent.futures
 import socket
 import time
+from dataclasses import asdict
 
 from timeit import default_timer as timer
 
@@ -10,6 +12,9 @@ from aiokafka import TopicPartition
 from msgspec import msgpack
 
 from system_x.common.logging import logging
+from system_x.common.message_schemas import Message, Empty, RunFunRemote, Ack, AckCache, ChainAbort, Unlock, \
+    AriaProcessingDone, AriaCommit, AriaFusedCommit, DeterministicReordering, EpochStats, PeerBarrierMessage, \
+    peer_barrier_message, schema_deserialization
 from system_x.common.message_types import MessageType
 from system_x.common.tcp_networking import NetworkingManager
 from system_x.common.operator import Operator
@@ -23,8 +28,12 @@ from worker.fault_tolerance.async_snapshots import AsyncSnapshotsMinio
 from worker.ingress.system_x_kafka_ingress import SysXKafkaIngress
 from worker.operator_state.aria.conflict_detection_types import AriaConflictDetectionType
 from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+from worker.operator_state.aria.log_structured_state import LogStructuredOperatorState
 from worker.operator_state.stateless import Stateless
+from worker.sequencer.epoch_controller import EpochSizeController
 from worker.sequencer.sequencer import Sequencer
+from worker.transactional_protocols.epoch_stats import EpochPhaseTimer, summarize
+from worker.transactional_protocols.peer_barrier import PeerBarrier
 
 
 DISCOVERY_HOST: str = os.environ['DISCOVERY_HOST']
@@ -37,8 +46,36 @@ FALLBACK_STRATEGY_PERCENTAGE: float = float(os.getenv('FALLBACK_STRATEGY_PERCENT
 # snapshot each N epochs
 SNAPSHOT_FREQUENCY = int(os.getenv('SNAPSHOT_FREQUENCY_SEC', 10))
 SEQUENCE_MAX_SIZE: int = int(os.getenv('SEQUENCE_MAX_SIZE', 1_000))
+# let the epoch size and the ingress fetch window follow the load instead of fixing them to SEQUENCE_MAX_SIZE
+ADAPTIVE_EPOCH_SIZE: bool = bool(int(os.getenv('ADAPTIVE_EPOCH_SIZE', 0)))
+EPOCH_LATENCY_SLO_MS: float = float(os.getenv('EPOCH_LATENCY_SLO_MS', 50))
+ADAPTIVE_EPOCH_MIN_SIZE: int = int(os.getenv('ADAPTIVE_EPOCH_MIN_SIZE', 16))
+ADAPTIVE_EPOCH_MAX_SIZE: int = int(os.getenv('ADAPTIVE_EPOCH_MAX_SIZE', 10_000))
+ADAPTIVE_FETCH_WINDOW_MAX_MS: int = int(os.getenv('ADAPTIVE_FETCH_WINDOW_MAX_MS', 20))
+# spread the transactions on the same key over consecutive epochs instead of letting them abort
+CONFLICT_AWARE_SEQUENCING: bool = bool(int(os.getenv('CONFLICT_AWARE_SEQUENCING', 0)))
+# serve the functions registered as read only from the last committed epoch, outside the epochs
+READ_ONLY_FAST_PATH: bool = bool(int(os.getenv('READ_ONLY_FAST_PATH', 0)))
 USE_FALLBACK_CACHE: bool = bool(os.getenv('USE_FALLBACK_CACHE', True))
 KAFKA_URL: str = os.environ['KAFKA_URL']
+# start the next epoch as soon as the current one is committed locally, overlapping the cleanup barrier with it
+PIPELINED_EPOCHS: bool = bool(int(os.getenv('PIPELINED_EPOCHS', 0)))
+# run the epoch barriers directly between the workers, the coordinator only tracks the membership
+DECENTRALIZED_BARRIERS: bool = bool(int(os.getenv('DECENTRALIZED_BARRIERS', 0)))
+# above this cluster size the decentralized barriers reduce along a tree instead of all-to-all
+PEER_BARRIER_ALL_TO_ALL_MAX: int = int(os.getenv('PEER_BARRIER_ALL_TO_ALL_MAX', 8))
+# the epoch phase timings kept per worker and how often they are logged and sent to the coordinator
+EPOCH_STATS_HISTORY: int = int(os.getenv('EPOCH_STATS_HISTORY', 1_000))
+EPOCH_STATS_INTERVAL_SEC: float = float(os.getenv('EPOCH_STATS_INTERVAL_SEC', 10))
+# after waking up on a new transaction the function scheduler waits this long for more to batch in the epoch
+SCHEDULER_LINGER_MS: float = float(os.getenv('SCHEDULER_LINGER_MS', 0))
+# exchange the logic and concurrency aborts in a single round and drop the cleanup barrier
+FUSED_BARRIERS: bool = bool(int(os.getenv('FUSED_BARRIERS', 0)))
+# the deterministic reordering needs the rw-sets of all the workers before checking, it keeps its rounds
+FUSABLE_CONFLICT_DETECTION_METHODS: tuple[AriaConflictDetectionType, ...] = (
+    AriaConflictDetectionType.DEFAULT_SERIALIZABLE,
+    AriaConflictDetectionType.SNAPSHOT_ISOLATION
+)
 
 
 class AriaProtocol(BaseTransactionalProtocol):
@@ -50,7 +87,7 @@ class AriaProtocol(BaseTransactionalProtocol):
                  protocol_socket: socket.socket,
                  registered_operators: dict[tuple[str, int], Operator],
                  topic_partitions: list[TopicPartition],
-                 state: InMemoryOperatorState | Stateless,
+                 state: InMemoryOperatorState | LogStructuredOperatorState | Stateless,
                  async_snapshots: AsyncSnapshotsMinio,
                  snapshot_metadata: dict = None,
                  restart_after_recovery: bool = False):
@@ -62,11 +99,14 @@ class AriaProtocol(BaseTransactionalProtocol):
             t_counter = 0
             output_offsets: dict[str, dict[int, int]] = {tp.topic: {tp.partition: -1}
                                                          for tp in topic_partitions}
+            committed_offsets: dict[tuple[str, int], list[int]] = {}
         else:
             topic_partition_offsets = snapshot_metadata["offsets"]
             epoch_counter = snapshot_metadata["epoch"]
             t_counter = snapshot_metadata["t_counter"]
             output_offsets = snapshot_metadata["output_offsets"]
+            # snapshots taken before the committed offsets were recorded have none
+            committed_offsets = snapshot_metadata.get("committed_offsets", {})
 
         self.id = worker_id
 
@@ -74,7 +114,7 @@ class AriaProtocol(BaseTransactionalProtocol):
         self.networking = networking
         self.protocol_socket = protocol_socket
 
-        self.local_state: InMemoryOperatorState | Stateless = state
+        self.local_state: InMemoryOperatorState | LogStructuredOperatorState | Stateless = state
         self.aio_task_scheduler: AIOTaskScheduler = AIOTaskScheduler()
         self.background_functions: AIOTaskScheduler = AIOTaskScheduler()
         self.async_snapshots: AsyncSnapshotsMinio = async_snapshots
@@ -101,7 +141,16 @@ class AriaProtocol(BaseTransactionalProtocol):
 
         self.registered_operators: dict[tuple[str, int], Operator] = registered_operators
 
-        self.sequencer = Sequencer(SEQUENCE_MAX_SIZE, t_counter=t_counter, epoch_counter=epoch_counter)
+        self.peer_barrier: PeerBarrier = PeerBarrier(self.id,
+                                                     [self.id] + list(self.peers.keys()),
+                                                     self.send_peer_barrier,
+                                                     all_to_all_max=PEER_BARRIER_ALL_TO_ALL_MAX)
+
+        self.sequencer = Sequencer(SEQUENCE_MAX_SIZE,
+                                   t_counter=t_counter,
+                                   epoch_counter=epoch_counter,
+                                   conflict_aware=CONFLICT_AWARE_SEQUENCING,
+                                   committed_offsets=committed_offsets)
         self.sequencer.set_worker_id(self.id)
         self.sequencer.set_n_workers(len(self.peers) + 1)
 
@@ -110,7 +159,18 @@ class AriaProtocol(BaseTransactionalProtocol):
                                                           worker_id=self.id,
                                                           kafka_url=KAFKA_URL,
                                                           sequence_max_size=SEQUENCE_MAX_SIZE,
-                                                          epoch_interval_ms=1)
+                                                          epoch_interval_ms=1,
+                                                          fast_path=self.serve_read_only if READ_ONLY_FAST_PATH
+                                                          else None)
+
+        self.epoch_controller: EpochSizeController | None = None
+        if ADAPTIVE_EPOCH_SIZE:
+            self.epoch_controller = EpochSizeController(SEQUENCE_MAX_SIZE,
+                                                        min_epoch_size=ADAPTIVE_EPOCH_MIN_SIZE,
+                                                        max_epoch_size=ADAPTIVE_EPOCH_MAX_SIZE,
+                                                        latency_slo_ms=EPOCH_LATENCY_SLO_MS,
+                                                        max_fetch_window_ms=ADAPTIVE_FETCH_WINDOW_MAX_MS)
+            self.apply_epoch_size()
 
         self.egress: SysXKafkaBatchEgress = SysXKafkaBatchEgress(output_offsets, restart_after_recovery)
         # Primary task used for processing
@@ -128,12 +188,14 @@ class AriaProtocol(BaseTransactionalProtocol):
             MessageType.AriaFallbackStart: asyncio.Event(),
             MessageType.AriaFallbackDone: asyncio.Event(),
             MessageType.AriaCommit: asyncio.Event(),
+            MessageType.AriaFusedCommit: asyncio.Event(),
             MessageType.DeterministicReordering: asyncio.Event()
         }
 
         self.networking_locks: dict[MessageType, asyncio.Lock] = {
             MessageType.RunFunRemote: asyncio.Lock(),
             MessageType.AriaCommit: asyncio.Lock(),
+            MessageType.AriaFusedCommit: asyncio.Lock(),
             MessageType.AriaFallbackDone: asyncio.Lock(),
             MessageType.AriaFallbackStart: asyncio.Lock(),
             MessageType.SyncCleanup: asyncio.Lock(),
@@ -146,22 +208,33 @@ class AriaProtocol(BaseTransactionalProtocol):
         }
 
         self.remote_wants_to_proceed: bool = False
+        # a peer started the next epoch while this worker is still committing the current one
+        self.next_epoch_wanted: bool = False
         self.currently_processing: bool = False
+        # the synchronization rounds of the current epoch
+        self.epoch_barriers: int = 0
 
         self.snapshot_timer: float = -1.0
 
         self.started = asyncio.Event()
 
-        # performance measurements
-        # self.function_running_time = 0
-        # self.chain_completion_time = 0
-        # self.serialization_time = 0
-        # self.sequencing_time = 0
-        # self.conflict_resolution_time = 0
-        # self.commit_time = 0
-        # self.sync_time = 0
-        # self.snapshot_time = 0
-        # self.fallback_time = 0
+        # Cleared from the commit round until the local commit and the fallback of the current epoch are applied.
+        # Read only functions wait on it so that they never see a partially committed epoch, and the wake-ups without
+        # an epoch received while it is cleared are for the next epoch.
+        self.epoch_committed: asyncio.Event = asyncio.Event()
+        self.epoch_committed.set()
+        # In pipelined and fused mode peers can start the next epoch before this worker commits, their function calls
+        # wait until the epoch they were sent in is open here, to read its committed state.
+        self.open_epoch: int = epoch_counter
+        self.next_epoch_opened: asyncio.Event = asyncio.Event()
+        # whether any worker sent remote calls in the epoch, from the fused commit round
+        self.remote_chains_everywhere: bool = False
+        # the cleanup barrier of the previous epoch in pipelined mode
+        self.pending_sync_cleanup: asyncio.Task | None = None
+
+        # per epoch phase durations, reported to the coordinator every EPOCH_STATS_INTERVAL_SEC
+        self.epoch_timer: EpochPhaseTimer = EpochPhaseTimer(self.id, history=EPOCH_STATS_HISTORY)
+        self.epoch_stats_task: asyncio.Task = ...
 
     async def stop(self):
         logging.warning("0")
@@ -173,6 +246,9 @@ class AriaProtocol(BaseTransactionalProtocol):
         logging.warning("3")
         self.function_scheduler_task.cancel()
         self.communication_task.cancel()
+        self.epoch_stats_task.cancel()
+        if self.pending_sync_cleanup is not None:
+            self.pending_sync_cleanup.cancel()
         try:
             await self.function_scheduler_task
             await self.communication_task
@@ -181,9 +257,14 @@ class AriaProtocol(BaseTransactionalProtocol):
         logging.warning(f"Active tasks: {asyncio.all_tasks()}")
         logging.warning("Aria protocol stopped")
 
+    @property
+    def epoch(self) -> int:
+        return self.sequencer.epoch_counter
+
     def start(self):
         self.function_scheduler_task = asyncio.create_task(self.function_scheduler())
         self.communication_task = asyncio.create_task(self.communication_protocol())
+        self.epoch_stats_task = asyncio.create_task(self.report_epoch_stats())
         logging.warning("Aria protocol started")
         self.snapshot_timer = timer()
 
@@ -243,8 +324,10 @@ class AriaProtocol(BaseTransactionalProtocol):
                 start = time.time() * 1000
                 data = {
                     "data":  msgpack.decode(msgpack.encode(self.local_state.get_data_for_snapshot())),
+                    "deletes": msgpack.decode(msgpack.encode(self.local_state.get_deletes_for_snapshot())),
                     "metadata": {
                         "offsets": msgpack.decode(msgpack.encode(self.topic_partition_offsets)),
+                        "committed_offsets": self.sequencer.get_committed_offsets(self.topic_partition_offsets),
                         "epoch": self.sequencer.epoch_counter,
                         "t_counter": self.sequencer.t_counter,
                         "output_offsets": msgpack.decode(msgpack.encode(self.egress.topic_partition_output_offsets))
@@ -257,6 +340,30 @@ class AriaProtocol(BaseTransactionalProtocol):
                                      data,
                                      start).add_done_callback(self.async_snapshots.snapshot_completed_callback)
                 self.local_state.clear_delta_map()
+            elif LogStructuredOperatorState.__name__ == self.local_state.__class__.__name__:
+                loop = asyncio.get_running_loop()
+                start = time.time() * 1000
+                snapshot_id = self.async_snapshots.snapshot_id
+                # staging seals the active segments, so it has to precede the manifest
+                staged_segments = self.local_state.stage_segments_for_snapshot(snapshot_id)
+                manifest = {
+                    "segments": self.local_state.get_segment_manifest(),
+                    "metadata": {
+                        "offsets": msgpack.decode(msgpack.encode(self.topic_partition_offsets)),
+                        "committed_offsets": self.sequencer.get_committed_offsets(self.topic_partition_offsets),
+                        "epoch": self.sequencer.epoch_counter,
+                        "t_counter": self.sequencer.t_counter,
+                        "output_offsets": msgpack.decode(msgpack.encode(self.egress.topic_partition_output_offsets))
+                    }
+                }
+                loop.run_in_executor(pool,
+                                     self.async_snapshots.store_segments_snapshot,
+                                     snapshot_id,
+                                     self.id,
+                                     self.local_state.staging_dir(snapshot_id),
+                                     staged_segments,
+                                     manifest,
+                                     start).add_done_callback(self.async_snapshots.snapshot_completed_callback)
             else:
                 logging.warning("Snapshot currently supported only for in-memory and incremental operator state")
 
@@ -274,13 +381,11 @@ class AriaProtocol(BaseTransactionalProtocol):
             case MessageType.RunFunRemote:
                 async with self.networking_locks[message_type]:
                     logging.info('CALLED RUN FUN FROM PEER')
-                    (t_id, request_id, operator_name, function_name,
-                     key, partition, timestamp, fallback_enabled, params, ack) = self.networking.decode_message(data)
-                    payload = RunFuncPayload(request_id=request_id, key=key, timestamp=timestamp,
-                                             operator_name=operator_name, partition=partition,
-                                             function_name=function_name, params=params, ack_payload=ack)
+                    message: RunFunRemote = self.networking.decode_message(data)
+                    t_id: int = message.t_id
+                    payload: RunFuncPayload = message.payload
 
-                    if fallback_enabled:
+                    if message.fallback_enabled:
                         # Running in fallback mode
                         self.background_functions.create_task(
                             self.run_fallback_function(
@@ -290,6 +395,8 @@ class AriaProtocol(BaseTransactionalProtocol):
                             )
                         )
                     else:
+                        while message.epoch > self.open_epoch:
+                            await self.next_epoch_opened.wait()
                         if USE_FALLBACK_CACHE:
                             # If fallback caching is enabled add the function call to the cache for a potential fallback
                             await self.networking.add_remote_function_call(t_id, payload)
@@ -304,50 +411,67 @@ class AriaProtocol(BaseTransactionalProtocol):
                 logging.error('REQUEST RESPONSE HAS BEEN DEPRECATED')
             case MessageType.AriaCommit:
                 async with self.networking_locks[message_type]:
-                    (self.concurrency_aborts_everywhere, self.total_processed_seq_size,
-                     self.max_t_counter) = self.networking.decode_message(data)
+                    message: AriaCommit = self.networking.decode_message(data)
+                    self.concurrency_aborts_everywhere = message.concurrency_aborts
+                    self.total_processed_seq_size = message.processed_seq_size
+                    self.max_t_counter = message.t_counter
                     self.sync_workers_event[message_type].set()
             case (MessageType.AriaFallbackDone | MessageType.AriaFallbackStart | MessageType.SyncCleanup):
                 async with self.networking_locks[message_type]:
                     self.sync_workers_event[message_type].set()
             case MessageType.AriaProcessingDone:
                 async with self.networking_locks[message_type]:
-                    (self.networking.logic_aborts_everywhere, ) = self.networking.decode_message(data)
+                    message: AriaProcessingDone = self.networking.decode_message(data)
+                    self.networking.logic_aborts_everywhere = message.logic_aborts
+                    self.sync_workers_event[message_type].set()
+            case MessageType.AriaFusedCommit:
+                async with self.networking_locks[message_type]:
+                    message: AriaFusedCommit = self.networking.decode_message(data)
+                    self.networking.logic_aborts_everywhere = message.logic_aborts
+                    self.concurrency_aborts_everywhere = message.concurrency_aborts
+                    self.total_processed_seq_size = message.processed_seq_size
+                    self.max_t_counter = message.t_counter
+                    self.remote_chains_everywhere = message.remote_chains
+                    # the wake-ups from the coordinator after the result are for the next epoch
+                    self.epoch_committed.clear()
                     self.sync_workers_event[message_type].set()
             case MessageType.Ack:
                 async with self.networking_locks[message_type]:
-                    (ack_id, fraction_str,
-                     chain_participants, partial_node_count) = self.networking.decode_message(data)
-                    await self.networking.add_ack_fraction_str(ack_id, fraction_str,
-                                                               chain_participants, partial_node_count)
+                    message: Ack = self.networking.decode_message(data)
+                    await self.networking.add_ack_share(message.ack_id, message.ack_share,
+                                                        message.chain_participants, message.partial_node_count)
             case MessageType.AckCache:
                 async with self.networking_locks[message_type]:
-                    (ack_id, ) = self.networking.decode_message(data)
-                    await self.networking.add_ack_cnt(ack_id)
+                    message: AckCache = self.networking.decode_message(data)
+                    await self.networking.add_ack_cnt(message.ack_id)
             case MessageType.ChainAbort:
                 async with self.networking_locks[message_type]:
-                    (ack_id, exception_str, request_id) = self.networking.decode_message(data)
-                    self.networking.abort_chain(ack_id, exception_str, request_id)
+                    message: ChainAbort = self.networking.decode_message(data)
+                    self.networking.abort_chain(message.ack_id, message.exception_str, message.request_id)
             case MessageType.Unlock:
                 async with self.networking_locks[message_type]:
                     # fallback phase
                     # here we handle the logic to unlock locks held by the provided distributed transaction
-                    (t_id, success) = self.networking.decode_message(data)
-                    if success:
+                    message: Unlock = self.networking.decode_message(data)
+                    if message.success:
                         # commit changes
-                        self.local_state.commit_fallback_transaction(t_id)
+                        self.local_state.commit_fallback_transaction(message.t_id)
                     # unlock
-                    await self.unlock_tid(t_id)
+                    await self.unlock_tid(message.t_id)
             case MessageType.DeterministicReordering:
                 async with self.networking_locks[message_type]:
-                    (global_read_reservations, global_write_set, global_read_set) = self.networking.decode_message(data)
-                    self.local_state.set_global_read_write_sets(global_read_reservations,
-                                                                global_write_set,
-                                                                global_read_set)
+                    message: DeterministicReordering = self.networking.decode_message(data)
+                    self.local_state.set_global_compact_rw_sets(message.reads, message.writes)
                     self.sync_workers_event[message_type].set()
+            case MessageType.PeerBarrier:
+                message: PeerBarrierMessage = self.networking.decode_message(data)
+                if message.barrier_type in (MessageType.AriaProcessingDone, MessageType.AriaFusedCommit):
+                    # a peer is in an epoch, join it even without transactions
+                    self.remote_epoch_started(message.epoch)
+                self.peer_barrier.receive(MessageType(message.barrier_type), message.epoch, message.stage,
+                                          schema_deserialization(message.barrier_type, message.payload))
             case MessageType.RemoteWantsToProceed:
-                if not self.currently_processing:
-                    self.remote_wants_to_proceed = True
+                self.remote_epoch_started()
             case _:
                 logging.error(f"Aria protocol: Non supported command message type: {message_type}")
 
@@ -356,8 +480,7 @@ class AriaProtocol(BaseTransactionalProtocol):
         with (concurrent.futures.ProcessPoolExecutor(1) as pool):
             await self.started.wait()
             while True:
-                # need to sleep to allow the kafka consumer coroutine to read data
-                await asyncio.sleep(0)
+                await self.wait_for_work()
                 async with self.sequencer.lock:
                     # GET SEQUENCE
                     sequence: list[SequencedItem] = self.sequencer.get_epoch()
@@ -367,73 +490,84 @@ class AriaProtocol(BaseTransactionalProtocol):
                         logging.info(f'{self.id} ||| Epoch: {self.sequencer.epoch_counter} starts')
                         # Run all the epochs functions concurrently
                         epoch_start = timer()
+                        self.epoch_timer.start_epoch(time.time() * 1000)
+                        messages_sent_before: int = self.networking.send_message_calls
+                        bytes_sent_before: int = self.networking.send_message_size
                         logging.info(f'{self.id} ||| Running {len(sequence)} functions...')
                         # async with self.snapshot_state_lock:
                         if sequence:
                             async with asyncio.TaskGroup() as tg:
                                 for sequenced_item in sequence:
                                     tg.create_task(self.run_function(sequenced_item.t_id, sequenced_item.payload))
-                            # function_running_done = timer()
-                            # self.function_running_time += function_running_done - epoch_start
+                            self.epoch_timer.mark("functions")
                             # Wait for chains to finish
                             logging.info(f'{self.id} ||| '
                                          f'Waiting on chained {len(self.networking.waited_ack_events)} functions...')
                             async with asyncio.TaskGroup() as tg:
                                 for ack in self.networking.waited_ack_events.values():
                                     tg.create_task(ack.wait())
-                        # function_chains_done = timer()
-                        # self.chain_completion_time += function_chains_done - function_running_done
-                        # wait for all peers to be done processing (needed to know the aborts)
-                        await self.sync_workers(msg_type=MessageType.AriaProcessingDone,
-                                                message=(self.networking.logic_aborts_everywhere, ),
-                                                serializer=Serializer.PICKLE)
-                        # sync_time = timer()
-                        # self.sync_time += sync_time - function_chains_done
-                        logging.info(f'{self.id} ||| '
-                                     f'logic_aborts_everywhere: {self.networking.logic_aborts_everywhere}')
-                        # HERE WE KNOW ALL THE LOGIC ABORTS
-                        # removing the global logic abort transactions from the commit phase
-                        self.local_state.remove_aborted_from_rw_sets(self.networking.logic_aborts_everywhere)
-                        # Check for local state conflicts
-                        logging.info(f'{self.id} ||| Checking conflicts...')
-                        if CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.DEFAULT_SERIALIZABLE:
-                            concurrency_aborts: set[int] = self.local_state.check_conflicts()
-                        elif CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.DETERMINISTIC_REORDERING:
-                            await self.sync_workers(msg_type=MessageType.DeterministicReordering,
-                                                    message=(self.local_state.reads,
-                                                             self.local_state.write_sets,
-                                                             self.local_state.read_sets),
-                                                    serializer=Serializer.PICKLE)
-                            concurrency_aborts: set[int] = self.local_state.check_conflicts_deterministic_reordering()
-                        elif CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.SNAPSHOT_ISOLATION:
-                            concurrency_aborts: set[int] = self.local_state.check_conflicts_snapshot_isolation()
+                        n_chains: int = len(self.networking.waited_ack_events)
+                        self.epoch_timer.mark("chains")
+                        if self.pending_sync_cleanup is not None:
+                            # the barriers reach the coordinator in order, the cleanup one has to complete first
+                            await self.pending_sync_cleanup
+                            self.pending_sync_cleanup = None
+                            self.epoch_timer.mark("cleanup_sync")
+                        if FUSED_BARRIERS and CONFLICT_DETECTION_METHOD in FUSABLE_CONFLICT_DETECTION_METHODS:
+                            # a single round for the logic and the concurrency aborts
+                            await self.sync_fused_commit(len(sequence))
+                            self.epoch_timer.mark("commit_sync")
                         else:
-                            logging.error('This conflict detection method number is not a valid number')
-                            exit()
-                        # self.concurrency_aborts_everywhere |= concurrency_aborts
-                        # conflict_resolution_time = timer()
-                        # self.conflict_resolution_time += conflict_resolution_time - sync_time
-                        # Notify peers that we are ready to commit
-                        logging.info(f'{self.id} ||| Notify peers...')
-                        await self.sync_workers(msg_type=MessageType.AriaCommit,
-                                                message=(concurrency_aborts,
-                                                         self.sequencer.t_counter,
-                                                         len(sequence)),
-                                                serializer=Serializer.PICKLE)
+                            # wait for all peers to be done processing (needed to know the aborts)
+                            await self.sync_workers(msg_type=MessageType.AriaProcessingDone,
+                                                    message=AriaProcessingDone(
+                                                        self.networking.logic_aborts_everywhere))
+                            self.epoch_timer.mark("processing_sync")
+                            logging.info(f'{self.id} ||| '
+                                         f'logic_aborts_everywhere: {self.networking.logic_aborts_everywhere}')
+                            # HERE WE KNOW ALL THE LOGIC ABORTS
+                            # removing the global logic abort transactions from the commit phase
+                            self.local_state.remove_aborted_from_rw_sets(self.networking.logic_aborts_everywhere)
+                            # Check for local state conflicts
+                            logging.info(f'{self.id} ||| Checking conflicts...')
+                            if CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.DEFAULT_SERIALIZABLE:
+                                concurrency_aborts: set[int] = self.local_state.check_conflicts()
+                            elif CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.DETERMINISTIC_REORDERING:
+                                await self.sync_workers(msg_type=MessageType.DeterministicReordering,
+                                                        message=DeterministicReordering(
+                                                            *self.local_state.get_compact_rw_sets()))
+                                self.epoch_timer.mark("reordering_sync")
+                                concurrency_aborts: set[int] = \
+                                    self.local_state.check_conflicts_deterministic_reordering()
+                            elif CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.SNAPSHOT_ISOLATION:
+                                concurrency_aborts: set[int] = self.local_state.check_conflicts_snapshot_isolation()
+                            else:
+                                logging.error('This conflict detection method number is not a valid number')
+                                exit()
+                            # self.concurrency_aborts_everywhere |= concurrency_aborts
+                            self.epoch_timer.mark("conflict_detection")
+                            # Notify peers that we are ready to commit
+                            logging.info(f'{self.id} ||| Notify peers...')
+                            if PIPELINED_EPOCHS or FUSED_BARRIERS:
+                                # once the barrier completes the peers may already send the next epoch's calls
+                                self.epoch_committed.clear()
+                            await self.sync_workers(msg_type=MessageType.AriaCommit,
+                                                    message=AriaCommit(concurrency_aborts,
+                                                                       self.sequencer.t_counter,
+                                                                       len(sequence)))
+                            self.epoch_timer.mark("commit_sync")
                         # await self.send_commit_to_peers(concurrency_aborts, len(sequence))
                         # HERE WE KNOW ALL THE CONCURRENCY ABORTS
                         # Wait for remote to be ready to commit
                         logging.info(f'{self.id} ||| Waiting on remote commits...')
                         # await self.wait_commit()
-                        # sync_time = timer()
-                        # self.sync_time += sync_time - conflict_resolution_time
                         # Gather the remote concurrency aborts
                         # Commit the local while taking into account the aborts from remote
                         logging.info(f'{self.id} ||| Starting commit!')
+                        self.epoch_committed.clear()
                         self.local_state.commit(self.concurrency_aborts_everywhere)
                         logging.info(f'{self.id} ||| Sequence committed!')
-                        # commit_done = timer()
-                        # self.commit_time += commit_done - sync_time
+                        self.epoch_timer.mark("commit")
 
                         self.t_ids_to_reschedule = (self.concurrency_aborts_everywhere -
                                                     self.networking.logic_aborts_everywhere)
@@ -458,65 +592,78 @@ class AriaProtocol(BaseTransactionalProtocol):
                                 # f'writes: {self.local_state.writes}\n'
                                 # f'c_aborts: {self.concurrency_aborts_everywhere - self.logic_aborts_everywhere}'
                             )
-                            # start_fallback = timer()
                             # logging.warning(f'Logic abort ti_ds: {logic_aborts_everywhere}')
                             await self.run_fallback_strategy()
                             self.concurrency_aborts_everywhere = set()
                             self.t_ids_to_reschedule = set()
-                            # end_fallback = timer()
-                            # self.fallback_time += end_fallback - start_fallback
-
-                        for sequenced_item in sequence:
-                            # get the kafka offsets of the commited transactions in the batch
-                            # hopefully offsets came in the correct order from the python kafka client
-                            # if not we should modify the sequencer
-                            if sequenced_item.t_id not in self.concurrency_aborts_everywhere:
-                                payload = sequenced_item.payload
-                                self.topic_partition_offsets[(payload.operator_name, payload.partition)] = (
-                                    max(
-                                        payload.kafka_offset,
-                                        self.topic_partition_offsets[(payload.operator_name, payload.partition)]
-                                    )
-                                )
+                            self.epoch_timer.mark("fallback")
+
+                        # the logic aborts are answered, only the rescheduled transactions are left uncommitted
+                        self.sequencer.commit_offsets(self.t_ids_to_reschedule, self.topic_partition_offsets)
 
                         # Cleanup
-                        # start_seq_incr = timer()
                         self.sequencer.increment_epoch(
                             self.max_t_counter,
                             self.t_ids_to_reschedule
                         )
-                        # end_seq_incr = timer()
-                        # self.sequencing_time += end_seq_incr - start_seq_incr
                         # self.t_counters = {}
                         # Re-sequence the aborted transactions due to concurrency
                         epoch_end = timer()
+                        if self.epoch_controller is not None and self.epoch_controller.observe(
+                                self.sequencer.epoch_counter - 1,
+                                (epoch_end - epoch_start) * 1000,
+                                abort_rate,
+                                len(self.sequencer.distributed_log)):
+                            self.apply_epoch_size()
 
                         logging.info(
                             f'{self.id} ||| Epoch: {self.sequencer.epoch_counter - 1} done in '
                             f'{round((epoch_end - epoch_start) * 1000, 4)}ms '
                             f'global logic aborts: {len(self.networking.logic_aborts_everywhere)} '
                             f'concurrency aborts for next epoch: {len(self.concurrency_aborts_everywhere)} '
-                            f'abort rate: {abort_rate}'
+                            f'abort rate: {abort_rate} '
+                            f'aborts avoided by sequencing: {self.sequencer.deferred_conflicts} '
+                            f'barriers: {self.epoch_barriers}'
                         )
-                        # logging.warning(f'Epoch: {self.sequencer.epoch_counter - 1} done in '
-                        #                 f'{round((epoch_end - epoch_start) * 1000, 4)}ms '
-                        #                 f'function_running_time: {self.function_running_time}\n'
-                        #                 f'chain_completion_time: {self.chain_completion_time}\n'
-                        #                 f'serialization_time: {self.serialization_time}\n'
-                        #                 f'sequencing_time: {self.sequencing_time}\n'
-                        #                 f'conflict_resolution_time: {self.conflict_resolution_time}\n'
-                        #                 f'commit_time: {self.commit_time}\n'
-                        #                 f'sync_time: {self.sync_time}\n'
-                        #                 f'snapshot_time: {self.snapshot_time}\n'
-                        #                 f'fallback_time: {self.fallback_time}\n')
+                        epoch_logic_aborts: int = len(self.networking.logic_aborts_everywhere)
+                        epoch_concurrency_aborts: int = len(self.concurrency_aborts_everywhere)
                         self.cleanup_after_epoch()
-                        # start_sn = timer()
+                        self.epoch_timer.mark("cleanup")
+                        # the snapshot has to capture exactly this epoch's state, only its upload runs in the background
                         self.take_snapshot(pool)
-                        await self.sync_workers(msg_type=MessageType.SyncCleanup,
-                                                message=b'',
-                                                serializer=Serializer.NONE)
-                        # end_sn = timer()
-                        # self.snapshot_time += end_sn - start_sn
+                        self.epoch_timer.mark("snapshot")
+                        self.epoch_committed.set()
+                        self.open_next_epoch()
+                        if FUSED_BARRIERS:
+                            # the gate on the commit replaces the cleanup barrier, the next epoch's first round
+                            # already waits for every worker
+                            pass
+                        elif PIPELINED_EPOCHS:
+                            self.pending_sync_cleanup = asyncio.create_task(
+                                self.sync_workers(msg_type=MessageType.SyncCleanup, message=Empty())
+                            )
+                        else:
+                            await self.sync_workers(msg_type=MessageType.SyncCleanup, message=Empty())
+                            self.epoch_timer.mark("cleanup_sync")
+                        self.epoch_timer.end_epoch(self.sequencer.epoch_counter - 1,
+                                                   len(sequence),
+                                                   epoch_logic_aborts,
+                                                   epoch_concurrency_aborts,
+                                                   n_chains,
+                                                   self.networking.send_message_calls - messages_sent_before,
+                                                   self.networking.send_message_size - bytes_sent_before)
+
+    async def report_epoch_stats(self):
+        while True:
+            await asyncio.sleep(EPOCH_STATS_INTERVAL_SEC)
+            records = self.epoch_timer.take_unreported()
+            if not records:
+                continue
+            logging.warning(f'{self.id} ||| Epoch stats: {json.dumps(summarize(records))}')
+            await self.networking.send_message(DISCOVERY_HOST, DISCOVERY_PORT,
+                                               msg=EpochStats(self.id, [asdict(record) for record in records]),
+                                               msg_type=MessageType.EpochStats,
+                                               serializer=Serializer.SCHEMA)
 
     def cleanup_after_epoch(self):
         self.concurrency_aborts_everywhere = set()
@@ -526,8 +673,97 @@ class AriaProtocol(BaseTransactionalProtocol):
         self.response_buffer = {}
         self.waiting_on_transactions = {}
         self.fallback_locking_event_map = {}
-        self.remote_wants_to_proceed = False
+        self.remote_wants_to_proceed = self.next_epoch_wanted
+        self.next_epoch_wanted = False
         self.currently_processing = False
+        self.remote_chains_everywhere = False
+        self.epoch_barriers = 0
+
+    def apply_epoch_size(self):
+        decision = self.epoch_controller.decisions[-1] if self.epoch_controller.decisions else None
+        logging.info(f'{self.id} ||| Epoch size: {self.epoch_controller.epoch_size} '
+                     f'fetch window: {self.epoch_controller.fetch_window_ms}ms '
+                     f'{decision.reason if decision is not None else ""}')
+        self.sequencer.max_size = self.epoch_controller.epoch_size
+        self.ingress.sequence_max_size = self.epoch_controller.epoch_size
+        self.ingress.epoch_interval_ms = self.epoch_controller.fetch_window_ms
+
+    async def wait_for_work(self):
+        if self.sequencer.distributed_log or self.remote_wants_to_proceed:
+            # need to sleep to allow the kafka consumer coroutine to read data
+            await asyncio.sleep(0)
+            return
+        # idle, block until the ingress sequences a transaction or a peer starts an epoch
+        self.sequencer.work_available.clear()
+        await self.sequencer.work_available.wait()
+        if SCHEDULER_LINGER_MS > 0 and not self.remote_wants_to_proceed:
+            await asyncio.sleep(SCHEDULER_LINGER_MS / 1000)
+
+    def open_next_epoch(self):
+        self.open_epoch = self.sequencer.epoch_counter
+        self.next_epoch_opened.set()
+        self.next_epoch_opened = asyncio.Event()
+
+    def remote_epoch_started(self, epoch: int | None = None):
+        if not self.currently_processing:
+            self.remote_wants_to_proceed = True
+            self.sequencer.work_available.set()
+        elif (not self.epoch_committed.is_set()) if epoch is None else epoch > self.open_epoch:
+            # without the cleanup barrier a peer can start the next epoch before this worker finishes the current one
+            self.next_epoch_wanted = True
+
+    async def sync_fused_commit(self, sequence_size: int):
+        # Only the local logic aborts are known before the round. Checking the conflicts with the remote ones still
+        # holding reservations can only add aborts, which are rescheduled like any other concurrency abort.
+        local_logic_aborts: set[int] = set(self.networking.logic_aborts_everywhere)
+        self.local_state.remove_aborted_from_rw_sets(local_logic_aborts)
+        concurrency_aborts: set[int] = self.check_fusable_conflicts()
+        await self.sync_workers(msg_type=MessageType.AriaFusedCommit,
+                                message=AriaFusedCommit(local_logic_aborts,
+                                                        concurrency_aborts,
+                                                        self.sequencer.t_counter,
+                                                        sequence_size,
+                                                        self.networking.sent_remote_calls))
+        self.local_state.remove_aborted_from_rw_sets(self.networking.logic_aborts_everywhere - local_logic_aborts)
+        if self.remote_chains_everywhere:
+            # Remote calls can reserve keys here after the check. Every chain completed before its root joined the
+            # round, so the round served as the processing done one and the commit round follows a complete check.
+            self.epoch_timer.mark("processing_sync")
+            await self.sync_workers(msg_type=MessageType.AriaCommit,
+                                    message=AriaCommit(self.check_fusable_conflicts(),
+                                                       self.sequencer.t_counter,
+                                                       sequence_size))
+
+    def check_fusable_conflicts(self) -> set[int]:
+        if CONFLICT_DETECTION_METHOD is AriaConflictDetectionType.SNAPSHOT_ISOLATION:
+            return self.local_state.check_conflicts_snapshot_isolation()
+        return self.local_state.check_conflicts()
+
+    def serve_read_only(self, payload: RunFuncPayload) -> bool:
+        operator_partition = self.registered_operators.get((payload.operator_name, payload.partition))
+        if operator_partition is None or not operator_partition.is_read_only(payload.function_name):
+            return False
+        self.background_functions.create_task(self.run_read_only_function(payload))
+        return True
+
+    async def run_read_only_function(self, payload: RunFuncPayload):
+        # No reservations and no t_id, the function reads the state of the last committed epoch. Its Kafka offset is
+        # not tracked, after a recovery a read may be answered again.
+        await self.epoch_committed.wait()
+        response = await self.registered_operators[(payload.operator_name, payload.partition)].run_read_only_function(
+            payload.key,
+            payload.request_id,
+            payload.timestamp,
+            payload.function_name,
+            payload.params,
+            self
+        )
+        if isinstance(response, Exception):
+            response = str(response)
+        await self.egress.send_immediate(key=payload.request_id,
+                                         value=msgpack_serialization(response),
+                                         operator_name=payload.operator_name,
+                                         partition=payload.partition)
 
     async def run_fallback_function(
             self,
@@ -603,9 +839,7 @@ class AriaProtocol(BaseTransactionalProtocol):
                         )
                     )
 
-        await self.sync_workers(msg_type=MessageType.AriaFallbackStart,
-                                message=b'',
-                                serializer=Serializer.NONE)
+        await self.sync_workers(msg_type=MessageType.AriaFallbackStart, message=Empty())
         if fallback_tasks:
             async with asyncio.TaskGroup() as tg:
                 for fallback_task in fallback_tasks:
@@ -614,9 +848,7 @@ class AriaProtocol(BaseTransactionalProtocol):
             f'Epoch: {self.sequencer.epoch_counter} '
             f'Fallback strategy done waiting for peers'
         )
-        await self.sync_workers(msg_type=MessageType.AriaFallbackDone,
-                                message=b'',
-                                serializer=Serializer.NONE)
+        await self.sync_workers(msg_type=MessageType.AriaFallbackDone, message=Empty())
 
     async def unlock_tid(self, t_id_to_unlock: int):
         if t_id_to_unlock in self.fallback_locking_event_map:
@@ -655,18 +887,54 @@ class AriaProtocol(BaseTransactionalProtocol):
                     tg.create_task(self.networking.send_message(
                         self.peers[participant][0],
                         self.peers[participant][2],
-                        msg=(t_id, success),
+                        msg=Unlock(t_id, success),
                         msg_type=MessageType.Unlock,
-                        serializer=Serializer.MSGPACK)
+                        serializer=Serializer.SCHEMA)
                     )
 
-    async def sync_workers(self,
-                           msg_type: MessageType,
-                           message: tuple | bytes,
-                           serializer: Serializer = Serializer.MSGPACK):
+    async def sync_workers(self, msg_type: MessageType, message: Message):
+        self.epoch_barriers += 1
+        if DECENTRALIZED_BARRIERS:
+            await self.sync_peers(msg_type, self.sequencer.epoch_counter, message)
+            return
         await self.networking.send_message(DISCOVERY_HOST, DISCOVERY_PORT+1,
                                            msg=message,
                                            msg_type=msg_type,
-                                           serializer=serializer)
+                                           serializer=Serializer.SCHEMA)
         await self.sync_workers_event[msg_type].wait()
         self.sync_workers_event[msg_type].clear()
+
+    async def sync_peers(self, msg_type: MessageType, epoch: int, message: Message):
+        if msg_type in (MessageType.AriaProcessingDone, MessageType.AriaFusedCommit) and self.peer_barrier.use_tree:
+            # with a tree the contributions only reach the neighbours, so the wake-up is flooded along it
+            async with asyncio.TaskGroup() as tg:
+                for worker_id in self.peer_barrier.neighbours:
+                    tg.create_task(self.networking.send_message(self.peers[worker_id][0],
+                                                                self.peers[worker_id][2],
+                                                                msg=Empty(),
+                                                                msg_type=MessageType.RemoteWantsToProceed,
+                                                                serializer=Serializer.SCHEMA))
+        result = await self.peer_barrier.sync(msg_type, epoch, message)
+        match msg_type:
+            case MessageType.AriaProcessingDone:
+                self.networking.logic_aborts_everywhere = result.logic_aborts
+            case MessageType.AriaCommit:
+                self.concurrency_aborts_everywhere = result.concurrency_aborts
+                self.max_t_counter = result.t_counter
+                self.total_processed_seq_size = result.processed_seq_size
+            case MessageType.AriaFusedCommit:
+                self.networking.logic_aborts_everywhere = result.logic_aborts
+                self.concurrency_aborts_everywhere = result.concurrency_aborts
+                self.max_t_counter = result.t_counter
+                self.total_processed_seq_size = result.processed_seq_size
+                self.remote_chains_everywhere = result.remote_chains
+                self.epoch_committed.clear()
+            case MessageType.DeterministicReordering:
+                self.local_state.set_global_compact_rw_sets(result.reads, result.writes)
+
+    async def send_peer_barrier(self, worker_id: int, message: tuple[MessageType, int, int, Message]):
+        await self.networking.send_message(self.peers[worker_id][0],
+                                           self.peers[worker_id][2],
+                                           msg=peer_barrier_message(*message),
+                                           msg_type=MessageType.PeerBarrier,
+                                           serializer=Serializer.SCHEMA)
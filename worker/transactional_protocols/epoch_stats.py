@@ -0,0 +1,92 @@
+from collections import deque
+from dataclasses import dataclass, field
+from timeit import default_timer as timer
+
+
+@dataclass
+class EpochRecord(object):
+    worker_id: int
+    epoch: int
+    # wall clock start of the epoch in ms
+    start: float
+    duration_ms: float
+    sequence_size: int
+    logic_aborts: int
+    concurrency_aborts: int
+    chains: int
+    messages_sent: int
+    bytes_sent: int
+    # phase: ms, in the order the phases ran
+    phases: dict[str, float] = field(default_factory=dict)
+
+
+class EpochPhaseTimer(object):
+    """Per epoch phase durations of a worker, kept in a ring buffer.
+
+    mark(phase) charges the time since the previous mark to phase, so a phase that runs more than once in an epoch
+    adds up and the phases of an epoch sum to its duration. The records that were not reported yet are taken with
+    take_unreported.
+    """
+
+    def __init__(self, worker_id: int, history: int = 1_000):
+        self.worker_id: int = worker_id
+        self.records: deque[EpochRecord] = deque(maxlen=history)
+        self.unreported: int = 0
+        self.phases: dict[str, float] = {}
+        self.epoch_start: float = 0.0
+        self.epoch_start_wall_ms: float = 0.0
+        self.last_mark: float = 0.0
+
+    def start_epoch(self, wall_ms: float):
+        self.epoch_start = self.last_mark = timer()
+        self.epoch_start_wall_ms = wall_ms
+        self.phases = {}
+
+    def mark(self, phase: str):
+        now = timer()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_epoch(self,
+                  epoch: int,
+                  sequence_size: int,
+                  logic_aborts: int,
+                  concurrency_aborts: int,
+                  chains: int,
+                  messages_sent: int,
+                  bytes_sent: int) -> EpochRecord:
+        record = EpochRecord(self.worker_id, epoch, self.epoch_start_wall_ms, (timer() - self.epoch_start) * 1000,
+                             sequence_size, logic_aborts, concurrency_aborts, chains, messages_sent, bytes_sent,
+                             self.phases)
+        self.records.append(record)
+        self.unreported = min(self.unreported + 1, len(self.records))
+        return record
+
+    def take_unreported(self) -> list[EpochRecord]:
+        unreported = list(self.records)[len(self.records) - self.unreported:] if self.unreported else []
+        self.unreported = 0
+        return unreported
+
+
+def summarize(records: list[EpochRecord]) -> dict:
+    """The totals of the records and the share of the epoch time that went to every phase"""
+    total_ms = sum(record.duration_ms for record in records)
+    phase_ms: dict[str, float] = {}
+    for record in records:
+        for phase, duration_ms in record.phases.items():
+            phase_ms[phase] = phase_ms.get(phase, 0.0) + duration_ms
+    return {
+        "epochs": len(records),
+        "first_epoch": records[0].epoch if records else None,
+        "last_epoch": records[-1].epoch if records else None,
+        "total_ms": round(total_ms, 3),
+        "transactions": sum(record.sequence_size for record in records),
+        "logic_aborts": sum(record.logic_aborts for record in records),
+        "concurrency_aborts": sum(record.concurrency_aborts for record in records),
+        "chains": sum(record.chains for record in records),
+        "messages_sent": sum(record.messages_sent for record in records),
+        "bytes_sent": sum(record.bytes_sent for record in records),
+        "phase_ms": {phase: round(duration_ms, 3) for phase, duration_ms in phase_ms.items()},
+        "phase_percentages": {phase: round(duration_ms / total_ms * 100, 2) if total_ms else 0.0
+                              for phase, duration_ms in phase_ms.items()},
+    }
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from system_x.common.message_schemas import Message, Empty, AriaProcessingDone, AriaCommit, AriaFusedCommit, \
+    DeterministicReordering
+from system_x.common.message_types import MessageType
+
+# the stages of a peer barrier message
+CONTRIBUTION: int = 0
+RESULT: int = 1
+
+
+def merge_contributions(msg_type: MessageType, payloads: list[Message]) -> Message:
+    """Merges the barrier payloads of several workers into one of the same schema, partial merges can be merged
+    again"""
+    match msg_type:
+        case MessageType.AriaProcessingDone:
+            return AriaProcessingDone(set().union(*(payload.logic_aborts for payload in payloads)))
+        case MessageType.AriaCommit:
+            return AriaCommit(set().union(*(payload.concurrency_aborts for payload in payloads)),
+                              max(payload.t_counter for payload in payloads),
+                              sum(payload.processed_seq_size for payload in payloads))
+        case MessageType.AriaFusedCommit:
+            return AriaFusedCommit(set().union(*(payload.logic_aborts for payload in payloads)),
+                                   set().union(*(payload.concurrency_aborts for payload in payloads)),
+                                   max(payload.t_counter for payload in payloads),
+                                   sum(payload.processed_seq_size for payload in payloads),
+                                   any(payload.remote_chains for payload in payloads))
+        case MessageType.DeterministicReordering:
+            # the encoded accesses are plain concatenations of int64 arrays
+            return DeterministicReordering(b''.join(payload.reads for payload in payloads),
+                                           b''.join(payload.writes for payload in payloads))
+        case _:
+            return Empty()
+
+
+class PeerBarrier(object):
+    """The epoch barriers exchanged directly between the workers instead of through the coordinator.
+
+    Up to all_to_all_max workers every worker sends its contribution to every other one and merges them itself,
+    a single hop per barrier. Larger clusters reduce along a binary tree of the sorted worker ids and the root sends
+    the result back down, 2 * log2(n) hops but only 2 * (n - 1) messages. The peers send over their own connections,
+    so the contribution of a peer to the next epoch can arrive before the one of another peer to the current epoch,
+    the contributions and the results are kept per barrier type and epoch.
+    """
+
+    def __init__(self,
+                 worker_id: int,
+                 worker_ids: list[int],
+                 send: Callable[[int, tuple[MessageType, int, int, Message]], Awaitable],
+                 all_to_all_max: int = 8):
+        self.worker_id: int = worker_id
+        self.worker_ids: list[int] = sorted(worker_ids)
+        self.send = send
+        self.use_tree: bool = len(self.worker_ids) > all_to_all_max
+        position = self.worker_ids.index(worker_id)
+        self.parent: int | None = self.worker_ids[(position - 1) // 2] if position > 0 else None
+        self.children: list[int] = self.worker_ids[2 * position + 1:2 * position + 3]
+        # (msg_type, epoch): the contributions received for the round
+        self.contributions: dict[tuple[MessageType, int], list] = {}
+        self.contributions_done: dict[tuple[MessageType, int], asyncio.Event] = {}
+        # (msg_type, epoch): the result sent down the tree
+        self.results: dict[tuple[MessageType, int], Message] = {}
+        self.results_done: dict[tuple[MessageType, int], asyncio.Event] = {}
+
+    @property
+    def expected_contributions(self) -> int:
+        return len(self.children) if self.use_tree else len(self.worker_ids) - 1
+
+    @property
+    def neighbours(self) -> list[int]:
+        return self.children if self.parent is None else [self.parent] + self.children
+
+    def receive(self, msg_type: MessageType, epoch: int, stage: int, payload: Message):
+        barrier = (msg_type, epoch)
+        if stage == RESULT:
+            self.results[barrier] = payload
+            self.results_done.setdefault(barrier, asyncio.Event()).set()
+            return
+        contributions = self.contributions.setdefault(barrier, [])
+        contributions.append(payload)
+        if len(contributions) == self.expected_contributions:
+            self.contributions_done.setdefault(barrier, asyncio.Event()).set()
+
+    async def sync(self, msg_type: MessageType, epoch: int, payload: Message) -> Message:
+        """Contributes the local payload to the barrier of the epoch and returns the merged payload of all the
+        workers"""
+        barrier = (msg_type, epoch)
+        if not self.use_tree:
+            await self.send_to(self.worker_ids, barrier, CONTRIBUTION, payload)
+            return merge_contributions(msg_type, [payload] + await self.wait_contributions(barrier))
+        partial = merge_contributions(msg_type, [payload] + await self.wait_contributions(barrier))
+        if self.parent is None:
+            result = partial
+        else:
+            await self.send(self.parent, (msg_type, epoch, CONTRIBUTION, partial))
+            result = await self.wait_result(barrier)
+        await self.send_to(self.children, barrier, RESULT, result)
+        return result
+
+    async def send_to(self, worker_ids: list[int], barrier: tuple[MessageType, int], stage: int, payload: Message):
+        async with asyncio.TaskGroup() as tg:
+            for worker_id in worker_ids:
+                if worker_id != self.worker_id:
+                    tg.create_task(self.send(worker_id, (*barrier, stage, payload)))
+
+    async def wait_contributions(self, barrier: tuple[MessageType, int]) -> list:
+        if self.expected_contributions:
+            await self.contributions_done.setdefault(barrier, asyncio.Event()).wait()
+            del self.contributions_done[barrier]
+        return self.contributions.pop(barrier, [])
+
+    async def wait_result(self, barrier: tuple[MessageType, int]) -> Message:
+        await self.results_done.setdefault(barrier, asyncio.Event()).wait()
+        del self.results_done[barrier]
+        return self.results.pop(barrier)
@@ -2,27 +2,29 @@ import asyncio
 import gc
 import multiprocessing
 import os
+import shutil
 import time
-from asyncio import StreamReader, StreamWriter
 from copy import deepcopy
 import socket
-from struct import unpack
 from timeit import default_timer as timer
 
 import uvloop
 from aiokafka import TopicPartition
 
+from system_x.common.framed_protocol import FramedProtocol
 from system_x.common.local_state_backends import LocalStateBackend
 from system_x.common.logging import logging
-from system_x.common.tcp_networking import NetworkingManager, MessagingMode
+from system_x.common.tcp_networking import NetworkingManager, MessagingMode, unix_socket_path
 from system_x.common.operator import Operator
 from system_x.common.protocols import Protocols
 from system_x.common.serialization import Serializer
+from system_x.common.message_schemas import RegisterWorker, WorkerSignal
 from system_x.common.message_types import MessageType
 from system_x.common.util.aio_task_scheduler import AIOTaskScheduler
 
 
 from worker.operator_state.aria.in_memory_state import InMemoryOperatorState
+from worker.operator_state.aria.log_structured_state import LogStructuredOperatorState
 from worker.operator_state.stateless import Stateless
 from worker.fault_tolerance.async_snapshots import AsyncSnapshotsMinio
 from worker.transactional_protocols.aria import AriaProtocol
@@ -38,6 +40,23 @@ MINIO_ACCESS_KEY: str = os.environ['MINIO_ROOT_USER']
 MINIO_SECRET_KEY: str = os.environ['MINIO_ROOT_PASSWORD']
 
 HEARTBEAT_INTERVAL: int = int(os.getenv('HEARTBEAT_INTERVAL', 500))  # 500ms
+# use the NumPy array backed reservations for the Aria conflict detection
+VECTORIZED_CONFLICT_DETECTION: bool = bool(int(os.getenv('VECTORIZED_CONFLICT_DETECTION', 0)))
+# keep the encoding of committed values so that reads only pay for decoding a private copy
+COPY_ON_WRITE_READS: bool = bool(int(os.getenv('COPY_ON_WRITE_READS', 0)))
+# local directory and segment size of the log structured state backend
+LOG_STATE_DIR: str = os.getenv('LOG_STATE_DIR', '/tmp/system_x-state')
+LOG_STATE_SEGMENT_SIZE: int = int(os.getenv('LOG_STATE_SEGMENT_SIZE', 64 * 1024 * 1024))
+# the bytes of a segment that the compaction reads in one epoch commit, it resumes there in the next one
+LOG_STATE_COMPACTION_STEP_BYTES: int = int(os.getenv('LOG_STATE_COMPACTION_STEP_BYTES', 256 * 1024))
+# coalesce the remote calls and acks to the same worker sent within this many microseconds into one frame,
+# 0 coalesces the ones of a single event loop iteration and a negative value disables it
+MESSAGE_COALESCING_WINDOW_US: int = int(os.getenv('MESSAGE_COALESCING_WINDOW_US', -1))
+# the workers of a host also listen on a Unix domain socket per protocol port in UNIX_SOCKET_DIR,
+# and reach each other through them instead of TCP to the host IP
+COLOCATED_UNIX_SOCKETS: bool = bool(int(os.getenv('COLOCATED_UNIX_SOCKETS', 0)))
+UNIX_SOCKET_DIR: str = os.getenv('UNIX_SOCKET_DIR', '/tmp/system_x-sockets')
+PROTOCOL_UNIX_SOCKET_DIR: str | None = UNIX_SOCKET_DIR if COLOCATED_UNIX_SOCKETS else None
 
 PROTOCOL = Protocols.Aria
 
@@ -61,11 +80,14 @@ class Worker(object):
         self.protocol_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.protocol_socket.bind(('0.0.0.0', self.protocol_port))
         self.protocol_socket.setblocking(False)
+        self.protocol_unix_server: asyncio.AbstractServer | None = None
 
         self.id: int = -1
         self.networking = NetworkingManager(self.server_port)
         self.protocol_networking = NetworkingManager(self.protocol_port,
-                                                     mode=MessagingMode.PROTOCOL_PROTOCOL)
+                                                     mode=MessagingMode.PROTOCOL_PROTOCOL,
+                                                     coalesce_window_us=MESSAGE_COALESCING_WINDOW_US,
+                                                     unix_socket_dir=PROTOCOL_UNIX_SOCKET_DIR)
 
         self.operator_state_backend: LocalStateBackend = ...
         self.registered_operators: dict[tuple[str, int], Operator] = {}
@@ -73,7 +95,7 @@ class Worker(object):
         self.topic_partitions: list[TopicPartition] = []
         # worker_id: (host, port)
         self.peers: dict[int, tuple[str, int, int]] = {}
-        self.local_state: InMemoryOperatorState | Stateless = ...
+        self.local_state: InMemoryOperatorState | LogStructuredOperatorState | Stateless = ...
 
         # Primary tasks used for processing
         self.heartbeat_proc: multiprocessing.Process = ...
@@ -115,7 +137,9 @@ class Worker(object):
 
                 self.networking = NetworkingManager(self.server_port)
                 self.protocol_networking = NetworkingManager(self.protocol_port,
-                                                             mode=MessagingMode.PROTOCOL_PROTOCOL)
+                                                             mode=MessagingMode.PROTOCOL_PROTOCOL,
+                                                             coalesce_window_us=MESSAGE_COALESCING_WINDOW_US,
+                                                             unix_socket_dir=PROTOCOL_UNIX_SOCKET_DIR)
                 self.protocol_networking.set_worker_id(self.id)
                 self.networking.set_worker_id(self.id)
 
@@ -133,6 +157,10 @@ class Worker(object):
                     self.async_snapshots = AsyncSnapshotsMinio(self.id, snapshot_id=snapshot_id + 1)
                     state, metadata = self.async_snapshots.retrieve_snapshot(snapshot_id)
                     self.attach_state_to_operators_after_snapshot(state)
+                elif self.operator_state_backend is LocalStateBackend.LOG_STRUCTURED:
+                    self.async_snapshots = AsyncSnapshotsMinio(self.id, snapshot_id=snapshot_id + 1)
+                    metadata = self.async_snapshots.retrieve_segments_snapshot(snapshot_id, self.log_state_dir)
+                    self.attach_state_to_operators_after_snapshot(None)
 
                 self.function_execution_protocol = AriaProtocol(worker_id=self.id,
                                                                 peers=self.peers,
@@ -147,9 +175,9 @@ class Worker(object):
                 self.function_execution_protocol.start()
 
                 await self.networking.send_message(DISCOVERY_HOST, DISCOVERY_PORT,
-                                                   msg=(self.id, ),
+                                                   msg=WorkerSignal(self.id),
                                                    msg_type=MessageType.ReadyAfterRecovery,
-                                                   serializer=Serializer.MSGPACK)
+                                                   serializer=Serializer.SCHEMA)
                 end_time = timer()
                 logging.warning(f'Worker: {self.id} | Recovered snapshot: {snapshot_id} '
                                 f'| took: {round((end_time - start_time) * 1000, 4)}ms | OTHER FAILURE')
@@ -173,6 +201,10 @@ class Worker(object):
                     self.async_snapshots = AsyncSnapshotsMinio(self.id, snapshot_id=snapshot_id+1)
                     state, metadata = self.async_snapshots.retrieve_snapshot(snapshot_id)
                     self.attach_state_to_operators_after_snapshot(state)
+                elif self.operator_state_backend is LocalStateBackend.LOG_STRUCTURED:
+                    self.async_snapshots = AsyncSnapshotsMinio(self.id, snapshot_id=snapshot_id + 1)
+                    metadata = self.async_snapshots.retrieve_segments_snapshot(snapshot_id, self.log_state_dir)
+                    self.attach_state_to_operators_after_snapshot(None)
 
                 self.function_execution_protocol = AriaProtocol(worker_id=self.id,
                                                                 peers=self.peers,
@@ -187,9 +219,9 @@ class Worker(object):
                 self.function_execution_protocol.start()
                 # send that we are ready to the coordinator
                 await self.networking.send_message(DISCOVERY_HOST, DISCOVERY_PORT,
-                                                   msg=(self.id, ),
+                                                   msg=WorkerSignal(self.id),
                                                    msg_type=MessageType.ReadyAfterRecovery,
-                                                   serializer=Serializer.MSGPACK)
+                                                   serializer=Serializer.SCHEMA)
                 end_time = timer()
                 logging.warning(f'Worker: {self.id} | Recovered snapshot: {snapshot_id} '
                                 f'| took: {round((end_time - start_time) * 1000, 4)}ms | OWN FAILURE')
@@ -203,8 +235,17 @@ class Worker(object):
     def attach_state_to_operators_after_snapshot(self, data):
         operator_names: set[str] = set([operator.name for operator in self.registered_operators.values()])
         if self.operator_state_backend is LocalStateBackend.DICT:
-            self.local_state = InMemoryOperatorState(operator_names)
+            self.local_state = InMemoryOperatorState(operator_names,
+                                                     vectorized=VECTORIZED_CONFLICT_DETECTION,
+                                                     copy_on_write_reads=COPY_ON_WRITE_READS)
             self.local_state.set_data_from_snapshot(data)
+        elif self.operator_state_backend is LocalStateBackend.LOG_STRUCTURED:
+            # the store is rebuilt from the segments retrieved to the state directory
+            self.local_state = LogStructuredOperatorState(operator_names,
+                                                          directory=self.log_state_dir,
+                                                          segment_size=LOG_STATE_SEGMENT_SIZE,
+                                                          compaction_step_bytes=LOG_STATE_COMPACTION_STEP_BYTES,
+                                                          vectorized=VECTORIZED_CONFLICT_DETECTION)
         else:
             logging.error(f"Invalid operator state backend type: {self.operator_state_backend}")
             return
@@ -216,15 +257,30 @@ class Worker(object):
         if self.operator_state_backend is LocalStateBackend.DICT:
             self.async_snapshots = AsyncSnapshotsMinio(self.id)
             if PROTOCOL == Protocols.Aria:
-                self.local_state = InMemoryOperatorState(operator_names)
+                self.local_state = InMemoryOperatorState(operator_names,
+                                                         vectorized=VECTORIZED_CONFLICT_DETECTION,
+                                                         copy_on_write_reads=COPY_ON_WRITE_READS)
             else:
                 logging.error(f"Invalid protocol: {PROTOCOL}")
+        elif self.operator_state_backend is LocalStateBackend.LOG_STRUCTURED:
+            self.async_snapshots = AsyncSnapshotsMinio(self.id)
+            # start from an empty log, segments of a previous run are not part of this one
+            shutil.rmtree(self.log_state_dir, ignore_errors=True)
+            self.local_state = LogStructuredOperatorState(operator_names,
+                                                          directory=self.log_state_dir,
+                                                          segment_size=LOG_STATE_SEGMENT_SIZE,
+                                                          compaction_step_bytes=LOG_STATE_COMPACTION_STEP_BYTES,
+                                                          vectorized=VECTORIZED_CONFLICT_DETECTION)
         else:
             logging.error(f"Invalid operator state backend type: {self.operator_state_backend}")
             return
         for operator in self.registered_operators.values():
             operator.attach_state_networking(self.local_state, self.protocol_networking, self.dns)
 
+    @property
+    def log_state_dir(self) -> str:
+        return os.path.join(LOG_STATE_DIR, f"w{self.id}")
+
     async def handle_execution_plan(self, message):
         self.worker_operators, self.dns, self.peers, self.operator_state_backend = message
         del self.peers[self.id]
@@ -258,47 +314,36 @@ class Worker(object):
 
     async def start_tcp_service(self):
 
-        async def request_handler(reader: StreamReader, writer: StreamWriter):
-            try:
-                while True:
-                    data = await reader.readexactly(8)
-                    (size,) = unpack('>Q', data)
-                    message = await reader.readexactly(size)
-                    self.aio_task_scheduler.create_task(self.worker_controller(message))
-            except asyncio.IncompleteReadError as e:
-                logging.warning(f"Client disconnected unexpectedly: {e}")
-            except asyncio.CancelledError:
-                pass
-            finally:
-                logging.warning("Closing the connection")
-                writer.close()
-                await writer.wait_closed()
-
-        server = await asyncio.start_server(request_handler, sock=self.worker_socket, limit=2**32)
+        def frame_handler(message: bytes | bytearray):
+            self.aio_task_scheduler.create_task(self.worker_controller(message))
+
+        server = await asyncio.get_running_loop().create_server(lambda: FramedProtocol(frame_handler),
+                                                                sock=self.worker_socket)
         async with server:
             await server.serve_forever()
 
     async def start_protocol_tcp_service(self):
 
-        async def request_handler(reader: StreamReader, writer: StreamWriter):
-            try:
-                while True:
-                    data = await reader.readexactly(8)
-                    (size,) = unpack('>Q', data)
-                    message = await reader.readexactly(size)
+        def frame_handler(message: bytes | bytearray):
+            if message[0] == MessageType.Batch:
+                for batched_message in self.protocol_networking.split_batch(message):
                     self.protocol_task_scheduler.create_task(
-                        self.function_execution_protocol.protocol_tcp_controller(message)
+                        self.function_execution_protocol.protocol_tcp_controller(batched_message)
                     )
-            except asyncio.IncompleteReadError as e:
-                logging.warning(f"Client disconnected unexpectedly: {e}")
-            except asyncio.CancelledError:
-                pass
-            finally:
-                logging.warning("Closing the connection")
-                writer.close()
-                await writer.wait_closed()
-
-        server = await asyncio.start_server(request_handler, sock=self.protocol_socket, limit=2 ** 32)
+            else:
+                self.protocol_task_scheduler.create_task(
+                    self.function_execution_protocol.protocol_tcp_controller(message)
+                )
+
+        loop = asyncio.get_running_loop()
+        if PROTOCOL_UNIX_SOCKET_DIR is not None:
+            os.makedirs(PROTOCOL_UNIX_SOCKET_DIR, exist_ok=True)
+            # the co-located peers connect here, a stale socket file of a previous run is replaced
+            self.protocol_unix_server = await loop.create_unix_server(
+                lambda: FramedProtocol(frame_handler),
+                unix_socket_path(PROTOCOL_UNIX_SOCKET_DIR, self.protocol_port)
+            )
+        server = await loop.create_server(lambda: FramedProtocol(frame_handler), sock=self.protocol_socket)
         async with server:
             await server.serve_forever()
         await server.wait_closed()
@@ -310,9 +355,9 @@ class Worker(object):
     async def register_to_coordinator(self):
         self.id = await self.networking.send_message_request_response(
             DISCOVERY_HOST, DISCOVERY_PORT,
-            msg=(self.networking.host_name, self.server_port, self.protocol_port),
+            msg=RegisterWorker(self.networking.host_name, self.server_port, self.protocol_port),
             msg_type=MessageType.RegisterWorker,
-            serializer=Serializer.MSGPACK
+            serializer=Serializer.SCHEMA
         )
         logging.warning(f"Worker id received from coordinator: {self.id}")
         self.protocol_networking.set_worker_id(self.id)
@@ -326,9 +371,9 @@ class Worker(object):
             await asyncio.sleep(sleep_in_seconds)
             await networking.send_message(
                 DISCOVERY_HOST, DISCOVERY_PORT,
-                msg=(worker_id, ),
+                msg=WorkerSignal(worker_id),
                 msg_type=MessageType.Heartbeat,
-                serializer=Serializer.MSGPACK
+                serializer=Serializer.SCHEMA
             )
 
     def start_heartbeat_process(self, worker_id: int):